@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import logging
+from types import SimpleNamespace
+
+from metrics import get_metrics, video_context
+
+# Batch API 설정
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL = 30          # 상태 확인 간격(초)
+BATCH_MAX_REQUESTS = 50000        # 배치 파일 하나에 넣을 수 있는 최대 요청 수
+BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+BATCH_PRICE_FACTOR = 0.5          # Batch API 요금은 동기 요청의 절반
+CUSTOM_ID_SEPARATOR = "#"         # "<videoId>#map0"처럼 한 영상의 여러 요청을 구분
+
+def build_batch_request(custom_id, body):
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+def batch_custom_id(video_id, part):
+    """한 영상의 여러 요청(청크 요약 등)에 쓸 custom_id"""
+    return f"{video_id}{CUSTOM_ID_SEPARATOR}{part}"
+
+def video_id_of(custom_id):
+    return custom_id.split(CUSTOM_ID_SEPARATOR, 1)[0]
+
+def write_batch_file(requests, path):
+    """배치 요청 목록을 Batch API 입력 형식의 JSONL 파일로 저장"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+    return path
+
+def submit_batch(client, path):
+    """배치 파일을 업로드하고 배치 작업을 생성"""
+    with open(path, 'rb') as f:
+        batch_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+    logging.info(f"Submitted batch {batch.id} ({path})")
+    return batch
+
+def wait_for_batch(client, batch_id, poll_interval=BATCH_POLL_INTERVAL, timeout=None):
+    """배치가 끝날 때까지 주기적으로 상태를 확인"""
+    started = time.monotonic()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, 'request_counts', None)
+        if counts:
+            logging.info(f"Batch {batch_id}: {batch.status} "
+                         f"({counts.completed}/{counts.total} completed, {counts.failed} failed)")
+        if batch.status in BATCH_FINAL_STATUSES:
+            return batch
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout}s (status: {batch.status})")
+        time.sleep(poll_interval)
+
+def read_batch_results(client, batch, stage='summary'):
+    """배치 결과 파일을 읽어 {custom_id: content} 반환. 실패한 요청은 None.
+    응답 body의 usage는 custom_id의 영상에 귀속해 stage 지표로 기록 (Batch API 요금 기준)"""
+    results = {}
+    run_metrics = get_metrics()
+    for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+        if not file_id:
+            continue
+        for line in client.files.content(file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get('response') or {}
+            content = None
+            if response.get('status_code') == 200:
+                body = response.get('body') or {}
+                try:
+                    content = body['choices'][0]['message']['content']
+                except (KeyError, IndexError, TypeError):
+                    content = None
+                if body.get('usage'):
+                    with video_context(video_id_of(record['custom_id'])):
+                        run_metrics.record_usage(stage, body.get('model'), SimpleNamespace(**body['usage']),
+                                                 BATCH_PRICE_FACTOR)
+            if content is None:
+                logging.warning(f"Batch request {record.get('custom_id')} failed: {record.get('error')}")
+            results[record['custom_id']] = content
+    return results
+
+def run_batch(client, requests, batch_dir, name, poll_interval=BATCH_POLL_INTERVAL, timeout=None):
+    """요청 목록을 배치로 실행하고 {custom_id: content} 반환. 요청이 많으면 여러 배치로 나눔"""
+    results = {}
+    for part, start in enumerate(range(0, len(requests), BATCH_MAX_REQUESTS)):
+        path = os.path.join(batch_dir, f"{name}_part{part}.jsonl")
+        write_batch_file(requests[start:start + BATCH_MAX_REQUESTS], path)
+        batch = submit_batch(client, path)
+        batch = wait_for_batch(client, batch.id, poll_interval, timeout)
+        if batch.status != "completed":
+            logging.error(f"Batch {batch.id} ended with status {batch.status}")
+        results.update(read_batch_results(client, batch))
+    return results
@@ -0,0 +1,75 @@
+"""whisper_realtime 세그먼트 인코딩 경로 벤치마크: 44.1kHz WAV(기존) vs 16kHz 리샘플링 WAV/FLAC.
+
+마이크 없이 합성 음성 형태의 신호(배음 + 음절 단위 진폭 변화 + 배경 소음)로 측정합니다.
+    python benchmarks/bench_audio_encode.py --seconds 5 15 --uplink-kbps 1000
+리샘플링은 인코딩 시간을 늘리지만 업로드 바이트를 줄이므로, 제한된 업링크에서의 예상 업로드 시간과 합계도 함께 출력합니다.
+FLAC은 soundfile 패키지가 있을 때만 측정합니다.
+"""
+import os
+import sys
+import time
+import argparse
+import importlib.util
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import whisper_realtime
+from whisper_realtime import SegmentEncoder, encode_wav, samplerate
+
+def synthetic_speech(seconds, seed=0):
+    """기본 주파수가 흔들리는 배음 신호를 4Hz 음절 리듬으로 변조한 (프레임, 1) float32 오디오"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voice = sum(np.sin(phase * harmonic) / harmonic for harmonic in range(1, 12))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    audio = 0.2 * voice * syllables + rng.normal(0, 0.003, len(t))
+    return audio.astype(np.float32)[:, None]
+
+def bench(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 15], help="세그먼트 길이(초)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--uplink-kbps", type=float, default=1000, help="예상 업로드 시간 계산에 쓸 업링크 속도")
+    args = parser.parse_args()
+
+    encoders = {'wav16k': SegmentEncoder(fmt="wav")}
+    if importlib.util.find_spec("soundfile"):
+        encoders['flac16k'] = SegmentEncoder(fmt="flac")
+    else:
+        print("soundfile 패키지가 없어 FLAC은 건너뜁니다")
+
+    def upload_ms(size):
+        return size * 8 / args.uplink_kbps
+
+    print(f"{'segment':>8} {'encoder':<10} {'bytes':>10} {'size':>6} {'encode ms':>10} "
+          f"{'upload ms':>10} {'total ms':>10}  (업링크 {args.uplink_kbps:.0f}kbps)")
+    for seconds in args.seconds:
+        audio = synthetic_speech(seconds)
+        encoders_to_run = {'wav44k': lambda: encode_wav(audio).getvalue()}
+        for name, encoder in encoders.items():
+            encoders_to_run[name] = lambda encoder=encoder: encoder.encode(audio).getvalue()
+        baseline_size = None
+        for name, func in encoders_to_run.items():
+            encoded, encode_time = bench(func, args.repeat)
+            baseline_size = baseline_size or len(encoded)
+            print(f"{seconds:>7.0f}s {name:<10} {len(encoded):>10} {len(encoded) / baseline_size:>6.2f} "
+                  f"{encode_time * 1000:>10.2f} {upload_ms(len(encoded)):>10.0f} "
+                  f"{encode_time * 1000 + upload_ms(len(encoded)):>10.0f}")
+
+    print(f"\n리샘플링 필터: {whisper_realtime.resample_taps}탭, {samplerate}Hz → {whisper_realtime.stt_samplerate}Hz")
+
+if __name__ == "__main__":
+    main()
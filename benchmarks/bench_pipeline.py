@@ -0,0 +1,258 @@
+"""요약 파이프라인 오프라인 벤치마크.
+
+YouTube 시청 페이지, scrapetube 목록, YouTubeTranscriptApi, OpenAI 채팅 완성을 로컬 대체물로 바꾸고
+scrape_and_summarize_youtube_videos, analyze_itb_chunk, extract_stock_info_gpt4o를 여러 규모로 실행합니다.
+처리량, 단계별 p50/p95 지연, 최대 메모리를 출력하고 benchmarks/results/에 JSON으로 저장합니다.
+
+    python benchmarks/bench_pipeline.py --scales 10,50,100 --openai-latency 1.0 --rate-limit-rate 0.05
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/<이전 결과>.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+# 모듈 로드 시 OpenAI 클라이언트를 만들 수 있도록 가짜 키 설정 (실제 요청은 보내지 않음)
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from fake_openai import FakeOpenAI, FaultConfig
+from fake_youtube import FakeScrapetube, FakeTranscriptApi, NoTranscriptFound, WatchPageServer
+
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+ITB_CHUNK_TEXT = """
+제{n}조 (공사 수행 및 완료)
+1. 수급자는 2025년 6월 30일까지 전체 공사를 완료하여야 합니다.
+2. 기한 내에 공사가 완료되지 않을 경우, 수급자는 계약 금액의 10%에 해당하는 벌금을 납부하여야 합니다.
+3. 현지 안전 관련 법규에 따른 모든 비용은 수급자가 부담합니다.
+"""
+NER_SEGMENT_TEXT = "삼성전자는 7만원 부근에서 매수 추천드리고 현대차는 20만원에서 이익실현 하시기 바랍니다."
+
+def fake_responder(body):
+    """프롬프트 종류에 맞는 형식의 응답을 생성"""
+    prompt = body['messages'][-1]['content']
+    if "ITB" in prompt:
+        return json.dumps({
+            "chunk_id": "chunk-000",
+            "detected_risks": [{"id": "risk-001", "risk_level": "high", "risk_category": "지연 벌금",
+                                "clause": "계약 금액의 10%", "risk": "지연 시 벌금", "related_entities": []}],
+            "itb_qa": [{"question": "완료 기한은?", "answer": "2025년 6월 30일"}],
+            "analysis_rating": {"importance_score": 8.0, "target_audience": ["법무팀"], "tags": ["일정 관리"]},
+        }, ensure_ascii=False)
+    if "주식" in prompt:
+        return json.dumps({"stocks": [{"종목": "삼성전자", "가격": "70,000원", "액션": "매수",
+                                       "의견": "저점 매수", "감성": "긍정"}]}, ensure_ascii=False)
+    return "1. 콘텐츠 개요\n" + "요약 내용 " * 200
+
+class StageTimer:
+    """함수 호출을 감싸 단계별 소요 시간을 기록"""
+
+    def __init__(self):
+        self.durations = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.durations.setdefault(stage, []).append(elapsed)
+        return timed
+
+    def summary(self):
+        return {stage: percentiles(values) for stage, values in self.durations.items()}
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    def pick(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+    return {'count': len(values), 'p50': pick(0.50), 'p95': pick(0.95), 'max': values[-1]}
+
+def measure(func, track_memory):
+    """func 실행 시간과 (선택적으로) tracemalloc 최대 메모리(MB)"""
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if track_memory:
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+def bench_channel(scale, args, faults):
+    import channel_summarizer as cs
+
+    timer = StageTimer()
+    openai_client = FakeOpenAI(fake_responder, faults['openai'])
+    with WatchPageServer(faults['youtube'], args.page_kb * 1024) as server, ExitStack() as stack, \
+            tempfile.TemporaryDirectory() as workdir:
+        stack.enter_context(mock.patch.object(cs, 'WATCH_URL_TEMPLATE', server.url_template))
+        stack.enter_context(mock.patch.object(cs, 'scrapetube', FakeScrapetube(faults['youtube'])))
+        stack.enter_context(mock.patch.object(cs, 'youtube_transcript_api', SimpleNamespace(
+            YouTubeTranscriptApi=FakeTranscriptApi(faults['youtube'], args.segments),
+            NoTranscriptFound=NoTranscriptFound)))
+        stack.enter_context(mock.patch.object(cs, 'client', openai_client))
+        for stage, name in (('details', 'fetch_video_details'), ('transcript', 'fetch_transcript_segments'),
+                            ('summary', 'request_completion')):
+            stack.enter_context(mock.patch.object(cs, name, timer.wrap(stage, getattr(cs, name))))
+
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            (count, jsonl_file, _), elapsed, peak = measure(
+                lambda: cs.scrape_and_summarize_youtube_videos(
+                    "https://www.youtube.com/@benchmark", scale, max_workers=args.workers,
+                    rpm=args.rpm, tpm=args.tpm, cache_dir=None, dedupe_threshold=None),
+                args.memory)
+            errors = 0
+            if jsonl_file:
+                for record in cs.iter_jsonl(jsonl_file):
+                    errors += bool(record.get('fetch_errors')) or (record['script_true'] and not record['summary'])
+        finally:
+            os.chdir(cwd)
+
+    return {
+        'items': count or 0,
+        'elapsed': elapsed,
+        'throughput': (count or 0) / elapsed,
+        'peak_memory_mb': peak,
+        'failed_items': errors,
+        'bytes_served': server.bytes_sent,
+        'http_connections': server.connections,
+        'openai_calls': openai_client.chat.completions.calls,
+        'stages': timer.summary(),
+    }
+
+def bench_itb(scale, args, faults):
+    import itb_analysis
+
+    timer = StageTimer()
+    with mock.patch.object(itb_analysis, 'openai', FakeOpenAI(fake_responder, faults['openai'])):
+        analyze = timer.wrap('analyze_itb_chunk', itb_analysis.analyze_itb_chunk)
+        chunks = [ITB_CHUNK_TEXT.format(n=i + 1) for i in range(scale)]
+        results, elapsed, peak = measure(
+            lambda: [analyze(f"chunk-{i:03d}", chunk) for i, chunk in enumerate(chunks, start=1)], args.memory)
+    failed = sum(1 for result in results if not json.loads(result).get('detected_risks'))
+    return {'items': scale, 'elapsed': elapsed, 'throughput': scale / elapsed, 'peak_memory_mb': peak,
+            'failed_items': failed, 'stages': timer.summary()}
+
+def bench_ner(scale, args, faults):
+    import gpt_NER
+
+    timer = StageTimer()
+    with mock.patch.object(gpt_NER, 'openai', FakeOpenAI(fake_responder, faults['openai'])):
+        extract = timer.wrap('extract_stock_info_gpt4o', gpt_NER.extract_stock_info_gpt4o)
+        # scale = 5초 음성 구간 수 (분석 텍스트 길이)
+        text = " ".join([NER_SEGMENT_TEXT] * scale)
+        result, elapsed, peak = measure(lambda: extract(text), args.memory)
+    return {'items': scale, 'elapsed': elapsed, 'throughput': scale / elapsed, 'peak_memory_mb': peak,
+            'failed_items': int(result == "[]"), 'stages': timer.summary()}
+
+WORKLOADS = {'channel': bench_channel, 'itb': bench_itb, 'ner': bench_ner}
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_results(results):
+    print(f"\n{'workload':<10} {'scale':>6} {'elapsed':>9} {'items/s':>9} {'peak MB':>8} {'failed':>7}  stages (p50/p95 ms)")
+    for result in results:
+        stages = ", ".join(
+            f"{stage} {s['p50'] * 1000:.0f}/{s['p95'] * 1000:.0f}"
+            for stage, s in result['stages'].items() if s['count']
+        )
+        peak = f"{result['peak_memory_mb']:.1f}" if result['peak_memory_mb'] is not None else "-"
+        print(f"{result['workload']:<10} {result['scale']:>6} {result['elapsed']:>8.2f}s "
+              f"{result['throughput']:>9.2f} {peak:>8} {result['failed_items']:>7}  {stages}")
+
+def print_comparison(results, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(r['workload'], r['scale']): r for r in json.load(f)['results']}
+    print(f"\n이전 결과와 비교 ({previous_path})")
+    print(f"{'workload':<10} {'scale':>6} {'items/s':>9} {'before':>9} {'change':>8}")
+    for result in results:
+        before = previous.get((result['workload'], result['scale']))
+        if not before:
+            continue
+        change = result['throughput'] / before['throughput'] - 1
+        print(f"{result['workload']:<10} {result['scale']:>6} {result['throughput']:>9.2f} "
+              f"{before['throughput']:>9.2f} {change:>+7.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", default="channel,itb,ner")
+    parser.add_argument("--scales", default="10,50,100")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=int, default=500)
+    parser.add_argument("--tpm", type=int, default=10_000_000)
+    parser.add_argument("--segments", type=int, default=600, help="영상당 자막 구간 수")
+    parser.add_argument("--page-kb", type=int, default=1200, help="시청 페이지 크기(KB)")
+    parser.add_argument("--youtube-latency", type=float, default=0.05)
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="OpenAI 429 응답 비율")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="tracemalloc 끄기 (측정 오버헤드 제거)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<시각>_<git rev>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    faults = {
+        'youtube': FaultConfig(args.youtube_latency, args.jitter, args.error_rate, 0.0, args.seed),
+        'openai': FaultConfig(args.openai_latency, args.jitter, args.error_rate, args.rate_limit_rate, args.seed),
+    }
+
+    # 영상별 INFO 로그가 측정을 방해하지 않도록 경고 이상만 출력
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for workload in args.workloads.split(","):
+        for scale in (int(value) for value in args.scales.split(",")):
+            print(f"Running {workload} x {scale}...", flush=True)
+            result = WORKLOADS[workload](scale, args, faults)
+            result.update(workload=workload, scale=scale)
+            results.append(result)
+
+    print_results(results)
+    if args.compare:
+        print_comparison(results, args.compare)
+
+    revision = git_revision()
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{revision}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'revision': revision, 'timestamp': datetime.now().isoformat(),
+                   'config': vars(args), 'results': results}, f, indent=4, ensure_ascii=False)
+    print(f"\nSaved results to {output}")
+
+if __name__ == "__main__":
+    main()
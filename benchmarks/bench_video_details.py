@@ -0,0 +1,73 @@
+"""get_video_details 추출 경로 벤치마크: BeautifulSoup 전체 파싱 vs 스트리밍 정규식 추출.
+
+실제 페이지 구조(대용량 스크립트 + 본문 중간의 <meta itemprop>)를 흉내 낸 합성 페이지를 크기별로 사용합니다.
+    python benchmarks/bench_video_details.py
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_meta import extract_video_meta, parse_video_details_soup
+
+CHUNK_SIZE = 64 * 1024
+PAGE_SIZES_KB = (600, 1200, 2400)  # 합성 시청 페이지 크기
+
+def synthetic_watch_page(size_bytes=1200 * 1024):
+    """약 1.2MB 크기의 시청 페이지 형태 HTML"""
+    head = '<!DOCTYPE html><html><head><title>영상 - YouTube</title>'
+    filler_script = '<script>var ytcfg = {' + ','.join(f'"k{i}":"{"x" * 40}"' for i in range(2000)) + '};</script>'
+    player = ('<script>var ytInitialPlayerResponse = {"videoDetails":{"videoId":"abc","viewCount":"123456"},'
+              '"microformat":{"playerMicroformatRenderer":{"uploadDate":"2024-08-10T05:00:12-07:00"}}};</script>')
+    meta = ('<div id="watch7-content"><meta itemprop="uploadDate" content="2024-08-10T05:00:12-07:00">'
+            '<meta itemprop="interactionCount" content="123456"></div>')
+    body = '<body>' + filler_script + player + meta
+    page = head + '</head>' + body
+    padding = '<div class="item">' + '가' * 200 + '</div>'
+    while len(page.encode('utf-8')) < size_bytes:
+        page += padding * 100
+    return page + '</body></html>'
+
+def synthetic_pages():
+    return {f"synthetic-{size}KB": synthetic_watch_page(size * 1024).encode('utf-8') for size in PAGE_SIZES_KB}
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+def bench(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'page':<30} {'size':>8} {'bs4 (ms)':>10} {'fast (ms)':>10} {'read':>8} {'speedup':>8}  match")
+    for name, data in synthetic_pages().items():
+        soup_result, soup_time = bench(lambda: parse_video_details_soup(data.decode('utf-8', 'replace')), args.repeat)
+
+        consumed = []
+        def fast():
+            consumed.clear()
+            def counting_chunks():
+                for chunk in iter_chunks(data):
+                    consumed.append(len(chunk))
+                    yield chunk
+            return extract_video_meta(counting_chunks())
+        fast_result, fast_time = bench(fast, args.repeat)
+
+        read_ratio = sum(consumed) / len(data)
+        print(f"{name:<30} {len(data) // 1024:>6}KB {soup_time * 1000:>10.2f} {fast_time * 1000:>10.2f} "
+              f"{read_ratio:>7.0%} {soup_time / fast_time:>7.1f}x  {soup_result == fast_result}")
+
+if __name__ == "__main__":
+    main()
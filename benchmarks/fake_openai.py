@@ -0,0 +1,218 @@
+"""테스트/오프라인 실행용 로컬 OpenAI 대체 클라이언트.
+
+실제 OpenAI 클라이언트와 같은 호출 형태(client.chat.completions.*, client.files.*, client.batches.*)를
+흉내 내며, 응답 내용은 responder(body) 함수가 만든다. 채팅 완성은 지연, 오류율, 429 응답을 주입할 수 있다.
+"""
+import json
+import time
+import uuid
+import random
+import threading
+from types import SimpleNamespace
+
+def echo_responder(body):
+    """마지막 메시지 앞부분을 그대로 돌려주는 기본 응답 생성기"""
+    content = body['messages'][-1]['content']
+    return f"[fake summary] {content[:200]}"
+
+def _chat_completion_body(model, content, prompt_tokens=0, completion_tokens=0):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+def _namespace(value):
+    """dict/list를 속성 접근이 가능한 응답 객체로 변환"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+def rate_limit_error(retry_after_ms=200):
+    """openai.RateLimitError와 같은 예외 (openai/httpx가 설치된 환경에서는 실제 예외 타입을 사용)"""
+    headers = {
+        'retry-after-ms': str(retry_after_ms),
+        'x-ratelimit-remaining-requests': '0',
+        'x-ratelimit-reset-requests': f"{retry_after_ms}ms",
+    }
+    try:
+        import httpx
+        from openai import RateLimitError
+    except ImportError:
+        error = RuntimeError("Rate limit reached (fake)")
+        error.response = SimpleNamespace(status_code=429, headers=headers)
+        return error
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers, request=request)
+    return RateLimitError("Rate limit reached (fake)", response=response, body=None)
+
+class FaultConfig:
+    """지연(latency ± jitter초), 일반 오류 비율, 429 비율 설정"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def apply(self):
+        """지연 후, 설정된 확률로 429 또는 일반 오류를 발생시킴"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            roll = self.random.random()
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            raise rate_limit_error()
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise RuntimeError("Internal server error (fake)")
+
+class FakeRawResponse:
+    def __init__(self, parsed, headers):
+        self.parsed = parsed
+        self.headers = headers
+
+    def parse(self):
+        return self.parsed
+
+STREAM_PIECE_CHARS = 16  # stream=True 응답에서 delta 하나에 담을 글자 수
+
+class FakeChatCompletions:
+    def __init__(self, responder, faults, stream_delay=0.0):
+        self.responder = responder
+        self.faults = faults
+        self.stream_delay = stream_delay
+        self.with_raw_response = SimpleNamespace(create=self._create_raw)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        self.faults.apply()
+        with self.lock:
+            self.calls += 1
+        body = dict(kwargs, model=model, messages=messages)
+        content = self.responder(body)
+        prompt_tokens = sum(len(message['content']) for message in messages)
+        if kwargs.get('stream'):
+            include_usage = (kwargs.get('stream_options') or {}).get('include_usage', False)
+            return self._stream(model, content, prompt_tokens, include_usage)
+        return _namespace(_chat_completion_body(model, content, prompt_tokens, len(content)))
+
+    def _stream(self, model, content, prompt_tokens, include_usage):
+        """stream=True 응답: STREAM_PIECE_CHARS 글자씩 delta로 나눠 stream_delay초 간격으로 보냄"""
+        for i in range(0, len(content), STREAM_PIECE_CHARS):
+            if self.stream_delay:
+                time.sleep(self.stream_delay)
+            yield _namespace({"model": model, "usage": None, "choices": [
+                {"index": 0, "delta": {"content": content[i:i + STREAM_PIECE_CHARS]}, "finish_reason": None}]})
+        yield _namespace({"model": model, "usage": None, "choices": [
+            {"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if include_usage:
+            yield _namespace({"model": model, "choices": [], "usage": {
+                "prompt_tokens": prompt_tokens, "completion_tokens": len(content),
+                "total_tokens": prompt_tokens + len(content)}})
+
+    def _create_raw(self, model, messages, **kwargs):
+        return FakeRawResponse(self.create(model, messages, **kwargs), {
+            'x-ratelimit-remaining-requests': '10000',
+            'x-ratelimit-remaining-tokens': '10000000',
+        })
+
+class FakeFiles:
+    def __init__(self, store):
+        self.store = store
+
+    def create(self, file, purpose):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.store[file_id] = file.read()
+        return SimpleNamespace(id=file_id, purpose=purpose, bytes=len(self.store[file_id]))
+
+    def content(self, file_id):
+        data = self.store[file_id]
+        return SimpleNamespace(text=data.decode('utf-8'), content=data, read=lambda: data)
+
+class FakeBatches:
+    """업로드된 JSONL을 처리하는 로컬 배치 엔드포인트. processing_delay초 후 completed가 된다."""
+
+    def __init__(self, store, responder, processing_delay, fail_ids):
+        self.store = store
+        self.responder = responder
+        self.processing_delay = processing_delay
+        self.fail_ids = fail_ids
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def create(self, input_file_id, endpoint, completion_window, metadata=None):
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        requests = [json.loads(line) for line in self.store[input_file_id].decode('utf-8').splitlines() if line.strip()]
+        with self.lock:
+            self.batches[batch_id] = {
+                'id': batch_id,
+                'endpoint': endpoint,
+                'input_file_id': input_file_id,
+                'created_at': time.monotonic(),
+                'requests': requests,
+                'result': None,
+            }
+        return self.retrieve(batch_id)
+
+    def _process(self, batch):
+        outputs, errors = [], []
+        for request in batch['requests']:
+            custom_id = request['custom_id']
+            if custom_id in self.fail_ids:
+                errors.append({"id": f"req_{uuid.uuid4().hex[:8]}", "custom_id": custom_id,
+                               "response": {"status_code": 500, "body": {"error": {"message": "fake failure"}}},
+                               "error": {"code": "server_error", "message": "fake failure"}})
+                continue
+            body = request['body']
+            content = self.responder(body)
+            prompt_tokens = sum(len(message['content']) for message in body['messages'])
+            outputs.append({"id": f"req_{uuid.uuid4().hex[:8]}", "custom_id": custom_id, "error": None,
+                            "response": {"status_code": 200,
+                                         "body": _chat_completion_body(body.get('model'), content,
+                                                                       prompt_tokens, len(content))}})
+        output_file_id = self._store_jsonl(outputs)
+        error_file_id = self._store_jsonl(errors) if errors else None
+        return output_file_id, error_file_id, len(outputs), len(errors)
+
+    def _store_jsonl(self, records):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.store[file_id] = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode('utf-8')
+        return file_id
+
+    def retrieve(self, batch_id):
+        with self.lock:
+            batch = self.batches[batch_id]
+            total = len(batch['requests'])
+            if batch['result'] is None and time.monotonic() - batch['created_at'] >= self.processing_delay:
+                batch['result'] = self._process(batch)
+            if batch['result'] is None:
+                return SimpleNamespace(id=batch_id, status="in_progress", output_file_id=None, error_file_id=None,
+                                       request_counts=SimpleNamespace(total=total, completed=0, failed=0))
+            output_file_id, error_file_id, completed, failed = batch['result']
+            return SimpleNamespace(id=batch_id, status="completed", output_file_id=output_file_id,
+                                   error_file_id=error_file_id,
+                                   request_counts=SimpleNamespace(total=total, completed=completed, failed=failed))
+
+class FakeOpenAI:
+    """OpenAI 클라이언트 대체. 모듈 수준 openai.chat.completions.create 대신 써도 된다.
+
+    FakeOpenAI(responder=..., faults=FaultConfig(latency=0.5, rate_limit_rate=0.05),
+               processing_delay=0.1, fail_ids={'videoId'}, stream_delay=0.01)
+    """
+
+    def __init__(self, responder=echo_responder, faults=None, processing_delay=0.0, fail_ids=(), stream_delay=0.0):
+        self.store = {}
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(responder, faults or FaultConfig(), stream_delay))
+        self.files = FakeFiles(self.store)
+        self.batches = FakeBatches(self.store, responder, processing_delay, set(fail_ids))
@@ -0,0 +1,123 @@
+"""벤치마크용 로컬 YouTube 대체물: 시청 페이지 HTTP 서버, scrapetube 목록, YouTubeTranscriptApi.
+
+FaultConfig(fake_openai)로 지연, 오류율, 429 응답을 설정한다.
+"""
+import os
+import sys
+import random
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_openai import FaultConfig
+from bench_video_details import synthetic_watch_page
+
+SCRAPETUBE_PAGE_SIZE = 30  # scrapetube가 한 번의 continuation 요청으로 받는 영상 수
+# 자막 구간 문장 재료. 영상마다 video_id로 시드한 난수로 조합해 영상별로 다른 스크립트를 만든다
+TRANSCRIPT_AREAS = ("강남", "서초", "송파", "용산", "마포", "성동", "분당", "과천", "목동", "노원")
+TRANSCRIPT_TOPICS = ("재건축 아파트 매수 시점", "전세 보증금 반환", "대출 금리 변동", "청약 가점 전략",
+                     "분양권 전매 제한", "양도세 중과 유예", "갭투자 위험", "입주 물량과 전세가")
+
+def fake_video_id(index):
+    return f"vid{index:08d}"
+
+class FakeScrapetube:
+    """scrapetube.get_channel 대체. 페이지(30개)마다 한 번씩 지연/오류를 적용"""
+
+    def __init__(self, faults=None):
+        self.faults = faults or FaultConfig()
+
+    def get_channel(self, channel_id=None, channel_url=None, channel_username=None, limit=None, **kwargs):
+        count = limit or 100
+        for index in range(count):
+            if index % SCRAPETUBE_PAGE_SIZE == 0:
+                self.faults.apply()
+            yield {
+                'videoId': fake_video_id(index),
+                'title': {'runs': [{'text': f"부동산 상담 영상 {index}"}]},
+                'publishedTimeText': {'simpleText': f"{index + 1}일 전"},
+            }
+
+class NoTranscriptFound(Exception):
+    """youtube_transcript_api.NoTranscriptFound 대체 (대체 API는 발생시키지 않음)"""
+
+class FakeTranscriptApi:
+    """YouTubeTranscriptApi 대체. segments_per_video개의 5초 자막 구간을 반환 (내용은 video_id마다 다름)"""
+
+    def __init__(self, faults=None, segments_per_video=600):
+        self.faults = faults or FaultConfig()
+        self.segments_per_video = segments_per_video
+
+    def get_transcript(self, video_id, languages=('ko',), **kwargs):
+        self.faults.apply()
+        rng = random.Random(video_id)
+        return [
+            {'text': f"{i}번째 구간입니다 {rng.choice(TRANSCRIPT_AREAS)} {rng.choice(TRANSCRIPT_TOPICS)}에 대해 "
+                     f"{rng.randint(1, 99)}억 {rng.randint(1, 9999)}만원 기준으로 이야기합니다",
+             'start': i * 5.0, 'duration': 5.0}
+            for i in range(self.segments_per_video)
+        ]
+
+class WatchPageServer:
+    """/watch?v=<id> 요청에 합성 시청 페이지를 돌려주는 로컬 HTTP 서버 (keep-alive 지원, 연결 수를 connections에 기록)"""
+
+    def __init__(self, faults=None, page_bytes=1200 * 1024):
+        self.faults = faults or FaultConfig()
+        self.page = synthetic_watch_page(page_bytes).encode('utf-8')
+        self.requests = 0
+        self.connections = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                video_id = parse_qs(urlparse(self.path).query).get('v', [''])[0]
+                try:
+                    server.faults.apply()
+                except Exception as e:
+                    # 429 주입 시 429, 그 외 오류는 503으로 응답
+                    self.send_error(getattr(getattr(e, 'response', None), 'status_code', 503))
+                    return
+                body = server.page.replace(b'"abc"', f'"{video_id}"'.encode('utf-8'))
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 클라이언트가 필요한 값을 찾은 뒤 연결을 끊는 경우
+                    pass
+                with server.lock:
+                    server.requests += 1
+                    server.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url_template(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}/watch?v={{video_id}}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
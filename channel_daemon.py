@@ -0,0 +1,254 @@
+"""여러 채널을 주기적으로 확인해 새 영상을 요약하는 헤드리스 데몬.
+
+채널 목록 파일(JSON) 예시:
+    [
+        {"url": "https://www.youtube.com/@channel1", "interval_minutes": 30, "limit": 20},
+        {"url": "https://www.youtube.com/@channel2"}
+    ]
+
+실행:
+    python channel_daemon.py channels.json --workers 8
+"""
+import os
+import json
+import time
+import signal
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from lazy_imports import LazyModule
+from channel_summarizer import (
+    fetch_video, summarize_video, append_video, get_http_session, open_dedupe_index, MARKDOWN_HEADER,
+    FETCH_MAX_WORKERS, PER_HOST_LIMIT, SUMMARY_RPM, SUMMARY_TPM,
+)
+from rate_limiter import RateLimitScheduler
+from metrics import get_metrics, serve_prometheus
+from video_cache import VideoCache, CACHE_DIR
+from results_store import ResultsStore, RESULTS_DB
+
+# 무거운 외부 패키지는 처음 사용할 때 import (--help, 설정 검증이 빠르도록)
+scrapetube = LazyModule("scrapetube")
+
+# 데몬 기본 설정
+DEFAULT_INTERVAL_MINUTES = 60  # 채널별 확인 주기
+DEFAULT_LIMIT = 20             # 한 번에 확인할 최신 영상 수 (처음 추가된 채널의 백필 규모)
+STATE_DIR = "daemon_state"
+OUTPUT_DIR = "daemon_output"
+TICK_SECONDS = 5               # 스케줄 확인 및 작업 분배 간격
+MAX_FAILURES = 3               # 이 횟수 이상 실패한 영상은 더 이상 재시도하지 않음
+SEEN_HISTORY = 1000            # 채널별로 기억할 처리 완료 videoId 수
+
+def load_channels(path):
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    channels = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {'url': entry}
+        channels.append({
+            'url': entry['url'],
+            'name': entry.get('name') or entry['url'].rstrip("/").split("/")[-1],
+            'interval': entry.get('interval_minutes', DEFAULT_INTERVAL_MINUTES) * 60,
+            'limit': entry.get('limit', DEFAULT_LIMIT),
+        })
+    return channels
+
+class ChannelState:
+    """채널별 처리 완료/실패 기록. 영상 하나가 끝날 때마다 디스크에 저장"""
+
+    def __init__(self, state_dir, name):
+        self.path = os.path.join(state_dir, f"{name}.json")
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.seen = deque(data.get('seen', []), maxlen=SEEN_HISTORY)
+        self.seen_set = set(self.seen)
+        self.failures = data.get('failures', {})
+        self.last_poll = data.get('last_poll')
+
+    def is_done(self, video_id):
+        return video_id in self.seen_set or self.failures.get(video_id, 0) >= MAX_FAILURES
+
+    def mark_done(self, video_id):
+        if len(self.seen) == self.seen.maxlen:
+            self.seen_set.discard(self.seen[0])
+        self.seen.append(video_id)
+        self.seen_set.add(video_id)
+        self.failures.pop(video_id, None)
+
+    def mark_failed(self, video_id):
+        self.failures[video_id] = self.failures.get(video_id, 0) + 1
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seen': list(self.seen), 'failures': self.failures, 'last_poll': self.last_poll},
+                      f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class ChannelDaemon:
+    def __init__(self, channels, state_dir=STATE_DIR, output_dir=OUTPUT_DIR, max_workers=FETCH_MAX_WORKERS,
+                 per_host_limit=PER_HOST_LIMIT, rpm=SUMMARY_RPM, tpm=SUMMARY_TPM, cache_dir=CACHE_DIR,
+                 store_path=RESULTS_DB):
+        os.makedirs(state_dir, exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
+        self.channels = channels
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.states = {channel['name']: ChannelState(state_dir, channel['name']) for channel in channels}
+        self.queues = {channel['name']: deque() for channel in channels}
+        self.queued_ids = set()
+        self.next_poll = {channel['name']: 0.0 for channel in channels}
+        self.rotation = deque(channel['name'] for channel in channels)
+        self.session = get_http_session(max_workers)
+        self.scheduler = RateLimitScheduler(rpm, tpm)
+        self.cache = VideoCache(cache_dir) if cache_dir else None
+        self.dedupe = open_dedupe_index(cache_dir)
+        self.store = ResultsStore(store_path) if store_path else None
+        self.running = True
+
+    def stop(self, signum=None, frame=None):
+        logging.info("Stopping daemon after in-flight videos finish...")
+        self.running = False
+
+    def poll(self, channel):
+        """채널의 최신 영상 중 아직 처리하지 않은 영상을 채널 큐에 추가"""
+        name = channel['name']
+        state = self.states[name]
+        new_videos = []
+        try:
+            for video in scrapetube.get_channel(channel_url=channel['url'], limit=channel['limit']):
+                if not state.is_done(video['videoId']) and video['videoId'] not in self.queued_ids:
+                    video['channel'] = name
+                    new_videos.append(video)
+        except Exception as e:
+            logging.error(f"Error polling channel {name}: {str(e)}")
+        # 오래된 영상부터 처리해 출력이 업로드 순서대로 쌓이도록 함
+        for video in reversed(new_videos):
+            self.queues[name].append(video)
+            self.queued_ids.add(video['videoId'])
+        state.last_poll = datetime.now().isoformat()
+        state.save()
+        self.next_poll[name] = time.monotonic() + channel['interval']
+        if new_videos:
+            logging.info(f"Channel {name}: {len(new_videos)} new videos queued")
+
+    def next_video(self):
+        """채널을 돌아가며 하나씩 꺼내는 라운드 로빈. 백필이 큰 채널이 다른 채널을 막지 않음"""
+        for _ in range(len(self.rotation)):
+            name = self.rotation[0]
+            self.rotation.rotate(-1)
+            if self.queues[name]:
+                return name, self.queues[name].popleft()
+        return None, None
+
+    def process(self, video):
+        fetch_video(video, self.session, self.per_host_limit, cache=self.cache)
+        summarize_video(video, self.scheduler, self.cache, self.dedupe)
+        return video
+
+    def record(self, name, video):
+        """완료된 영상을 채널 출력 파일에 추가하고 상태를 저장"""
+        state = self.states[name]
+        self.queued_ids.discard(video['videoId'])
+        if video.get('fetch_errors') or (video['script_true'] and not video.get('summary')):
+            state.mark_failed(video['videoId'])
+            logging.warning(f"Channel {name}: video {video['videoId']} failed "
+                            f"({state.failures[video['videoId']]}/{MAX_FAILURES})")
+        else:
+            jsonl_path = os.path.join(self.output_dir, f"{name}.jsonl")
+            markdown_path = os.path.join(self.output_dir, f"{name}_summary.md")
+            new_markdown = not os.path.exists(markdown_path)
+            with open(jsonl_path, 'a', encoding='utf-8') as jsonl_file, \
+                    open(markdown_path, 'a', encoding='utf-8') as markdown_file:
+                if new_markdown:
+                    markdown_file.write(MARKDOWN_HEADER)
+                append_video(jsonl_file, markdown_file, video)
+            if self.store:
+                self.store.add_video(video, channel=name)
+            state.mark_done(video['videoId'])
+            logging.info(f"Channel {name}: saved {video['videoId']}")
+        state.save()
+
+    def run(self, once=False):
+        """once=True이면 모든 채널을 한 번 확인하고 큐가 빌 때까지 처리한 뒤 종료"""
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            polled_once = False
+            while self.running:
+                now = time.monotonic()
+                if not (once and polled_once):
+                    for channel in self.channels:
+                        if now >= self.next_poll[channel['name']]:
+                            self.poll(channel)
+                    polled_once = True
+
+                # 워커 수만큼만 제출해 채널 간 공정성을 유지
+                while len(in_flight) < self.max_workers:
+                    name, video = self.next_video()
+                    if video is None:
+                        break
+                    in_flight[executor.submit(self.process, video)] = (name, video)
+
+                if once and not in_flight:
+                    break
+                if not in_flight:
+                    time.sleep(TICK_SECONDS)
+                    continue
+
+                done, _ = wait(in_flight, timeout=TICK_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, video = in_flight.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logging.error(f"Error processing video {video['videoId']}: {str(e)}")
+                        video.setdefault('fetch_errors', []).append({'stage': 'process', 'error': str(e)})
+                        video.setdefault('script_true', False)
+                    self.record(name, video)
+
+            # 종료 요청 시 진행 중인 영상은 마무리하고 기록
+            for future, (name, video) in in_flight.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    video.setdefault('fetch_errors', []).append({'stage': 'process', 'error': str(e)})
+                    video.setdefault('script_true', False)
+                self.record(name, video)
+        if self.dedupe:
+            self.dedupe.save()
+        if self.store:
+            self.store.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 YouTube 채널의 새 영상을 주기적으로 요약하는 데몬")
+    parser.add_argument("channels", help="채널 목록 JSON 파일")
+    parser.add_argument("--state-dir", default=STATE_DIR)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=FETCH_MAX_WORKERS)
+    parser.add_argument("--rpm", type=int, default=SUMMARY_RPM)
+    parser.add_argument("--tpm", type=int, default=SUMMARY_TPM)
+    parser.add_argument("--once", action="store_true", help="모든 채널을 한 번만 처리하고 종료")
+    parser.add_argument("--metrics-port", type=int, help="Prometheus /metrics 엔드포인트 포트")
+    parser.add_argument("--db", default=RESULTS_DB, help="결과 저장소 SQLite 파일")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.metrics_port:
+        serve_prometheus(args.metrics_port)
+
+    daemon = ChannelDaemon(load_channels(args.channels), args.state_dir, args.output_dir,
+                           args.workers, rpm=args.rpm, tpm=args.tpm, store_path=args.db)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run(once=args.once)
+    logging.info("Daemon metrics:\n" + get_metrics().summary_table())
+
+if __name__ == "__main__":
+    main()
@@ -1,160 +1,699 @@
 import os
+import sys
 import json
 import time
 import logging
+import threading
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from dotenv import load_dotenv
-import scrapetube
-import requests
-from bs4 import BeautifulSoup
-from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
-from openai import OpenAI
-import questionary
+from urllib.parse import urlparse
+from lazy_imports import LazyModule
+from rate_limiter import RateLimitScheduler, estimate_request_tokens, estimate_tokens
+from video_cache import VideoCache, CACHE_DIR, prompt_hash
+from video_meta import extract_video_meta
+from batch_summarizer import build_batch_request, batch_custom_id, run_batch, BATCH_POLL_INTERVAL
+from dedupe_index import DedupeIndex, DEDUPE_THRESHOLD
+from metrics import get_metrics, start_run, video_context, current_video
+from transcript_compress import compress_segments, DEFAULT_OPTIONS as DEFAULT_COMPRESSION
+from transcript_chunker import chunk_segments, chunk_label, segments_from_text
+from markdown_report import MARKDOWN_HEADER, get_video_title, create_markdown_section, create_markdown
+from results_store import ResultsStore, RESULTS_DB
 
+# 무거운 외부 패키지는 실제로 쓰일 때 import (--help, 캐시/저장소 명령의 시작 시간 단축)
+scrapetube = LazyModule("scrapetube")
+requests = LazyModule("requests")
+openai = LazyModule("openai")
+questionary = LazyModule("questionary")
+youtube_transcript_api = LazyModule("youtube_transcript_api")
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# OpenAI 클라이언트는 첫 요청 시 생성 (get_client). 테스트/오케스트레이션에서는 직접 교체 가능
+client = None
+_client_lock = threading.Lock()
 
-# 환경 변수 로드
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# 동시 수집 설정
+FETCH_MAX_WORKERS = 8   # 영상 정보/스크립트 수집 워커 수
+PER_HOST_LIMIT = 4      # 호스트별 동시 요청 수 제한
+TRANSCRIPT_HOST = "www.youtube.com"  # YouTubeTranscriptApi가 요청하는 호스트
+DETAILS_CHUNK_SIZE = 64 * 1024       # 시청 페이지 스트리밍 읽기 단위
+DETAILS_MAX_BYTES = 4 * 1024 * 1024  # 업로드 날짜/조회수를 찾을 때 읽을 최대 바이트
+DETAILS_DRAIN_BYTES = 64 * 1024      # 값을 찾은 뒤 연결 재사용을 위해 더 읽을 최대 바이트 (남으면 연결을 끊음)
+WATCH_URL_TEMPLATE = "https://www.youtube.com/watch?v={video_id}"  # 벤치마크에서 로컬 서버로 교체
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=OPENAI_API_KEY)
+# 요약 생성 설정
+SUMMARY_MODEL = "gpt-4o-2024-08-06"
+SUMMARY_MAX_WORKERS = 8    # 동시 요약 요청 수
+SUMMARY_RPM = 500          # 분당 요청 수 예산
+SUMMARY_TPM = 30000        # 분당 토큰 수 예산
+SUMMARY_MAX_RETRIES = 5    # 429 응답 시 재시도 횟수
+SUMMARY_SYSTEM_PROMPT = """다음 프롬프트를 사용하여 부동산 콘텐츠의 스크립트로부터 인사이트 리포트를 생성하세요.:
 
-def get_video_details(video_url):
+                1. 콘텐츠 개요
+                2. 상담의 목적과 내용
+                3. 전체 콘텐츠의 주요 키워드
+                4. 상세 내용
+                5. 언급된 주요 지역
+                6. 주요한 인사이트(교훈)
+                7. 그래서 내집마련을 원하는 내가 알아야할 결론
+
+                이 요약 리포트는 콘텐츠의 핵심을 빠르게 파악하고, 개인 투자자에게 유용한 인사이트를 얻는 데 도움이 되어야 합니다."""
+
+# 요약 전 스크립트 정리 옵션 (None이면 원본 그대로 사용, 항목은 transcript_compress.DEFAULT_OPTIONS 참고)
+TRANSCRIPT_COMPRESSION = dict(DEFAULT_COMPRESSION)
+
+# 긴 스크립트 map-reduce 요약 설정
+MAP_REDUCE_THRESHOLD_TOKENS = 12000  # 이보다 긴 스크립트는 청크로 나눠 요약
+MAP_CHUNK_TOKENS = 4000              # 청크당 최대 토큰 수
+MAP_MAX_WORKERS = 4                  # 영상 하나의 청크를 동시에 요약할 수
+MAP_SYSTEM_PROMPT = """다음은 긴 부동산 상담 콘텐츠 스크립트의 한 구간입니다.
+                나중에 전체 인사이트 리포트를 작성할 수 있도록, 이 구간의 상담 내용, 주요 키워드, 언급된 지역,
+                수치(가격, 금리, 날짜 등)와 인사이트를 빠짐없이 간결한 항목으로 정리하세요."""
+
+# Batch API 모드 설정
+BATCH_DIR = "batches"  # 배치 입력 JSONL 저장 위치
+
+_http_session = None
+_session_lock = threading.Lock()
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+def get_client():
+    """공유 OpenAI 클라이언트를 반환 (최초 호출 시 .env의 OPENAI_API_KEY로 생성)"""
+    global client
+    with _client_lock:
+        if client is None:
+            from dotenv import load_dotenv
+            load_dotenv()
+            client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return client
+
+def get_http_session(pool_size=FETCH_MAX_WORKERS):
+    """커넥션 풀을 공유하는 requests 세션을 반환 (최초 호출 시 생성)"""
+    global _http_session
+    with _session_lock:
+        if _http_session is None:
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+def host_slot(url_or_host, per_host_limit=PER_HOST_LIMIT):
+    """호스트별 동시 요청 수를 제한하는 세마포어를 반환"""
+    host = urlparse(url_or_host).netloc or url_or_host
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(per_host_limit)
+        return _host_semaphores[host]
+
+def fetch_video_details(video_url, session=None):
+    """영상 페이지에서 업로드 날짜와 조회수를 추출 (실패 시 예외 발생).
+    페이지 전체를 파싱하지 않고 스트리밍으로 읽다가 두 값을 찾으면 파싱을 멈춤.
+    남은 본문이 DETAILS_DRAIN_BYTES 이내면 마저 읽어 연결을 풀에 돌려 keep-alive로 재사용하고, 더 길면 연결을 끊음"""
+    session = session or get_http_session()
+    run_metrics = get_metrics()
+
+    def counted(chunks):
+        for chunk in chunks:
+            run_metrics.record('details', bytes=len(chunk))
+            yield chunk
+
+    with session.get(video_url, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        chunks = counted(response.iter_content(chunk_size=DETAILS_CHUNK_SIZE))
+        read = 0
+
+        def limited(limit):
+            # 한도를 먼저 확인해 한도를 넘은 뒤에는 청크를 더 받지 않음
+            nonlocal read
+            while read < limit:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                read += len(chunk)
+                yield chunk
+
+        details = extract_video_meta(limited(DETAILS_MAX_BYTES), DETAILS_MAX_BYTES)
+        # 본문을 끝까지 읽어야 urllib3가 연결을 풀에 반납함. 남은 본문이 길면 with 종료 시 연결을 끊음
+        for _ in limited(read + DETAILS_DRAIN_BYTES):
+            pass
+        return details
+
+def get_video_details(video_url, session=None):
     try:
-        response = requests.get(video_url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        date_element = soup.find('meta', itemprop='uploadDate')
-        date = date_element['content'] if date_element else 'Unknown date'
-        
-        views_element = soup.find('meta', itemprop='interactionCount')
-        views = views_element['content'] if views_element else 'Unknown views'
-        
-        return {'date': date, 'views': views}
+        return fetch_video_details(video_url, session)
     except Exception as e:
         logging.error(f"Error getting video details: {str(e)}")
         return {'date': 'Unknown date', 'views': 'Unknown views'}
 
+def fetch_transcript_segments(video_id, language='ko'):
+    """자막 구간 목록({'text', 'start', 'duration'})을 반환 (실패 시 예외 발생)"""
+    return youtube_transcript_api.YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
+
+def join_transcript(segments):
+    return " ".join([text['text'] for text in segments])
+
+def fetch_video_transcript(video_id, language='ko'):
+    """스크립트를 가져와 하나의 문자열로 결합 (실패 시 예외 발생)"""
+    return join_transcript(fetch_transcript_segments(video_id, language))
+
 def get_video_transcript(video_id, language='ko'):
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
-        return " ".join([text['text'] for text in transcript])
-    except NoTranscriptFound:
+        return fetch_video_transcript(video_id, language)
+    except youtube_transcript_api.NoTranscriptFound:
         logging.warning(f"No transcript found for video {video_id}")
         return None
     except Exception as e:
         logging.error(f"Error getting transcript for video {video_id}: {str(e)}")
         return None
 
-def generate_summary(script):
+def request_completion(messages, scheduler=None, max_retries=SUMMARY_MAX_RETRIES):
+    """채팅 완성 요청 하나를 rate limit 스케줄러와 429 재시도 하에 실행하고 content를 반환"""
+    estimated_tokens = estimate_request_tokens("".join(message['content'] for message in messages))
+    for attempt in range(max_retries + 1):
+        if scheduler:
+            scheduler.acquire(estimated_tokens)
+        try:
+            raw_response = get_client().chat.completions.with_raw_response.create(
+                model=SUMMARY_MODEL,
+                messages=messages
+            )
+            response = raw_response.parse()
+            get_metrics().record_usage('summary', SUMMARY_MODEL, getattr(response, 'usage', None))
+            if scheduler:
+                scheduler.update_from_headers(raw_response.headers)
+                usage = getattr(response, 'usage', None)
+                scheduler.reconcile(estimated_tokens, usage.total_tokens if usage else None)
+            return response.choices[0].message.content  # content만 반환
+
+        except openai.RateLimitError as e:
+            headers = e.response.headers if getattr(e, 'response', None) is not None else None
+            if attempt == max_retries:
+                logging.error(f"Error generating summary: rate limited after {max_retries} retries")
+                return None
+            get_metrics().record('summary', retries=1)
+            if scheduler:
+                # 스케줄러가 모든 워커를 일시정지시키므로 다음 acquire에서 대기
+                delay = scheduler.on_rate_limited(headers, attempt)
+            else:
+                delay = min(60, 2 ** attempt)
+                time.sleep(delay)
+            logging.warning(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+
+        except Exception as e:
+            logging.error(f"Error generating summary: {str(e)}")
+            return None
+
+def summary_messages(script):
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Here is the script: {script}"}
+    ]
+
+def map_messages(chunk, total):
+    return [
+        {"role": "system", "content": MAP_SYSTEM_PROMPT},
+        {"role": "user", "content": f"[{chunk_label(chunk, total)}]\n{chunk['text']}"}
+    ]
+
+def reduce_messages(chunks, notes):
+    merged_notes = "\n\n".join(
+        f"[{chunk_label(chunk, len(chunks))}]\n{note}" for chunk, note in zip(chunks, notes)
+    )
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Here are the notes of the script, in order: {merged_notes}"}
+    ]
+
+def generate_summary(script, scheduler=None, max_retries=SUMMARY_MAX_RETRIES, segments=None,
+                     map_threshold_tokens=MAP_REDUCE_THRESHOLD_TOKENS, chunk_tokens=MAP_CHUNK_TOKENS,
+                     map_workers=MAP_MAX_WORKERS):
+    """스크립트 요약 리포트 생성. 스크립트가 map_threshold_tokens보다 길면
+    자막 구간 경계로 나눈 청크를 병렬로 요약(map)한 뒤 7개 항목 리포트로 병합(reduce)한다."""
+    if estimate_tokens(script) <= map_threshold_tokens:
+        return request_completion(summary_messages(script), scheduler, max_retries)
+
+    chunks = chunk_segments(segments or segments_from_text(script), chunk_tokens)
+    logging.info(f"Long transcript: summarizing {len(chunks)} chunks in parallel")
+    video_id = current_video()
+
+    def map_chunk(chunk):
+        # 맵 단계 워커 스레드에서도 토큰/비용이 같은 영상에 집계되도록 함
+        with video_context(video_id):
+            return request_completion(map_messages(chunk, len(chunks)), scheduler, max_retries)
+
+    with ThreadPoolExecutor(max_workers=map_workers) as executor:
+        notes = list(executor.map(map_chunk, chunks))
+
+    if any(note is None for note in notes):
+        logging.error("Error generating summary: failed to summarize one or more chunks")
+        return None
+
+    return request_completion(reduce_messages(chunks, notes), scheduler, max_retries)
+
+def summary_cache_key(video_id):
+    """videoId + 시스템 프롬프트/모델 해시. 프롬프트가 바뀌면 요약을 다시 생성"""
+    return f"{video_id}-{prompt_hash(SUMMARY_MODEL, SUMMARY_SYSTEM_PROMPT, MAP_SYSTEM_PROMPT)}"
+
+def summarize_video(video, scheduler=None, cache=None, dedupe=None):
+    """스크립트가 있는 영상의 요약을 생성해 video['summary']에 저장.
+    캐시된 요약 → 이미 요약된 영상과 중복(dedupe) → 새 요약 생성 순으로 시도"""
+    with video_context(video['videoId']), get_metrics().timed('summary'):
+        return _summarize_video(video, scheduler, cache, dedupe)
+
+def _summarize_video(video, scheduler, cache, dedupe):
+    # 자막 구간은 긴 스크립트 청크 분할에만 쓰고 결과 파일에는 남기지 않음
+    segments = video.pop('segments', None)
+    if not video['script_true']:
+        video['summary'] = None
+        logging.warning(f"No script available for video: {video['title']}")
+        return video
+
+    key = summary_cache_key(video['videoId'])
+    cached = cache.get('summaries', key) if cache else None
+    if cached is not None:
+        video['summary'] = cached
+        get_metrics().record('summary', cache_hits=1)
+        logging.info(f"Using cached summary for video: {video['title']}")
+        return video
+
+    duplicate = dedupe.find_duplicate(video['videoId'], video['script']) if dedupe else None
+    if duplicate:
+        # 재업로드/하이라이트 클립: 원본 영상의 요약을 재사용하고 링크를 남김
+        video['summary'] = duplicate.pop('summary')
+        video['duplicate_of'] = duplicate
+        get_metrics().record('summary', dedupe_hits=1)
+        logging.info(f"Reusing summary of {duplicate['videoId']} for duplicate video: {video['title']}")
+        return video
+
+    video['summary'] = generate_summary(video['script'], scheduler, segments=segments)  # 이미 content만 반환됨
+    if cache and video['summary']:
+        cache.set('summaries', key, video['summary'])
+    if dedupe and video['summary']:
+        dedupe.add(video['videoId'], video['script'], video['summary'], get_video_title(video), video.get('channel'))
+    logging.info(f"Generated summary for video: {video['title']}")
+    return video
+
+def summarize_videos_batch(videos, batch_dir=BATCH_DIR, cache=None, batch_client=None,
+                           poll_interval=BATCH_POLL_INTERVAL, timeout=None, dedupe=None):
+    """요약 요청을 OpenAI Batch API로 한꺼번에 실행하고 결과를 custom_id(videoId)로 영상에 매핑.
+    MAP_REDUCE_THRESHOLD_TOKENS보다 긴 스크립트는 generate_summary와 같이 청크별 요약(map) 요청을 먼저 배치로
+    보내고, 모든 청크가 성공한 영상만 병합(reduce) 요청을 두 번째 배치로 보낸다."""
+    batch_client = batch_client or get_client()
+    requests_by_id = {}
+    map_requests = []
+    chunks_by_id = {}
+    for video in videos:
+        segments = video.pop('segments', None)
+        video.setdefault('summary', None)
+        if not video['script_true']:
+            continue
+        cached = cache.get('summaries', summary_cache_key(video['videoId'])) if cache else None
+        if cached is not None:
+            video['summary'] = cached
+            continue
+        duplicate = dedupe.find_duplicate(video['videoId'], video['script']) if dedupe else None
+        if duplicate:
+            video['summary'] = duplicate.pop('summary')
+            video['duplicate_of'] = duplicate
+            continue
+        video_id = video['videoId']
+        if estimate_tokens(video['script']) <= MAP_REDUCE_THRESHOLD_TOKENS:
+            requests_by_id[video_id] = build_batch_request(video_id, {
+                "model": SUMMARY_MODEL, "messages": summary_messages(video['script'])})
+            continue
+        chunks = chunk_segments(segments or segments_from_text(video['script']), MAP_CHUNK_TOKENS)
+        chunks_by_id[video_id] = chunks
+        requests_by_id[video_id] = None  # 병합 요청은 청크 요약이 끝난 뒤 만듦
+        map_requests += [build_batch_request(batch_custom_id(video_id, f"map{i}"), {
+            "model": SUMMARY_MODEL, "messages": map_messages(chunk, len(chunks))}) for i, chunk in enumerate(chunks)]
+
+    if not requests_by_id:
+        logging.info("No pending summaries for batch")
+        return videos
+
+    name = datetime.now().strftime("summaries_%Y%m%d_%H%M%S")
+    first_round = [request for request in requests_by_id.values() if request] + map_requests
+    if chunks_by_id:
+        logging.info(f"Long transcripts: {len(map_requests)} map requests for {len(chunks_by_id)} videos")
+    results = run_batch(batch_client, first_round, batch_dir, name, poll_interval, timeout)
+
+    reduce_requests = []
+    for video_id, chunks in chunks_by_id.items():
+        notes = [results.pop(batch_custom_id(video_id, f"map{i}"), None) for i in range(len(chunks))]
+        if any(note is None for note in notes):
+            logging.error(f"Error generating summary for {video_id}: failed to summarize one or more chunks")
+            continue
+        reduce_requests.append(build_batch_request(video_id, {
+            "model": SUMMARY_MODEL, "messages": reduce_messages(chunks, notes)}))
+    if reduce_requests:
+        results.update(run_batch(batch_client, reduce_requests, batch_dir, f"{name}_reduce", poll_interval, timeout))
+
+    for video in videos:
+        summary = results.get(video['videoId'])
+        if summary:
+            video['summary'] = summary
+            if cache:
+                cache.set('summaries', summary_cache_key(video['videoId']), summary)
+            if dedupe:
+                dedupe.add(video['videoId'], video['script'], summary, get_video_title(video), video.get('channel'))
+        elif video['videoId'] in requests_by_id:
+            logging.warning(f"No batch result for video: {video['title']}")
+    logging.info(f"Batch summaries: {sum(1 for r in results.values() if r)}/{len(requests_by_id)} succeeded")
+    return videos
+
+def fetch_video(video, session=None, per_host_limit=PER_HOST_LIMIT, language='ko', cache=None):
+    """영상 하나의 상세 정보와 스크립트를 수집하고, 실패 내역은 video['fetch_errors']에 기록"""
+    with video_context(video['videoId']):
+        return _fetch_video(video, session, per_host_limit, language, cache)
+
+def _fetch_video(video, session, per_host_limit, language, cache):
+    run_metrics = get_metrics()
+    video_id = video['videoId']
+    video['url'] = WATCH_URL_TEMPLATE.format(video_id=video_id)
+    errors = []
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": """다음 프롬프트를 사용하여 부동산 콘텐츠의 스크립트로부터 인사이트 리포트를 생성하세요.:
+        with run_metrics.timed('details'):
+            details = cache.get('details', video_id) if cache else None
+            if details is None:
+                with host_slot(video['url'], per_host_limit):
+                    details = fetch_video_details(video['url'], session)
+                if cache:
+                    cache.set('details', video_id, details)
+            else:
+                run_metrics.record('details', cache_hits=1)
+        video['details'] = details
+    except Exception as e:
+        logging.error(f"Error getting video details for {video_id}: {str(e)}")
+        video['details'] = {'date': 'Unknown date', 'views': 'Unknown views'}
+        errors.append({'stage': 'details', 'error': str(e)})
 
-                1. 콘텐츠 개요
-                2. 상담의 목적과 내용
-                3. 전체 콘텐츠의 주요 키워드
-                4. 상세 내용
-                5. 언급된 주요 지역
-                6. 주요한 인사이트(교훈)
-                7. 그래서 내집마련을 원하는 내가 알아야할 결론
+    try:
+        # 스크립트가 없는 경우는 나중에 자동 자막이 생길 수 있으므로 캐시하지 않음
+        transcript_key = f"{video_id}-{language}"
+        with run_metrics.timed('transcript', expected=youtube_transcript_api.NoTranscriptFound):
+            segments = cache.get('transcripts', transcript_key) if cache else None
+            if segments is None:
+                with host_slot(TRANSCRIPT_HOST, per_host_limit):
+                    segments = fetch_transcript_segments(video_id, language)
+                if cache:
+                    cache.set('transcripts', transcript_key, segments)
+            else:
+                run_metrics.record('transcript', cache_hits=1)
+                if isinstance(segments, str):
+                    # 구간 정보 없이 문자열로 저장된 이전 캐시 항목
+                    segments = segments_from_text(segments)
+        if TRANSCRIPT_COMPRESSION is not None:
+            # 캐시에는 원본 구간을 두고, 요약에 쓸 스크립트만 압축
+            segments, stats = compress_segments(segments, TRANSCRIPT_COMPRESSION)
+            run_metrics.record('transcript', raw_tokens=stats['tokens_before'],
+                               compressed_tokens=stats['tokens_after'])
+            video['script_compression'] = stats
+        video['script'] = join_transcript(segments)
+        video['segments'] = segments
+    except youtube_transcript_api.NoTranscriptFound:
+        logging.warning(f"No transcript found for video {video_id}")
+        video['script'] = None
+    except Exception as e:
+        logging.error(f"Error getting transcript for video {video_id}: {str(e)}")
+        video['script'] = None
+        errors.append({'stage': 'transcript', 'error': str(e)})
 
-                이 요약 리포트는 콘텐츠의 핵심을 빠르게 파악하고, 개인 투자자에게 유용한 인사이트를 얻는 데 도움이 되어야 합니다."""},
-                {"role": "user", "content": f"Here is the script: {script}"}
-            ]
-        )
-        return response.choices[0].message.content  # content만 반환
+    video['script_true'] = video['script'] is not None
+    video['length'] = len(video['script']) if video['script'] else 0
+    video['fetch_errors'] = errors
+    return video
 
+def fetch_video_safely(video, session, per_host_limit=PER_HOST_LIMIT, cache=None):
+    """fetch_video와 같지만 단계별 처리 밖에서 발생한 예외도 fetch_errors에 기록하고 영상을 반환"""
+    try:
+        return fetch_video(video, session, per_host_limit, cache=cache)
     except Exception as e:
-        logging.error(f"Error generating summary: {str(e)}")
+        # fetch_video 밖에서 발생한 예외도 전체 실행을 중단시키지 않음
+        logging.error(f"Error fetching video {video.get('videoId')}: {str(e)}")
+        video.setdefault('details', {'date': 'Unknown date', 'views': 'Unknown views'})
+        video.setdefault('script', None)
+        video['script_true'] = video['script'] is not None
+        video['length'] = len(video['script']) if video['script'] else 0
+        video['fetch_errors'] = video.get('fetch_errors', []) + [{'stage': 'fetch', 'error': str(e)}]
+        return video
+
+def fetch_videos_concurrently(videos, max_workers=FETCH_MAX_WORKERS, per_host_limit=PER_HOST_LIMIT, cache=None):
+    """여러 영상을 스레드 풀로 동시에 수집. 결과는 채널 순서를 유지"""
+    session = get_http_session(max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda video: fetch_video_safely(video, session, per_host_limit, cache),
+                                    videos))
+
+    failed = sum(1 for video in results if video['fetch_errors'])
+    logging.info(f"Fetched {len(results)} videos ({failed} with errors)")
+    return results
+
+def open_dedupe_index(cache_dir=CACHE_DIR, threshold=DEDUPE_THRESHOLD):
+    """채널/실행 간에 공유되는 중복 스크립트 색인. threshold가 None이면 중복 검출을 끔.
+    cache_dir가 None(--no-cache)이면 디스크에 쓰지 않고 이번 실행 안에서만 쓰는 메모리 색인"""
+    if threshold is None:
         return None
+    return DedupeIndex(os.path.join(cache_dir, "dedupe_index.json") if cache_dir else None, threshold)
 
-def format_date(date_string):
-    try:
-        date_object = datetime.strptime(date_string, "%Y-%m-%dT%H:%M:%S%z")
-        return date_object.strftime("%Y년 %m월 %d일")
-    except ValueError:
-        logging.warning(f"Date format error: {date_string}")
-        return "날짜 정보 없음"
+def iter_jsonl(filename):
+    """JSONL 파일의 레코드를 하나씩 읽음 (손상된 마지막 줄은 무시)"""
+    if not os.path.exists(filename):
+        return
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping corrupt JSONL line in {filename}")
+
+def reorder_jsonl(filename, video_ids):
+    """JSONL 레코드를 video_ids 순서로 다시 씀. 목록에 없는 레코드는 기존 순서대로 뒤에 둠.
+    레코드 전체가 아니라 줄 위치만 메모리에 두고, 손상된 줄은 버림"""
+    offsets = {}
+    with open(filename, 'rb') as f:
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                offsets.setdefault(json.loads(line)['videoId'], position)
+            except (ValueError, KeyError, TypeError):
+                continue
+        ordered = [video_id for video_id in dict.fromkeys(video_ids) if video_id in offsets]
+        listed = set(ordered)
+        ordered += [video_id for video_id in offsets if video_id not in listed]
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, 'wb') as out:
+            for video_id in ordered:
+                f.seek(offsets[video_id])
+                line = f.readline()
+                out.write(line if line.endswith(b"\n") else line + b"\n")
+    os.replace(tmp_filename, filename)
 
-def format_views(views):
+def append_video(jsonl_file, markdown_file, video):
+    """완료된 영상을 JSONL 레코드와 Markdown 섹션으로 즉시 기록"""
+    jsonl_file.write(json.dumps(video, ensure_ascii=False, default=str) + "\n")
+    jsonl_file.flush()
+    markdown_file.write(create_markdown_section(video))
+    markdown_file.flush()
+
+def list_channel_videos(channel_url, video_count, high_water_mark=None, listed=None):
+    """채널의 최신 영상 목록을 하나씩 반환. high_water_mark(지난 실행의 최신 videoId)를 만나면 중단.
+    listed(list)가 주어지면 목록 순서(최신순)대로 videoId를 추가함"""
+    channel_name = channel_url.split("/")[-1]
+    for video in scrapetube.get_channel(channel_url=channel_url, limit=video_count):
+        if high_water_mark and video['videoId'] == high_water_mark:
+            break
+        video['channel'] = channel_name
+        if listed is not None:
+            listed.append(video['videoId'])
+        yield video
+
+def iter_channel_summaries(channel_url, video_count, skip_ids=(), high_water_mark=None,
+                           max_workers=FETCH_MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                           summary_workers=SUMMARY_MAX_WORKERS, rpm=SUMMARY_RPM, tpm=SUMMARY_TPM, cache=None,
+                           dedupe=None, listed=None):
+    """수집 → 요약이 끝난 영상을 채널 순서대로 하나씩 반환하는 스트리밍 파이프라인.
+    동시에 처리 중인 영상은 max_workers * 2개로 제한되어 영상 수와 관계없이 메모리 사용량이 일정함.
+    listed에는 건너뛴 영상을 포함해 목록의 videoId가 최신순으로 쌓임"""
+    session = get_http_session(max_workers)
+    scheduler = RateLimitScheduler(rpm, tpm)
+    summary_slots = threading.BoundedSemaphore(summary_workers)
+
+    def process(video):
+        fetch_video_safely(video, session, per_host_limit, cache)
+        with summary_slots:
+            try:
+                summarize_video(video, scheduler, cache, dedupe)
+            except Exception as e:
+                logging.error(f"Error summarizing video {video['videoId']}: {str(e)}")
+                video['summary'] = None
+                video['fetch_errors'].append({'stage': 'summary', 'error': str(e)})
+        return video
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for video in list_channel_videos(channel_url, video_count, high_water_mark, listed):
+            if video['videoId'] in skip_ids:
+                continue
+            pending.append(executor.submit(process, video))
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def output_paths(output_dir, channel_name, video_count):
+    """오늘 실행의 (JSONL, Markdown, 지표 JSON) 파일 경로"""
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{channel_name}_{datetime.now().strftime('%Y%m%d')}_{video_count}videos")
+    return f"{prefix}.jsonl", f"{prefix}_summary.md", f"{prefix}_metrics.json"
+
+def scrape_and_summarize_youtube_videos(channel_url, video_count,
+                                        max_workers=FETCH_MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                                        summary_workers=SUMMARY_MAX_WORKERS, rpm=SUMMARY_RPM, tpm=SUMMARY_TPM,
+                                        cache_dir=CACHE_DIR, incremental=False, dedupe_threshold=DEDUPE_THRESHOLD,
+                                        store_path=RESULTS_DB, output_dir="."):
+    """채널 영상을 스트리밍으로 처리해 JSONL/Markdown과 결과 저장소(store_path, None이면 사용 안 함)에 한 편씩 기록.
+    같은 날 같은 설정으로 다시 실행하면 JSONL에 이미 기록된 영상은 건너뛰고 이어서 처리함.
+
+    Returns:
+        (처리된 영상 수, JSONL 파일명, Markdown 파일명). 실패 시 (None, None, None)
+    """
     try:
-        return f"{int(views):,}"
-    except ValueError:
-        logging.warning(f"Views format error: {views}")
-        return "조회수 정보 없음"
+        run_metrics = start_run()
+        channel_name = channel_url.split("/")[-1]
+        cache = VideoCache(cache_dir) if cache_dir else None
+        state = cache.load_channel_state(channel_name) if cache else {}
+        dedupe = open_dedupe_index(cache_dir, dedupe_threshold)
+        store = ResultsStore(store_path) if store_path else None
+        high_water_mark = state.get('last_video_id') if incremental else None
 
-def get_thumbnail_url(video_id):
-    return f"https://img.youtube.com/vi/{video_id}/0.jpg"
+        jsonl_filename, markdown_filename, metrics_filename = output_paths(output_dir, channel_name, video_count)
 
-def create_markdown(videos):
-    markdown_content = "# 부동산 상담 콘텐츠 요약\n\n"
-    
-    for video in videos:
-        title = video.get('title', {}).get('runs', [{}])[0].get('text', 'Unknown Title')
-        video_id = video.get('videoId', 'Unknown ID')
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        date = video.get('details', {}).get('date', 'Unknown Date')
-        views = video.get('details', {}).get('views', 'Unknown Views')
-        
-        markdown_content += f"## [{title}]({url})\n\n"
-        markdown_content += f"![썸네일](https://img.youtube.com/vi/{video_id}/0.jpg)\n\n"
-        markdown_content += f"- 업로드 날짜: {date}\n"
-        markdown_content += f"- 조회수: {views}회\n\n"
-        
-        if 'summary' in video and video['summary']:
-            markdown_content += f"### 요약\n\n{video['summary']}\n\n"  # 직접 summary 내용 사용
+        # 이어서 처리: 이미 기록된 videoId를 건너뛰고, Markdown은 JSONL 기준으로 다시 맞춤
+        done_ids = set()
+        listed = []  # 이번 실행에서 목록에 나온 videoId (최신순)
+        for record in iter_jsonl(jsonl_filename):
+            done_ids.add(record['videoId'])
+            if store and not store.has_video(record['videoId']):
+                store.add_video(record, channel=channel_name)
+        if done_ids:
+            logging.info(f"Resuming from {jsonl_filename}: {len(done_ids)} videos already done")
+        with open(markdown_filename, 'w', encoding='utf-8') as markdown_file:
+            markdown_file.write(MARKDOWN_HEADER)
+            for record in iter_jsonl(jsonl_filename):
+                markdown_file.write(create_markdown_section(record))
+
+        processed = 0
+        with open(jsonl_filename, 'a', encoding='utf-8') as jsonl_file, \
+                open(markdown_filename, 'a', encoding='utf-8') as markdown_file:
+            for video in iter_channel_summaries(channel_url, video_count, done_ids, high_water_mark,
+                                                max_workers, per_host_limit, summary_workers, rpm, tpm, cache,
+                                                dedupe, listed):
+                append_video(jsonl_file, markdown_file, video)
+                if store:
+                    store.add_video(video, channel=channel_name)
+                done_ids.add(video['videoId'])
+                processed += 1
+                logging.info(f"Saved video {processed}: {video['title']}")
+
+            # 증분 모드: 이전 실행 결과를 새 영상 뒤에 이어 붙여 병합
+            previous_file = state.get('jsonl_file') if incremental else None
+            if previous_file and previous_file != jsonl_filename:
+                for record in iter_jsonl(previous_file):
+                    if record.get('videoId') not in done_ids:
+                        append_video(jsonl_file, markdown_file, record)
+                        if store:
+                            store.add_video(record, channel=channel_name)
+                        done_ids.add(record['videoId'])
+
+        # 이어 쓴 새 영상이 기존 레코드 뒤에 붙으므로 파일을 목록 순서(최신순)로 다시 정렬
+        reorder_jsonl(jsonl_filename, listed)
+        logging.info(f"Created JSONL file: {jsonl_filename}")
+        # 최종 Markdown은 배치 경로와 같이 저장소에서 생성 (저장소를 쓰지 않으면 JSONL에서)
+        if store:
+            store.write_markdown(markdown_filename,
+                                 video_ids=[record['videoId'] for record in iter_jsonl(jsonl_filename)])
         else:
-            markdown_content += "### 요약\n\n요약 정보가 없습니다.\n\n"
-        
-        markdown_content += "---\n\n"
-    
-    return markdown_content
+            with open(markdown_filename, 'w', encoding='utf-8') as markdown_file:
+                markdown_file.write(MARKDOWN_HEADER)
+                for record in iter_jsonl(jsonl_filename):
+                    markdown_file.write(create_markdown_section(record))
+            logging.info(f"Created Markdown file: {markdown_filename}")
+        if dedupe:
+            dedupe.save()
+        if store:
+            store.close()
+        run_metrics.write_json(metrics_filename)
+        logging.info("Run metrics:\n" + run_metrics.summary_table())
+
+        # 최신 영상은 파일 순서가 아니라 목록의 첫 영상 (새 영상이 없으면 이전 값 유지)
+        newest_id = listed[0] if listed else state.get('last_video_id')
+        if cache and newest_id:
+            cache.save_channel_state(channel_name, {
+                'last_video_id': newest_id,
+                'last_run': datetime.now().isoformat(),
+                'jsonl_file': jsonl_filename,
+                'markdown_file': markdown_filename,
+            })
 
-def scrape_and_summarize_youtube_videos(channel_url, video_count):
+        return len(done_ids), jsonl_filename, markdown_filename
+
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
+        return None, None, None
+
+
+def scrape_and_summarize_youtube_videos_batch(channel_url, video_count,
+                                              max_workers=FETCH_MAX_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                                              cache_dir=CACHE_DIR, batch_dir=BATCH_DIR, batch_client=None,
+                                              poll_interval=BATCH_POLL_INTERVAL, dedupe_threshold=DEDUPE_THRESHOLD,
+                                              store_path=RESULTS_DB, output_dir="."):
+    """대량 실행용 배치 모드: 모든 영상을 수집한 뒤 요약을 Batch API 하나로 제출하고,
+    결과를 매핑한 다음 JSONL/Markdown을 생성. 반환값은 scrape_and_summarize_youtube_videos와 같음"""
     try:
-        videos = list(scrapetube.get_channel(channel_url=channel_url, limit=video_count))
+        run_metrics = start_run()
+        channel_name = channel_url.split("/")[-1]
+        cache = VideoCache(cache_dir) if cache_dir else None
+
+        videos = list(list_channel_videos(channel_url, video_count))
         logging.info(f"Retrieved {len(videos)} videos from the channel")
+        videos = fetch_videos_concurrently(videos, max_workers, per_host_limit, cache)
+        dedupe = open_dedupe_index(cache_dir, dedupe_threshold)
+        summarize_videos_batch(videos, batch_dir, cache, batch_client, poll_interval, dedupe=dedupe)
+        if dedupe:
+            dedupe.save()
 
-        for video in videos:
-            video_id = video['videoId']
-            video['url'] = f"https://www.youtube.com/watch?v={video_id}"
-            video['details'] = get_video_details(video['url'])
-            video['script'] = get_video_transcript(video_id)
-            video['script_true'] = video['script'] is not None
-            video['length'] = len(video['script']) if video['script'] else 0
-            time.sleep(0.1)
-
-        for video in videos:
-            if video['script_true']:
-                video['summary'] = generate_summary(video['script'])  # 이미 content만 반환됨
-                logging.info(f"Generated summary for video: {video['title']}")
-            else:
-                video['summary'] = None
-                logging.warning(f"No script available for video: {video['title']}")
-            time.sleep(0.1)
+        jsonl_filename, markdown_filename, metrics_filename = output_paths(output_dir, channel_name, video_count)
+        with open(jsonl_filename, 'w', encoding='utf-8') as f:
+            for video in videos:
+                f.write(json.dumps(video, ensure_ascii=False, default=str) + "\n")
+        logging.info(f"Created JSONL file: {jsonl_filename}")
 
-        channel_name = channel_url.split("/")[-1]
-        today_date = datetime.now().strftime("%Y%m%d")
-        json_filename = f"{channel_name}_{today_date}_{video_count}videos.json"
-        
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(videos, f, indent=4, ensure_ascii=False, default=str)
-        logging.info(f"Created JSON file: {json_filename}")
-
-        markdown_content = create_markdown(videos)
-        markdown_filename = f"{channel_name}_{today_date}_{video_count}videos_summary.md"
-        
-        with open(markdown_filename, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
-        logging.info(f"Created Markdown file: {markdown_filename}")
-
-        return videos, json_filename, markdown_filename
+        if store_path:
+            # 저장소에 기록한 뒤 Markdown은 저장소에서 생성
+            with ResultsStore(store_path) as store:
+                for video in videos:
+                    store.add_video(video, channel=channel_name)
+                store.write_markdown(markdown_filename, video_ids=[video['videoId'] for video in videos])
+        else:
+            with open(markdown_filename, 'w', encoding='utf-8') as f:
+                f.write(create_markdown(videos))
+            logging.info(f"Created Markdown file: {markdown_filename}")
+        run_metrics.write_json(metrics_filename)
+        logging.info("Run metrics:\n" + run_metrics.summary_table())
+
+        return len(videos), jsonl_filename, markdown_filename
 
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
@@ -164,7 +703,8 @@ def scrape_and_summarize_youtube_videos(channel_url, video_count):
 def is_valid_youtube_channel(url):
     return url.startswith("https://www.youtube.com/@")
 
-if __name__ == "__main__":
+def run_interactive():
+    """질문에 답하며 실행하는 기존 대화형 모드"""
     # 채널 URL 입력 받기
     channel_url = questionary.text(
         "YouTube 채널 URL을 입력해주세요 (예: https://www.youtube.com/@channelname):",
@@ -181,12 +721,93 @@ if __name__ == "__main__":
     print(f"선택한 채널: {channel_url}")
     print(f"분석할 영상 수: {video_count}")
 
+    # 이전 실행 이후 새로 올라온 영상만 처리할지 선택
+    incremental = questionary.confirm("지난 실행 이후 새 영상만 분석하시겠습니까? (증분 모드)", default=False).ask()
+
+    # 즉시 응답이 필요 없으면 Batch API로 비용 절감
+    use_batch = questionary.confirm("Batch API 모드로 요약하시겠습니까? (저렴하지만 최대 24시간 소요)", default=False).ask()
+
     # 사용자 확인
     if questionary.confirm("분석을 시작하시겠습니까?").ask():
-        videos, json_file, markdown_file = scrape_and_summarize_youtube_videos(channel_url, video_count)
-        if videos:
-            print(f"프로세스가 완료되었습니다. {json_file}와 {markdown_file}에서 결과를 확인하세요.")
+        if use_batch:
+            video_total, jsonl_file, markdown_file = scrape_and_summarize_youtube_videos_batch(channel_url, video_count)
+        else:
+            video_total, jsonl_file, markdown_file = scrape_and_summarize_youtube_videos(channel_url, video_count,
+                                                                                          incremental=incremental)
+        if video_total:
+            print(f"프로세스가 완료되었습니다. {jsonl_file}와 {markdown_file}에서 결과를 확인하세요.")
         else:
             print("프로세스가 실패했습니다. 로그를 확인해주세요.")
     else:
         print("프로그램을 종료합니다.")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="YouTube 채널 영상 스크립트를 수집해 인사이트 리포트로 요약")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="채널의 최신 영상을 비대화형으로 요약 (cron/작업 큐용)")
+    run_parser.add_argument("channel_url", help="예: https://www.youtube.com/@channelname")
+    run_parser.add_argument("-n", "--count", type=int, default=10, help="분석할 최신 영상 수")
+    run_parser.add_argument("-o", "--output-dir", default=".", help="JSONL/Markdown/지표 파일 저장 위치")
+    run_parser.add_argument("--workers", type=int, default=FETCH_MAX_WORKERS, help="영상 정보/스크립트 수집 워커 수")
+    run_parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="호스트별 동시 요청 수")
+    run_parser.add_argument("--summary-workers", type=int, default=SUMMARY_MAX_WORKERS, help="동시 요약 요청 수")
+    run_parser.add_argument("--rpm", type=int, default=SUMMARY_RPM)
+    run_parser.add_argument("--tpm", type=int, default=SUMMARY_TPM)
+    run_parser.add_argument("--incremental", action="store_true", help="지난 실행 이후 새 영상만 처리")
+    run_parser.add_argument("--batch", action="store_true", help="Batch API로 요약 (저렴하지만 최대 24시간 소요)")
+    run_parser.add_argument("--cache-dir", default=CACHE_DIR)
+    run_parser.add_argument("--no-cache", action="store_true", help="캐시를 사용하지 않음")
+    run_parser.add_argument("--db", default=RESULTS_DB, help="결과 저장소 SQLite 파일")
+    run_parser.add_argument("--no-db", action="store_true", help="결과 저장소에 기록하지 않음")
+    run_parser.add_argument("--no-dedupe", action="store_true", help="중복 스크립트 검출을 끔")
+
+    cache_parser = subparsers.add_parser("cache", help="캐시 상태 확인/정리 (네트워크/OpenAI 사용 안 함)")
+    cache_parser.add_argument("action", choices=("stats", "evict", "state"))
+    cache_parser.add_argument("channel", nargs="?", help="state: 채널 이름 (예: @channelname)")
+    cache_parser.add_argument("--cache-dir", default=CACHE_DIR)
+
+    subparsers.add_parser("interactive", help="질문에 답하며 실행 (기본값)")
+    return parser
+
+def main(argv=None):
+    """명령줄 진입점. 반환값은 종료 코드"""
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "run":
+        cache_dir = None if args.no_cache else args.cache_dir
+        store_path = None if args.no_db else args.db
+        dedupe_threshold = None if args.no_dedupe else DEDUPE_THRESHOLD
+        if args.batch:
+            video_total, jsonl_file, markdown_file = scrape_and_summarize_youtube_videos_batch(
+                args.channel_url, args.count, args.workers, args.per_host, cache_dir,
+                dedupe_threshold=dedupe_threshold, store_path=store_path, output_dir=args.output_dir)
+        else:
+            video_total, jsonl_file, markdown_file = scrape_and_summarize_youtube_videos(
+                args.channel_url, args.count, args.workers, args.per_host, args.summary_workers, args.rpm, args.tpm,
+                cache_dir, args.incremental, dedupe_threshold, store_path, args.output_dir)
+        if not video_total:
+            return 1
+        print(json.dumps({'videos': video_total, 'jsonl': jsonl_file, 'markdown': markdown_file}, ensure_ascii=False))
+        return 0
+
+    if args.command == "cache":
+        cache = VideoCache(args.cache_dir)
+        if args.action == "stats":
+            print(json.dumps(cache.stats(), indent=4, ensure_ascii=False))
+        elif args.action == "evict":
+            cache.evict()
+            print(json.dumps(cache.stats(), indent=4, ensure_ascii=False))
+        else:
+            if not args.channel:
+                print("state 명령에는 채널 이름이 필요합니다.")
+                return 2
+            print(json.dumps(cache.load_channel_state(args.channel), indent=4, ensure_ascii=False))
+        return 0
+
+    run_interactive()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
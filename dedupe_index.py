@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+# 중복 검출 설정
+SHINGLE_SIZE = 8          # 공백 제거 후 문자 n-gram 길이
+SAMPLE_MODULUS = 8        # 해시 % SAMPLE_MODULUS == 0인 shingle만 지문으로 보관 (약 1/8 표본)
+MIN_FINGERPRINTS = 12     # 지문이 이보다 적은 짧은 스크립트는 판단하지 않음
+DEDUPE_THRESHOLD = 0.8    # 새 스크립트가 기존 스크립트에 이 비율 이상 포함되면 중복으로 판단
+SAVE_EVERY = 20           # 이 횟수만큼 추가될 때마다 디스크에 저장
+
+def fingerprints(text):
+    """스크립트의 문자 shingle 해시 중 일정 표본만 추출.
+    같은 기준으로 표본을 뽑으므로 두 스크립트의 표본 교집합이 원래 shingle 교집합을 대표한다."""
+    normalized = re.sub(r"\s+", "", text or "").lower()
+    sampled = set()
+    for i in range(len(normalized) - SHINGLE_SIZE + 1):
+        digest = hashlib.blake2b(normalized[i:i + SHINGLE_SIZE].encode('utf-8'), digest_size=4).digest()
+        value = int.from_bytes(digest, 'big')
+        if value % SAMPLE_MODULUS == 0:
+            sampled.add(value)
+    return sampled
+
+class DedupeIndex:
+    """요약된 스크립트의 지문과 요약을 보관하는 역색인. 채널과 실행을 넘어 JSON 파일로 유지된다.
+    path가 None이면 파일을 읽거나 쓰지 않고 이번 실행 안에서만 사용한다."""
+
+    def __init__(self, path, threshold=DEDUPE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.postings = {}
+        self.pending_writes = 0
+        if path is None:
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                for video_id, entry in json.load(f).get('videos', {}).items():
+                    self._insert(video_id, entry)
+        except (OSError, ValueError):
+            pass
+
+    def _insert(self, video_id, entry):
+        self.entries[video_id] = entry
+        for value in entry['fingerprints']:
+            self.postings.setdefault(value, set()).add(video_id)
+
+    def find_duplicate(self, video_id, script):
+        """script가 이미 요약된 다른 영상 스크립트에 threshold 이상 포함되면
+        {'videoId', 'title', 'channel', 'summary', 'containment'} 반환, 아니면 None"""
+        sample = fingerprints(script)
+        if len(sample) < MIN_FINGERPRINTS:
+            return None
+        with self.lock:
+            hits = Counter()
+            for value in sample:
+                for other_id in self.postings.get(value, ()):
+                    if other_id != video_id:
+                        hits[other_id] += 1
+            if not hits:
+                return None
+            other_id, shared = hits.most_common(1)[0]
+            containment = shared / len(sample)
+            if containment < self.threshold:
+                return None
+            entry = self.entries[other_id]
+            return {
+                'videoId': other_id,
+                'title': entry.get('title'),
+                'channel': entry.get('channel'),
+                'summary': entry.get('summary'),
+                'containment': round(containment, 3),
+            }
+
+    def add(self, video_id, script, summary, title=None, channel=None):
+        """요약이 끝난 영상을 색인에 추가"""
+        sample = fingerprints(script)
+        if len(sample) < MIN_FINGERPRINTS or not summary:
+            return
+        with self.lock:
+            if video_id in self.entries:
+                for value in self.entries[video_id]['fingerprints']:
+                    self.postings.get(value, set()).discard(video_id)
+            self._insert(video_id, {'title': title, 'channel': channel, 'summary': summary,
+                                    'fingerprints': sorted(sample)})
+            self.pending_writes += 1
+            should_save = self.pending_writes >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        with self.lock:
+            if self.pending_writes == 0 and os.path.exists(self.path):
+                return
+            data = {'videos': self.entries}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.pending_writes = 0
+        logging.info(f"Saved dedupe index ({len(self.entries)} videos): {self.path}")
@@ -9,16 +9,21 @@ load_dotenv()
 # OpenAI API 키 설정
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
-def extract_stock_info_gpt4o(text):
+def extract_stock_info_gpt4o(text, context=None):
     """
     텍스트에서 주식 관련 정보를 추출하여 JSON 형태로 반환하는 함수
     
     Args:
         text (str): 분석할 텍스트
+        context (str): 바로 앞 구간의 텍스트 (실시간 분석에서 문맥 참고용, 여기에만 나온 종목은 추출하지 않음)
     
     Returns:
         str: JSON 형식의 문자열. 실패시 "[]" 반환
     """
+    context_block = f"""    이전 문맥 (참고용이며, 이전 문맥에만 나오고 분석할 텍스트에서 다시 언급되지 않은 종목은 포함하지 마세요):
+    {context}
+
+""" if context else ""
     prompt = f"""
     다음 텍스트는 음성을 인식한 결과인데, 음성인식이 정확하지 않을 수 있어서 최대한 아는 지식 내에서 음성 인식 결과를 보정하고, 그 보정결과 내에서 주식 종목에 대한 추천 정보를 추출하여 JSON 형식의 배열로 결과를 만들어주세요.
     각 종목별로 다음 정보를 포함해야 합니다:
@@ -48,7 +53,7 @@ def extract_stock_info_gpt4o(text):
 
     주식 관련 정보가 없다면 빈 배열 []을 반환하세요.
 
-    분석할 텍스트:
+{context_block}    분석할 텍스트:
     {text}
     """
 
@@ -1,13 +1,104 @@
 import openai
 import json
 import re
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import os
 
+from json_stream import JsonArrayItemStream
+from metrics import get_metrics, start_run
+from rate_limiter import estimate_tokens
+
 # .env 파일에서 환경 변수 로드 및 API 키 설정
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+ITB_MODEL = "gpt-4o"  # 최신 모델 지정
+ITB_MAX_TOKENS = 2500
+ITB_PROMPT_VERSION = 1  # 프롬프트/응답 스키마를 바꾸면 올림 (저장된 분석 결과를 다시 분석하도록)
+
+# 문서 단위 분석 설정
+ITB_MAX_WORKERS = 8  # 동시에 분석할 청크 수(요청 수)
+
+# 작은 청크 묶음 요청 설정 (lean 모드 전용)
+ITB_PACK_TOKEN_BUDGET = 2000   # 요청 하나에 묶을 청크 원문의 최대 추정 토큰 수
+ITB_PACK_MAX_CHUNKS = 6        # 요청 하나에 묶을 최대 청크 수 (응답 길이 제한 고려)
+ITB_PACK_MAX_TOKENS = 16000    # 묶음 요청의 max_tokens 상한 (청크당 ITB_MAX_TOKENS)
+# 조항 제목 줄 (제N조, 제N조의M). "제5조에 따라 …"처럼 상호 참조로 시작하는 본문 줄은 제외하도록
+# 번호 뒤에 괄호 제목, 줄 끝, 또는 문장으로 끝나지 않는 짧은 제목만 오는 경우로 한정
+ARTICLE_PATTERN = re.compile(r"""
+    ^[ \t]*(제\s*\d+\s*조(?:\s*의\s*\d+)?)
+    (?=
+        [ \t]*[(（【\[]
+      | [ \t]*$
+      | [ \t]+[^\s(（【\[](?:[^\n]{0,28}[^\s.다])?[ \t]*$
+    )""", re.MULTILINE | re.VERBOSE)
+
+# 간결한 프롬프트(lean) 모드: 청크 원문은 한 번만 보내고 응답에 다시 싣지 않음.
+# chunk_id, original_text, detected_at은 로컬에서 채우고, 출력 형식은 JSON 스키마로 강제
+ITB_LEAN_SYSTEM_PROMPT = """당신은 ITB(입찰요청서) 검토 전문가입니다. 사용자가 보내는 ITB 청크를 분석해 다음을 작성하세요.
+
+1. detected_risks: 청크의 위험 요소 목록
+   - id: "risk-001"부터 순서대로
+   - risk_level: very high, high, medium, low, very low 중 하나
+   - risk_category: 예) "계약 조건 위반", "가격 변동", "보증 불이행"
+   - clause: 원문에서 해당 문장의 핵심 내용 (짧게)
+   - risk: 위험 요약 설명 / notes: 추가 검토 사항
+   - related_entities: 관련 날짜, 금액/비율 등 ({"type": "날짜", "value": "2025-06-30"})
+   - mitigation_strategy: 추천 대응 전략
+   - external_references: 관련 법규 등 ({"reference_type": "법규", "name": "계약법", "notes": "설명", "link": null})
+2. itb_qa: 청크의 핵심 정보에 대한 짧은 질문과 답변
+3. analysis_rating: 중요도(0~10), 주로 중요한 대상(예: "프로젝트 관리팀", "법무팀"), 관련 태그
+
+해당 정보가 없으면 빈 배열로 두세요. 모든 설명은 한국어로 작성하세요."""
+
+def _strict_object(properties):
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+_STRING = {"type": "string"}
+ITB_RESULT_SCHEMA = _strict_object({
+    "detected_risks": {"type": "array", "items": _strict_object({
+        "id": _STRING,
+        "risk_level": {"type": "string", "enum": ["very high", "high", "medium", "low", "very low"]},
+        "risk_category": _STRING,
+        "clause": _STRING,
+        "risk": _STRING,
+        "notes": _STRING,
+        "related_entities": {"type": "array", "items": _strict_object({"type": _STRING, "value": _STRING})},
+        "mitigation_strategy": _STRING,
+        "external_references": {"type": "array", "items": _strict_object({
+            "reference_type": _STRING, "name": _STRING, "notes": _STRING, "link": {"type": ["string", "null"]},
+        })},
+    })},
+    "itb_qa": {"type": "array", "items": _strict_object({"question": _STRING, "answer": _STRING})},
+    "analysis_rating": _strict_object({
+        "importance_score": {"type": "number"},
+        "target_audience": {"type": "array", "items": _STRING},
+        "tags": {"type": "array", "items": _STRING},
+    }),
+})
+ITB_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "itb_chunk_analysis", "strict": True, "schema": ITB_RESULT_SCHEMA},
+}
+
+# 묶음 요청: 청크별 결과를 chunk_id와 함께 results 배열로 받음
+ITB_PACK_SYSTEM_PROMPT = ITB_LEAN_SYSTEM_PROMPT + """
+
+여러 청크가 <chunk id="..."> 태그로 주어집니다. 각 청크를 서로 독립적으로 분석해 results 배열에
+청크마다 하나씩, 해당 chunk_id와 함께 넣으세요. 위험 id는 청크마다 "risk-001"부터 다시 시작합니다."""
+ITB_PACK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "itb_chunk_pack_analysis", "strict": True, "schema": _strict_object({
+        "results": {"type": "array", "items": _strict_object({"chunk_id": _STRING, **ITB_RESULT_SCHEMA["properties"]})},
+    })},
+}
+
 def extract_json(text):
     """
     GPT 응답에서 JSON 부분만 추출합니다.
@@ -23,6 +114,15 @@ def extract_json(text):
     except json.JSONDecodeError:
         return None
 
+def empty_itb_result(chunk_id, text):
+    return {
+        "chunk_id": chunk_id,
+        "original_text": text,
+        "detected_risks": [],
+        "itb_qa": [],
+        "analysis_rating": {}
+    }
+
 def analyze_itb_chunk(chunk_id, text):
     """
     ITB 문서 청크에 대해 위험 문장 검출, ITB Q&A 생성, 그리고 중요도 평가 정보를
@@ -80,7 +180,41 @@ def analyze_itb_chunk(chunk_id, text):
     Returns:
         str: 위 최종 JSON 구조에 맞춘 JSON 형식의 문자열
     """
-    
+    json_result, _ = run_itb_analysis(chunk_id, text)
+    return json.dumps(json_result, ensure_ascii=False, indent=2)
+
+def build_lean_messages(text):
+    return [
+        {"role": "system", "content": ITB_LEAN_SYSTEM_PROMPT},
+        {"role": "user", "content": f"ITB 청크:\n{text.strip()}"},
+    ]
+
+def detected_at_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def attach_detected_at(risk, detected_at):
+    """lean 모드 위험 항목에 detected_at을 id 바로 뒤에 넣음"""
+    risk = dict(risk)
+    return {"id": risk.pop("id", None), "detected_at": detected_at, **risk}
+
+def attach_lean_result(chunk_id, text, parsed, detected_at=None):
+    """lean 모드 응답에 chunk_id, original_text, detected_at을 붙여 기존 최종 JSON 구조로 만듦"""
+    detected_at = detected_at or detected_at_now()
+    return {
+        "chunk_id": chunk_id,
+        "original_text": text,
+        "detected_risks": [attach_detected_at(risk, detected_at) for risk in parsed.get("detected_risks", [])],
+        "itb_qa": parsed.get("itb_qa", []),
+        "analysis_rating": parsed.get("analysis_rating", {}),
+    }
+
+def run_itb_analysis(chunk_id, text, lean=False):
+    """analyze_itb_chunk의 분석을 수행하고 (결과 dict, 실패 사유 또는 None)을 반환.
+    실패해도 결과는 빈 항목으로 채운 같은 구조임.
+    lean=True이면 간결한 프롬프트와 JSON 스키마 응답 형식을 사용 (결과 구조는 같음)"""
+    if lean:
+        return _run_lean_analysis(chunk_id, text)
+
     prompt = f"""
 다음은 ITB(입찰요청서) 문서의 일부 청크에 대한 내용입니다. 
 해당 청크에 대해 아래 세 가지 분석을 수행하여, 결과를 오직 아래와 같은 유효한 JSON 객체로 반환해 주세요.
@@ -128,56 +262,325 @@ def analyze_itb_chunk(chunk_id, text):
     """
     
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o",  # 최신 모델 지정
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=2500
-        )
+        with get_metrics().timed('itb'):
+            response = openai.chat.completions.create(
+                model=ITB_MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.2,
+                max_tokens=ITB_MAX_TOKENS
+            )
+        get_metrics().record_usage('itb', ITB_MODEL, getattr(response, 'usage', None))
         raw_content = response.choices[0].message.content.strip()
         extracted = extract_json(raw_content)
         if extracted is None:
             print("JSON 추출 실패. 원문 응답:", raw_content)
-            json_result = {
-                "chunk_id": chunk_id,
-                "original_text": text,
-                "detected_risks": [],
-                "itb_qa": [],
-                "analysis_rating": {}
-            }
-        else:
-            try:
-                json_result = json.loads(extracted)
-                # 만약 chunk_id나 original_text가 응답에 포함되어 있지 않으면 추가
-                if "chunk_id" not in json_result:
-                    json_result["chunk_id"] = chunk_id
-                if "original_text" not in json_result:
-                    json_result["original_text"] = text
-            except json.JSONDecodeError as json_err:
-                print("JSON 디코딩 에러:", json_err)
-                json_result = {
-                    "chunk_id": chunk_id,
-                    "original_text": text,
-                    "detected_risks": [],
-                    "itb_qa": [],
-                    "analysis_rating": {}
-                }
-        return json.dumps(json_result, ensure_ascii=False, indent=2)
+            return empty_itb_result(chunk_id, text), "JSON 추출 실패"
+        try:
+            json_result = json.loads(extracted)
+            # 만약 chunk_id나 original_text가 응답에 포함되어 있지 않으면 추가
+            if "chunk_id" not in json_result:
+                json_result["chunk_id"] = chunk_id
+            if "original_text" not in json_result:
+                json_result["original_text"] = text
+            return json_result, None
+        except json.JSONDecodeError as json_err:
+            print("JSON 디코딩 에러:", json_err)
+            return empty_itb_result(chunk_id, text), f"JSON 디코딩 에러: {json_err}"
     except Exception as e:
         print(f"GPT API 호출 에러: {e}")
-        fallback = {
-            "chunk_id": chunk_id,
-            "original_text": text,
-            "detected_risks": [],
-            "itb_qa": [],
-            "analysis_rating": {}
+        return empty_itb_result(chunk_id, text), f"GPT API 호출 에러: {e}"
+
+def _run_lean_analysis(chunk_id, text):
+    try:
+        with get_metrics().timed('itb_lean'):
+            response = openai.chat.completions.create(
+                model=ITB_MODEL,
+                messages=build_lean_messages(text),
+                temperature=0.2,
+                max_tokens=ITB_MAX_TOKENS,
+                response_format=ITB_RESPONSE_FORMAT
+            )
+        get_metrics().record_usage('itb_lean', ITB_MODEL, getattr(response, 'usage', None))
+        message = response.choices[0].message
+        if getattr(message, 'refusal', None):
+            print("응답 거부:", message.refusal)
+            return empty_itb_result(chunk_id, text), f"응답 거부: {message.refusal}"
+        try:
+            parsed = json.loads(message.content)
+        except (TypeError, json.JSONDecodeError) as json_err:
+            # 스키마 강제가 적용되지 않는 모델/응답(길이 초과로 잘림 등) 대비
+            print("JSON 디코딩 에러:", json_err)
+            return empty_itb_result(chunk_id, text), f"JSON 디코딩 에러: {json_err}"
+        return attach_lean_result(chunk_id, text, parsed), None
+    except Exception as e:
+        print(f"GPT API 호출 에러: {e}")
+        return empty_itb_result(chunk_id, text), f"GPT API 호출 에러: {e}"
+
+def stream_itb_analysis(chunk_id, text, on_item):
+    """lean 모드 분석을 스트리밍으로 받아, detected_risks/itb_qa 원소가 완성될 때마다
+    on_item(chunk_id, "detected_risks" 또는 "itb_qa", 원소)를 호출하고 (결과 dict, 실패 사유 또는 None)을 반환.
+    최종 결과는 run_itb_analysis(lean=True)와 같은 구조이며, 전달된 위험 항목과 같은 detected_at을 가짐"""
+    parser = JsonArrayItemStream(("detected_risks", "itb_qa"))
+    detected_at = detected_at_now()
+    start = time.perf_counter()
+    first_item_seconds = None
+    usage = None
+    try:
+        with get_metrics().timed('itb_stream'):
+            stream = openai.chat.completions.create(
+                model=ITB_MODEL,
+                messages=build_lean_messages(text),
+                temperature=0.2,
+                max_tokens=ITB_MAX_TOKENS,
+                response_format=ITB_RESPONSE_FORMAT,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for event in stream:
+                usage = getattr(event, 'usage', None) or usage
+                if not event.choices:
+                    continue
+                delta = event.choices[0].delta
+                if getattr(delta, 'refusal', None):
+                    print("응답 거부:", delta.refusal)
+                    return empty_itb_result(chunk_id, text), f"응답 거부: {delta.refusal}"
+                if not getattr(delta, 'content', None):
+                    continue
+                for key, item in parser.feed(delta.content):
+                    if first_item_seconds is None:
+                        first_item_seconds = time.perf_counter() - start
+                        get_metrics().record('itb_stream', first_item_seconds=first_item_seconds)
+                    on_item(chunk_id, key, attach_detected_at(item, detected_at) if key == "detected_risks" else item)
+        get_metrics().record_usage('itb_stream', ITB_MODEL, usage)
+        try:
+            parsed = parser.result()
+        except json.JSONDecodeError as json_err:
+            # 길이 초과로 잘린 응답: 이미 전달된 원소는 있지만 결과는 실패로 처리 (비스트리밍 경로와 같음)
+            print("JSON 디코딩 에러:", json_err)
+            return empty_itb_result(chunk_id, text), f"JSON 디코딩 에러: {json_err}"
+        return attach_lean_result(chunk_id, text, parsed, detected_at), None
+    except Exception as e:
+        print(f"GPT API 호출 에러: {e}")
+        return empty_itb_result(chunk_id, text), f"GPT API 호출 에러: {e}"
+
+def pack_itb_chunks(chunks, token_budget=ITB_PACK_TOKEN_BUDGET, max_chunks=ITB_PACK_MAX_CHUNKS):
+    """문서 순서를 유지하면서 연속된 작은 청크들을 토큰 예산 안에서 묶음 목록으로 나눔.
+    예산보다 큰 청크는 혼자 한 묶음이 됨"""
+    packs = []
+    current, current_tokens = [], 0
+    for chunk_id, text in chunks:
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_chunks):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append((chunk_id, text))
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+def run_itb_pack(pack):
+    """청크 묶음을 요청 하나로 분석해 [{"chunk_id", "result", "error", "retried"}]를 묶음 순서대로 반환.
+    응답에 빠졌거나 묶음 요청이 실패한 청크는 각각 lean 모드로 다시 요청함"""
+    if len(pack) == 1:
+        chunk_id, text = pack[0]
+        result, error = run_itb_analysis(chunk_id, text, lean=True)
+        return [{"chunk_id": chunk_id, "result": result, "error": error, "retried": False}]
+
+    results = {}
+    texts = dict(pack)
+    content = "\n\n".join(f'<chunk id="{chunk_id}">\n{text.strip()}\n</chunk>' for chunk_id, text in pack)
+    try:
+        with get_metrics().timed('itb_pack'):
+            response = openai.chat.completions.create(
+                model=ITB_MODEL,
+                messages=[
+                    {"role": "system", "content": ITB_PACK_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"ITB 청크 {len(pack)}개:\n\n{content}"},
+                ],
+                temperature=0.2,
+                max_tokens=min(ITB_PACK_MAX_TOKENS, ITB_MAX_TOKENS * len(pack)),
+                response_format=ITB_PACK_RESPONSE_FORMAT
+            )
+        get_metrics().record_usage('itb_pack', ITB_MODEL, getattr(response, 'usage', None))
+        for item in json.loads(response.choices[0].message.content).get("results", []):
+            chunk_id = item.pop("chunk_id", None)
+            if chunk_id in texts and chunk_id not in results:
+                results[chunk_id] = attach_lean_result(chunk_id, texts[chunk_id], item)
+    except Exception as e:
+        # 잘린 응답(JSON 오류)이나 API 오류는 아래에서 청크별 재시도로 처리
+        print(f"묶음 분석 에러 ({len(pack)}개 청크): {e}")
+
+    records = []
+    for chunk_id, text in pack:
+        if chunk_id in results:
+            records.append({"chunk_id": chunk_id, "result": results[chunk_id], "error": None, "retried": False})
+            continue
+        get_metrics().record('itb_pack', missing_chunks=1)
+        result, error = run_itb_analysis(chunk_id, text, lean=True)
+        records.append({"chunk_id": chunk_id, "result": result, "error": error, "retried": True})
+    return records
+
+def compare_itb_prompts(chunks):
+    """같은 청크들을 기존 프롬프트와 lean 프롬프트로 각각 분석해 토큰/지연 시간 차이를 반환"""
+    run_metrics = start_run()
+    for chunk_id, text in chunks:
+        run_itb_analysis(chunk_id, text)
+        run_itb_analysis(chunk_id, text, lean=True)
+    stages = run_metrics.to_dict()['stages']
+    report = {}
+    for mode, stage in (('legacy', 'itb'), ('lean', 'itb_lean')):
+        values = stages.get(stage, {})
+        report[mode] = {
+            'calls': values.get('calls', 0),
+            'errors': values.get('errors', 0),
+            'prompt_tokens': values.get('prompt_tokens', 0),
+            'completion_tokens': values.get('completion_tokens', 0),
+            'seconds': round(values.get('seconds', 0), 3),
+            'p50_seconds': values.get('p50'),
+            'cost_usd': round(values.get('cost_usd', 0), 5),
         }
-        return json.dumps(fallback, ensure_ascii=False)
+    for name in ('prompt_tokens', 'completion_tokens', 'seconds', 'cost_usd'):
+        before = report['legacy'][name]
+        report.setdefault('savings', {})[name] = round(1 - report['lean'][name] / before, 3) if before else None
+    return report
+
+def split_itb_document(text):
+    """ITB 문서 전체를 조항(제N조) 경계로 나눠 [(chunk_id, 청크 텍스트)] 반환.
+    첫 조항 앞의 머리말은 내용이 있으면 chunk-000으로 둠"""
+    starts = [match.start() for match in ARTICLE_PATTERN.finditer(text)]
+    if not starts:
+        return [("chunk-001", text.strip())] if text.strip() else []
+    chunks = []
+    preamble = text[:starts[0]].strip()
+    if preamble:
+        chunks.append(("chunk-000", preamble))
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        chunks.append((f"chunk-{i + 1:03d}", text[start:end].strip()))
+    return chunks
+
+def _timed_analysis(chunk_id, text, lean, on_item=None):
+    started_at = time.time()
+    start = time.perf_counter()
+    if on_item is not None:
+        result, error = stream_itb_analysis(chunk_id, text, on_item)
+    else:
+        result, error = run_itb_analysis(chunk_id, text, lean)
+    return {
+        "chunk_id": chunk_id,
+        "status": "failed" if error else "ok",
+        "error": error,
+        "started_at": started_at,
+        "seconds": round(time.perf_counter() - start, 3),
+        "result": result,
+    }
+
+def _timed_pack(pack):
+    started_at = time.time()
+    start = time.perf_counter()
+    records = run_itb_pack(pack)
+    seconds = round(time.perf_counter() - start, 3)
+    return [{
+        "chunk_id": record["chunk_id"],
+        "status": "failed" if record["error"] else "ok",
+        "error": record["error"],
+        "started_at": started_at,
+        "seconds": seconds,
+        "packed_with": len(pack),
+        "retried": record["retried"],
+        "result": record["result"],
+    } for record in records]
+
+def iter_itb_document(chunks, max_workers=ITB_MAX_WORKERS, lean=True, pack=False,
+                      pack_budget=ITB_PACK_TOKEN_BUDGET, on_item=None):
+    """청크들을 최대 max_workers개씩 동시에 분석하고, 끝나는 대로 문서 순서를 지켜 레코드를 하나씩 반환.
+    레코드: {"chunk_id", "status"("ok"/"failed"), "error", "started_at", "seconds", "result"}
+    pack=True이면 작은 청크를 묶어 요청하고 레코드에 "packed_with", "retried"를 추가 (lean 모드로 분석)
+    on_item을 주면 청크마다 스트리밍으로 분석해 위험/Q&A 원소가 완성되는 즉시 워커 스레드에서
+    on_item(chunk_id, key, 원소)를 호출함 (lean 모드 전용, pack과 함께 쓸 수 없음)"""
+    if pack and on_item is not None:
+        raise ValueError("스트리밍 모드는 묶음 요청(pack)과 함께 쓸 수 없습니다")
+    if pack:
+        units = ((_timed_pack, group) for group in pack_itb_chunks(chunks, pack_budget))
+    else:
+        units = ((lambda chunk: [_timed_analysis(chunk[0], chunk[1], lean, on_item)], chunk) for chunk in chunks)
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # 모든 워커가 쉬지 않도록 워커 수의 두 배까지 미리 제출하고, 앞 청크가 끝나는 즉시 내보냄
+        for func, unit in units:
+            in_flight.append(executor.submit(func, unit))
+            if len(in_flight) >= max_workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+def print_streamed_item(chunk_id, key, item):
+    """스트리밍 모드에서 완성된 위험/Q&A 원소를 바로 출력 (워커 스레드끼리 줄이 섞이지 않게 한 번에 씀)"""
+    if key == "detected_risks":
+        line = f"  ! {chunk_id} ({item.get('risk_level')}) {item.get('risk_category')}: {item.get('risk')}"
+    else:
+        line = f"  ? {chunk_id} {item.get('question')} → {item.get('answer')}"
+    print(line + "\n", end="", flush=True)
+
+def analyze_itb_document(text, output_path, max_workers=ITB_MAX_WORKERS, lean=True, pack=False,
+                         pack_budget=ITB_PACK_TOKEN_BUDGET, stream=False):
+    """ITB 문서 전체를 조항 단위로 병렬 분석해 JSONL로 기록하고 실행 요약 dict를 반환.
+    stream=True이면 위험/Q&A가 완성되는 대로 출력함 (JSONL은 같은 내용)"""
+    chunks = split_itb_document(text)
+    wall_start = time.perf_counter()
+    durations = []
+    failed = []
+    on_item = print_streamed_item if stream else None
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for record in iter_itb_document(chunks, max_workers, lean, pack, pack_budget, on_item):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            durations.append(record["seconds"])
+            if record["status"] == "failed":
+                failed.append(record["chunk_id"])
+            print(f"[{len(durations)}/{len(chunks)}] {record['chunk_id']} {record['status']} ({record['seconds']:.1f}s)")
+    durations.sort()
+    return {
+        "chunks": len(chunks),
+        "failed": failed,
+        "wall_seconds": round(time.perf_counter() - wall_start, 3),
+        "chunk_seconds_total": round(sum(durations), 3),
+        "chunk_seconds_p50": durations[len(durations) // 2] if durations else None,
+        "chunk_seconds_max": durations[-1] if durations else None,
+    }
 
 # 예시: 각 청크에 대해 분석 수행
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ITB 문서 위험 분석")
+    parser.add_argument("document", nargs="?", help="ITB 문서 텍스트 파일 (생략 시 예시 청크 분석)")
+    parser.add_argument("-o", "--output", help="결과 JSONL 경로 (기본: <문서>_itb.jsonl)")
+    parser.add_argument("--workers", type=int, default=ITB_MAX_WORKERS, help="동시에 분석할 청크 수")
+    parser.add_argument("--legacy-prompt", action="store_true", help="원문을 두 번 보내는 기존 프롬프트 사용")
+    parser.add_argument("--pack", action="store_true", help="작은 청크를 토큰 예산 안에서 묶어 요청")
+    parser.add_argument("--stream", action="store_true", help="위험/Q&A가 완성되는 즉시 출력 (lean 모드)")
+    parser.add_argument("--pack-budget", type=int, default=ITB_PACK_TOKEN_BUDGET, help="묶음 요청당 청크 원문 토큰 수")
+    parser.add_argument("--compare-prompts", action="store_true",
+                        help="기존/lean 프롬프트의 토큰과 지연 시간 비교 (문서 생략 시 예시 청크 사용)")
+    args = parser.parse_args()
+    if args.stream and (args.legacy_prompt or args.pack):
+        parser.error("--stream은 --legacy-prompt, --pack과 함께 쓸 수 없습니다")
+
+    document = None
+    if args.document:
+        with open(args.document, encoding='utf-8') as f:
+            document = f.read()
+
+    if document is not None and not args.compare_prompts:
+        output_path = args.output or f"{os.path.splitext(args.document)[0]}_itb.jsonl"
+        summary = analyze_itb_document(document, output_path, args.workers, lean=not args.legacy_prompt,
+                                       pack=args.pack, pack_budget=args.pack_budget, stream=args.stream)
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        print(f"결과 파일: {output_path}")
+        sys.exit(1 if summary["failed"] else 0)
+
     sample_chunks = [
         # 청크 1: 계약 이행 및 안전 관리 관련 (EPC 공사 완료 및 안전 관리)
         """
@@ -235,7 +638,17 @@ if __name__ == "__main__":
     ]
 
     
+    if args.compare_prompts:
+        chunks = split_itb_document(document) if document is not None else \
+            [(f"chunk-{i:03d}", chunk) for i, chunk in enumerate(sample_chunks, start=1)]
+        print(json.dumps(compare_itb_prompts(chunks), ensure_ascii=False, indent=2))
+        sys.exit(0)
+
     for i, chunk in enumerate(sample_chunks, start=1):
         chunk_id = f"chunk-{i:03d}"
+        if args.stream:
+            result, _ = stream_itb_analysis(chunk_id, chunk, print_streamed_item)
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            continue
         result_json = analyze_itb_chunk(chunk_id, chunk)
         print(result_json)
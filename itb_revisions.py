@@ -0,0 +1,225 @@
+"""ITB 문서 개정본(addendum)을 이전 분석 결과와 비교해 바뀐 조항만 다시 분석.
+
+청크 원문의 해시로 분석 결과를 보관하므로, 개정본에서 내용이 같은 조항은 API를 호출하지 않고 재사용한다.
+조항 번호(제N조) 기준으로 추가/삭제/변경을 판단하고, 위험 항목이 새로 생겼거나 사라졌거나
+risk_level이 바뀐 내역을 보고한다.
+
+    python itb_revisions.py ITB_rev2.txt --name EPC-ITB -o ITB_rev2_itb.jsonl
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from itb_analysis import (split_itb_document, iter_itb_document, ARTICLE_PATTERN, ITB_MODEL, ITB_MAX_WORKERS,
+                          ITB_PROMPT_VERSION)
+
+ITB_INDEX_PATH = ".cache/itb_index.json"  # 청크 해시별 분석 결과와 문서별 최신 버전
+RISK_MATCH_THRESHOLD = 0.6                # 같은 조항의 위험 항목을 같은 위험으로 볼 clause 유사도
+
+def normalize_chunk(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def prompt_mode(lean=True, pack=False):
+    """분석 결과를 만든 프롬프트 종류: legacy, lean, pack"""
+    return "pack" if pack else "lean" if lean else "legacy"
+
+def text_hash(text):
+    """공백 차이는 무시한 청크 원문 해시 (조항 내용 변경 판단용)"""
+    return hashlib.sha256(normalize_chunk(text).encode('utf-8')).hexdigest()[:24]
+
+def chunk_hash(text, mode="lean"):
+    """분석 결과 색인 키. 모델, 프롬프트 종류(mode), 프롬프트 버전이 바뀌면 다시 분석하도록 함께 해시"""
+    key = f"{ITB_MODEL}\n{mode}\nv{ITB_PROMPT_VERSION}\n{normalize_chunk(text)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+
+def article_key(chunk_id, text):
+    """'제3조', '제3조의2' 같은 조항 번호. 조항이 아닌 청크(머리말)는 chunk_id 사용"""
+    match = ARTICLE_PATTERN.match(text)
+    return re.sub(r"\s+", "", match.group(1)) if match else chunk_id
+
+class ItbAnalysisIndex:
+    """청크 해시 → 분석 결과, 문서 이름 → 최신 버전의 조항 목록을 JSON 파일 하나로 유지"""
+
+    def __init__(self, path=ITB_INDEX_PATH):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.results = data.get('results', {})
+        self.documents = data.get('documents', {})
+
+    def previous_version(self, name):
+        return self.documents.get(name)
+
+    def save_version(self, name, chunks):
+        previous = self.documents.get(name) or {}
+        self.documents[name] = {
+            'revision': previous.get('revision', 0) + 1,
+            'updated_at': datetime.now().isoformat(),
+            'chunks': chunks,
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'results': self.results, 'documents': self.documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def _similarity(a, b):
+    return SequenceMatcher(None, normalize_chunk(a or ""), normalize_chunk(b or "")).ratio()
+
+def diff_risks(old_risks, new_risks, threshold=RISK_MATCH_THRESHOLD):
+    """같은 조항의 이전/새 위험 목록을 비교해 (새로 생긴 위험, 사라진 위험, risk_level 변경) 반환.
+    위험 id는 분석마다 다시 매겨지므로 risk_category와 clause 유사도로 짝을 지음"""
+    unmatched_old = list(old_risks)
+    appeared, changed = [], []
+    for risk in new_risks:
+        best, best_score = None, threshold
+        for old in unmatched_old:
+            score = _similarity(old.get('clause'), risk.get('clause'))
+            if old.get('risk_category') == risk.get('risk_category'):
+                score += 0.2
+            if score >= best_score:
+                best, best_score = old, score
+        if best is None:
+            appeared.append(risk)
+            continue
+        unmatched_old.remove(best)
+        if best.get('risk_level') != risk.get('risk_level'):
+            changed.append({'before': best, 'after': risk})
+    return appeared, unmatched_old, changed
+
+def analyze_revision(name, text, index, max_workers=ITB_MAX_WORKERS, lean=True, pack=False):
+    """개정본을 분석해 (문서 순서의 레코드 목록, 변경 보고서) 반환.
+    해시가 색인에 있는 청크는 재사용하고 나머지만 분석함. 호출 후 index.save()로 저장"""
+    chunks = split_itb_document(text)
+    mode = prompt_mode(lean, pack)
+    hashes = {chunk_id: chunk_hash(chunk_text, mode) for chunk_id, chunk_text in chunks}
+    to_analyze = [(chunk_id, chunk_text) for chunk_id, chunk_text in chunks if hashes[chunk_id] not in index.results]
+
+    analyzed = {}
+    for record in iter_itb_document(to_analyze, max_workers, lean, pack):
+        analyzed[record['chunk_id']] = record
+        if record['status'] == 'ok':
+            stored = dict(record['result'])
+            stored.pop('chunk_id', None)
+            stored.pop('original_text', None)
+            index.results[hashes[record['chunk_id']]] = stored
+
+    records = []
+    for chunk_id, chunk_text in chunks:
+        if chunk_id in analyzed:
+            records.append(analyzed[chunk_id])
+            continue
+        result = dict(index.results[hashes[chunk_id]], chunk_id=chunk_id, original_text=chunk_text)
+        records.append({"chunk_id": chunk_id, "status": "reused", "error": None, "started_at": None,
+                        "seconds": 0.0, "result": result})
+
+    previous = index.previous_version(name)
+    report = _build_report(previous, chunks, hashes, index, records)
+    report['api_chunks'] = len(to_analyze)
+    report['reused_chunks'] = len(chunks) - len(to_analyze)
+
+    # 분석에 실패한 조항은 이전 버전 해시를 남겨 다음 실행에서 다시 비교되도록 함
+    old_entries = {entry['article']: entry for entry in (previous or {}).get('chunks', [])}
+    version = []
+    for chunk_id, chunk_text in chunks:
+        article = article_key(chunk_id, chunk_text)
+        failed = chunk_id in analyzed and analyzed[chunk_id]['status'] == 'failed'
+        if failed and article in old_entries:
+            version.append(dict(old_entries[article], chunk_id=chunk_id))
+            continue
+        version.append({'chunk_id': chunk_id, 'article': article, 'hash': hashes[chunk_id],
+                        'text_hash': text_hash(chunk_text)})
+    index.save_version(name, version)
+    return records, report
+
+def _build_report(previous, chunks, hashes, index, records):
+    """조항 번호 기준으로 이전 버전과 비교한 변경 보고서.
+    조항 변경은 원문 해시로 판단하므로 프롬프트 종류만 바뀐 재분석은 변경으로 보고하지 않음"""
+    old_entries = {entry['article']: entry for entry in (previous or {}).get('chunks', [])}
+    records = {record['chunk_id']: record for record in records}
+    report = {'revision': (previous or {}).get('revision', 0) + 1, 'added': [], 'removed': [], 'changed': [],
+              'unchanged': 0, 'failed': [], 'risks_appeared': [], 'risks_disappeared': [], 'risk_level_changed': []}
+
+    new_articles = set()
+    for chunk_id, chunk_text in chunks:
+        article = article_key(chunk_id, chunk_text)
+        new_articles.add(article)
+        old_entry = old_entries.get(article)
+        old_hash = old_entry and old_entry['hash']
+        # text_hash가 없는 이전 버전 항목은 분석 결과 키로 비교
+        if old_entry and (old_entry.get('text_hash') == text_hash(chunk_text) if 'text_hash' in old_entry
+                          else old_hash == hashes[chunk_id]):
+            report['unchanged'] += 1
+            continue
+        report['added' if old_entry is None else 'changed'].append(article)
+        if records[chunk_id]['status'] == 'failed':
+            # 분석 실패한 조항은 위험 비교에서 제외 (다음 실행에서 다시 분석됨)
+            report['failed'].append(article)
+            continue
+        old_risks = index.results.get(old_hash, {}).get('detected_risks', []) if old_hash else []
+        new_risks = records[chunk_id]['result'].get('detected_risks', [])
+        appeared, disappeared, level_changed = diff_risks(old_risks, new_risks)
+        report['risks_appeared'] += [dict(risk, article=article) for risk in appeared]
+        report['risks_disappeared'] += [dict(risk, article=article) for risk in disappeared]
+        report['risk_level_changed'] += [dict(change, article=article) for change in level_changed]
+
+    for article, old_entry in old_entries.items():
+        if article not in new_articles:
+            report['removed'].append(article)
+            report['risks_disappeared'] += [dict(risk, article=article) for risk in
+                                            index.results.get(old_entry['hash'], {}).get('detected_risks', [])]
+    return report
+
+def print_report(report):
+    print(f"개정 {report['revision']}: 조항 추가 {len(report['added'])}, 변경 {len(report['changed'])}, "
+          f"삭제 {len(report['removed'])}, 동일 {report['unchanged']}")
+    print(f"API 분석 {report['api_chunks']}개 청크, 재사용 {report['reused_chunks']}개 청크")
+    for risk in report['risks_appeared']:
+        print(f"  + [{risk['article']}] ({risk.get('risk_level')}) {risk.get('risk_category')}: {risk.get('risk')}")
+    for risk in report['risks_disappeared']:
+        print(f"  - [{risk['article']}] ({risk.get('risk_level')}) {risk.get('risk_category')}: {risk.get('risk')}")
+    for change in report['risk_level_changed']:
+        before, after = change['before'], change['after']
+        print(f"  ~ [{change['article']}] {after.get('risk_category')}: "
+              f"{before.get('risk_level')} → {after.get('risk_level')}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ITB 개정본의 바뀐 조항만 다시 분석하고 위험 변경 내역 보고")
+    parser.add_argument("document", help="ITB 문서 텍스트 파일 (개정본)")
+    parser.add_argument("--name", help="문서 이름 (같은 이름의 이전 버전과 비교, 기본: 파일명)")
+    parser.add_argument("-o", "--output", help="결과 JSONL 경로 (기본: <문서>_itb.jsonl)")
+    parser.add_argument("--report", help="변경 보고서 JSON 경로 (기본: <문서>_itb_changes.json)")
+    parser.add_argument("--index", default=ITB_INDEX_PATH, help="분석 결과 색인 파일")
+    parser.add_argument("--workers", type=int, default=ITB_MAX_WORKERS)
+    parser.add_argument("--pack", action="store_true", help="작은 청크를 묶어 요청")
+    args = parser.parse_args()
+
+    with open(args.document, encoding='utf-8') as f:
+        document = f.read()
+    base = os.path.splitext(args.document)[0]
+    name = args.name or os.path.basename(base)
+    index = ItbAnalysisIndex(args.index)
+    records, report = analyze_revision(name, document, index, args.workers, pack=args.pack)
+    index.save()
+
+    output_path = args.output or f"{base}_itb.jsonl"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    report_path = args.report or f"{base}_itb_changes.json"
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_report(report)
+    print(f"결과 파일: {output_path}, 변경 보고서: {report_path}")
+    sys.exit(1 if any(record['status'] == 'failed' for record in records) else 0)
@@ -0,0 +1,280 @@
+"""ITB 청크 분석 결과 전체에 대한 위험 색인.
+
+청크별 결과(analyze_itb_chunk의 JSON 문자열, dict, analyze_itb_document의 JSONL 레코드)를 한 번만 파싱해
+위험 항목을 평탄화하고, 문서 전체에서 고유한 위험 ID와 분류/수준/태그/대상/관련 엔티티별 역색인을 만든다.
+여러 청크에서 거의 같은 위험은 대표 항목 하나로 묶는다. 색인은 JSON 파일로 저장/로드한다.
+
+    python itb_risk_index.py build ITB_itb.jsonl -o ITB_risks.json
+    python itb_risk_index.py query ITB_risks.json --level "very high" --tag "계약 조건" --top 10
+    python itb_risk_index.py query ITB_risks.json --entity 2025-06-30
+"""
+import os
+import re
+import json
+import heapq
+import argparse
+from collections import defaultdict
+
+RISK_LEVELS = {"very high": 5, "high": 4, "medium": 3, "low": 2, "very low": 1}
+DUPLICATE_THRESHOLD = 0.8  # 같은 분류의 위험 설명 3-gram Jaccard 유사도가 이 이상이면 중복으로 묶음
+DATE_PATTERN = re.compile(r"(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})")
+
+def normalize_key(value):
+    return re.sub(r"\s+", " ", str(value or "")).strip().lower()
+
+def normalize_entity(value):
+    """'2025년 6월 30일' → '2025-06-30', '1,000,000 원' → '1000000원'처럼 비교 가능한 형태로"""
+    value = str(value or "").strip()
+    match = DATE_PATTERN.fullmatch(value.rstrip("일 "))
+    if match:
+        year, month, day = (int(part) for part in match.groups())
+        return f"{year:04d}-{month:02d}-{day:02d}"
+    return re.sub(r"[\s,]", "", value).lower()
+
+def _trigrams(text):
+    """공백을 뺀 문자 3-gram 집합. 빈 텍스트는 빈 집합 (3자 미만은 텍스트 전체 하나)"""
+    text = re.sub(r"\s+", "", text or "")
+    if not text:
+        return set()
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+def _parse_chunk(item):
+    """JSON 문자열, 결과 dict, {"status", "result"} 레코드를 결과 dict로. 분석 실패 레코드는 None"""
+    if isinstance(item, str):
+        item = json.loads(item)
+    if 'status' in item:
+        return item['result'] if item['status'] != 'failed' else None
+    return item
+
+class RiskIndex:
+    """문서 전체 위험 항목과 역색인. 조회는 모두 메모리의 dict/set 연산"""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.risks = {}           # uid → 위험 항목 (청크 평가 정보 포함)
+        self.duplicate_of = {}    # 중복 uid → 대표 uid
+        self.chunks = {}          # [문서:]chunk_id → {'importance_score', 'target_audience', 'tags'}
+        self.by_category = defaultdict(set)
+        self.by_level = defaultdict(set)
+        self.by_tag = defaultdict(set)
+        self.by_audience = defaultdict(set)
+        self.by_entity = defaultdict(set)       # 정규화된 엔티티 값
+        self.by_entity_type = defaultdict(set)
+        self._shingles = {}                      # 대표 uid → 3-gram (중복 검사용)
+        self._representatives = defaultdict(list)  # 분류 → 대표 uid 목록
+
+    def add_chunk(self, item, source=None):
+        """청크 결과 하나를 색인에 추가하고 추가된 위험 uid 목록을 반환.
+        여러 문서를 한 색인에 넣을 때는 source(문서 이름)를 주면 chunk_id와 uid 앞에 '문서:'를 붙여 구분함"""
+        result = _parse_chunk(item)
+        if not result:
+            return []
+        chunk_id = result.get('chunk_id') or f"chunk-{len(self.chunks) + 1:03d}"
+        if source:
+            chunk_id = f"{source}:{chunk_id}"
+        rating = result.get('analysis_rating') or {}
+        self.chunks[chunk_id] = {
+            'importance_score': rating.get('importance_score'),
+            'target_audience': list(rating.get('target_audience') or []),
+            'tags': list(rating.get('tags') or []),
+        }
+        added = []
+        for position, risk in enumerate(result.get('detected_risks') or [], start=1):
+            # 모델은 청크마다 risk-001부터 매기므로 chunk_id를 붙여 문서 전체에서 고유하게 만듦
+            uid = f"{chunk_id}/{risk.get('id') or f'risk-{position:03d}'}"
+            if uid in self.risks:
+                uid = f"{uid}-{position}"
+            entry = dict(risk, uid=uid, chunk_id=chunk_id, **self.chunks[chunk_id])
+            if source:
+                entry['source'] = source
+            self.risks[uid] = entry
+            self._index(uid, entry)
+            added.append(uid)
+        return added
+
+    def _find_representative(self, uid, entry):
+        """같은 분류에서 이미 색인된 거의 같은 위험의 uid. 없으면 uid를 새 대표로 등록.
+        clause와 risk가 모두 비어 있으면 비교할 내용이 없으므로 묶지 않음"""
+        category = normalize_key(entry.get('risk_category'))
+        shingles = _trigrams(f"{entry.get('clause') or ''} {entry.get('risk') or ''}")
+        for representative in self._representatives[category] if shingles else ():
+            other = self._shingles[representative]
+            if other and len(shingles & other) / len(shingles | other) >= self.threshold:
+                return representative
+        self._representatives[category].append(uid)
+        self._shingles[uid] = shingles
+        return uid
+
+    def _index(self, uid, entry):
+        representative = self._find_representative(uid, entry)
+        if representative != uid:
+            self.duplicate_of[uid] = representative
+            kept = self.risks[representative]
+            kept.setdefault('occurrences', [kept['chunk_id']]).append(entry['chunk_id'])
+            # 대표 항목의 중요도와 risk_level은 묶인 항목 중 최댓값
+            kept['importance_score'] = max(kept.get('importance_score') or 0, entry.get('importance_score') or 0)
+            kept_level = normalize_key(kept.get('risk_level'))
+            if RISK_LEVELS.get(normalize_key(entry.get('risk_level')), 0) > RISK_LEVELS.get(kept_level, 0):
+                self.by_level[kept_level].discard(representative)
+                if not self.by_level[kept_level]:
+                    del self.by_level[kept_level]
+                kept['risk_level'] = entry['risk_level']
+                self.by_level[normalize_key(kept['risk_level'])].add(representative)
+        self._index_keys(representative, entry)
+
+    def _index_keys(self, target, entry):
+        """중복 항목의 태그/대상/엔티티도 대표 항목으로 찾을 수 있도록 target uid로 색인"""
+        if entry['uid'] == target:
+            self.by_category[normalize_key(entry.get('risk_category'))].add(target)
+            self.by_level[normalize_key(entry.get('risk_level'))].add(target)
+        for tag in entry.get('tags', []):
+            self.by_tag[normalize_key(tag)].add(target)
+        for audience in entry.get('target_audience', []):
+            self.by_audience[normalize_key(audience)].add(target)
+        for entity in entry.get('related_entities') or []:
+            self.by_entity[normalize_entity(entity.get('value'))].add(target)
+            self.by_entity_type[normalize_key(entity.get('type'))].add(target)
+
+    def _sort_key(self, uid):
+        risk = self.risks[uid]
+        return (risk.get('importance_score') or 0, RISK_LEVELS.get(normalize_key(risk.get('risk_level')), 0))
+
+    def query(self, category=None, level=None, tag=None, audience=None, entity=None, entity_type=None,
+              min_importance=None, limit=None, include_duplicates=False):
+        """조건을 모두 만족하는 위험(중복은 대표 항목만)을 중요도, risk_level 순으로 반환"""
+        candidates = None
+        for index, value, normalize in ((self.by_category, category, normalize_key),
+                                        (self.by_level, level, normalize_key),
+                                        (self.by_tag, tag, normalize_key),
+                                        (self.by_audience, audience, normalize_key),
+                                        (self.by_entity, entity, normalize_entity),
+                                        (self.by_entity_type, entity_type, normalize_key)):
+            if value is None:
+                continue
+            matches = index.get(normalize(value), set())
+            candidates = matches if candidates is None else candidates & matches
+        if candidates is None:
+            candidates = set(self.risks) - set(self.duplicate_of)
+        if min_importance is not None:
+            candidates = {uid for uid in candidates if (self.risks[uid].get('importance_score') or 0) >= min_importance}
+
+        uids = heapq.nlargest(limit, candidates, key=self._sort_key) if limit else \
+            sorted(candidates, key=self._sort_key, reverse=True)
+        results = [self.risks[uid] for uid in uids]
+        if include_duplicates:
+            duplicates = defaultdict(list)
+            for uid, representative in self.duplicate_of.items():
+                duplicates[representative].append(self.risks[uid])
+            results = [dict(risk, duplicates=duplicates.get(risk['uid'], [])) for risk in results]
+        return results
+
+    def top(self, n=10, **filters):
+        """중요도 상위 n개 위험"""
+        return self.query(limit=n, **filters)
+
+    def counts(self):
+        """분류/수준/태그별 대표 위험 수"""
+        def sizes(index):
+            return dict(sorted(((key, len(uids)) for key, uids in index.items()), key=lambda item: -item[1]))
+        return {
+            'chunks': len(self.chunks),
+            'risks': len(self.risks),
+            'unique_risks': len(self.risks) - len(self.duplicate_of),
+            'by_level': sizes(self.by_level),
+            'by_category': sizes(self.by_category),
+            'by_tag': sizes(self.by_tag),
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': self.threshold, 'chunks': self.chunks, 'risks': list(self.risks.values()),
+                       'duplicate_of': self.duplicate_of}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """저장된 색인을 로드. 청크 JSON을 다시 파싱하지 않고 평탄화된 항목에서 역색인만 다시 만듦"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(data.get('threshold', DUPLICATE_THRESHOLD))
+        index.chunks = data['chunks']
+        index.duplicate_of = data['duplicate_of']
+        for entry in data['risks']:
+            index.risks[entry['uid']] = entry
+        for uid, entry in index.risks.items():
+            if uid not in index.duplicate_of:
+                index._find_representative(uid, entry)
+            index._index_keys(index.duplicate_of.get(uid, uid), entry)
+        return index
+
+def build_risk_index(items, threshold=DUPLICATE_THRESHOLD, source=None):
+    """청크 결과 목록(JSON 문자열/dict/JSONL 레코드)으로 색인 생성"""
+    index = RiskIndex(threshold)
+    for item in items:
+        index.add_chunk(item, source)
+    return index
+
+def build_document_index(paths, threshold=DUPLICATE_THRESHOLD):
+    """여러 결과 파일로 색인 생성. 파일이 둘 이상이면 파일 이름을 문서 이름으로 붙여 chunk_id 충돌을 막음"""
+    index = RiskIndex(threshold)
+    for path in paths:
+        source = document_name(path, paths) if len(paths) > 1 else None
+        for item in load_results(path):
+            index.add_chunk(item, source)
+    return index
+
+def document_name(path, paths):
+    """확장자를 뺀 파일 이름. 다른 폴더에 같은 이름의 파일이 있으면 경로 전체"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    same_name = [other for other in paths if os.path.splitext(os.path.basename(other))[0] == name]
+    return name if len(same_name) == 1 else path
+
+def load_results(path):
+    """analyze_itb_document/itb_revisions의 JSONL 또는 결과 목록 JSON 파일 읽기"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def print_risks(risks):
+    for risk in risks:
+        occurrences = risk.get('occurrences')
+        where = f"{risk['chunk_id']}" + (f" 외 {len(occurrences) - 1}곳" if occurrences else "")
+        print(f"{risk['uid']:<22} {risk.get('importance_score') or 0:>4} {risk.get('risk_level', ''):<10} "
+              f"[{risk.get('risk_category', '')}] {risk.get('risk', '')} ({where})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ITB 분석 결과 위험 색인")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="청크 결과 파일로 색인 생성")
+    build_parser.add_argument("results", nargs="+", help="JSONL(analyze_itb_document 출력) 또는 JSON 파일")
+    build_parser.add_argument("-o", "--output", required=True)
+    build_parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+
+    query_parser = subparsers.add_parser("query", help="저장된 색인 조회")
+    query_parser.add_argument("index")
+    query_parser.add_argument("--category")
+    query_parser.add_argument("--level")
+    query_parser.add_argument("--tag")
+    query_parser.add_argument("--audience")
+    query_parser.add_argument("--entity", help="관련 엔티티 값 (날짜, 금액 등)")
+    query_parser.add_argument("--entity-type")
+    query_parser.add_argument("--min-importance", type=float)
+    query_parser.add_argument("--top", type=int, default=20)
+    query_parser.add_argument("--stats", action="store_true", help="분류/수준/태그별 위험 수 출력")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_document_index(args.results, args.threshold)
+        index.save(args.output)
+        print(json.dumps(index.counts(), ensure_ascii=False, indent=2))
+    else:
+        index = RiskIndex.load(args.index)
+        if args.stats:
+            print(json.dumps(index.counts(), ensure_ascii=False, indent=2))
+        print_risks(index.top(args.top, category=args.category, level=args.level, tag=args.tag,
+                              audience=args.audience, entity=args.entity, entity_type=args.entity_type,
+                              min_importance=args.min_importance))
@@ -0,0 +1,87 @@
+import json
+
+class JsonArrayItemStream:
+    """스트리밍으로 조금씩 도착하는 JSON 객체 텍스트에서, 최상위 키(keys)의 배열 원소가 닫히는 즉시 꺼내는 파서.
+
+    parser = JsonArrayItemStream(("detected_risks", "itb_qa"))
+    for delta in deltas:
+        for key, item in parser.feed(delta):
+            ...
+    result = parser.result()  # 전체 텍스트를 json.loads한 결과 (비스트리밍 경로와 같음)
+
+    문자 단위로 한 번만 훑으며 문자열/이스케이프 상태와 중첩 깊이만 추적하고,
+    원소가 끝났을 때 그 원소 구간만 json.loads한다. 첫 '{' 앞의 텍스트(```json 등)는 무시한다."""
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.parts = []
+        self.buffer = ""        # 아직 끝나지 않은 원소가 있으면 그 시작부터, 없으면 비움
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None  # 최상위 객체에서 마지막으로 읽은 문자열 (키 후보)
+        self.current_key = None  # 지금 읽고 있는 최상위 값의 키
+        self.item_start = None   # buffer 안에서 현재 원소의 시작 위치
+        self.emitted = 0
+
+    def feed(self, text):
+        """텍스트 조각을 추가하고 이번에 완성된 (키, 원소) 목록을 반환"""
+        self.parts.append(text)
+        offset = len(self.buffer)
+        self.buffer += text
+        items = []
+        for i in range(offset, len(self.buffer)):
+            ch = self.buffer[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_string = self.buffer[self.string_start + 1:i]
+                continue
+            if not self.started:
+                if ch == '{':
+                    self.started = True
+                    self.depth = 1
+                continue
+            if ch == '"':
+                self.in_string = True
+                self.string_start = i
+            elif ch == ':' and self.depth == 1:
+                self.current_key = json.loads(f'"{self.last_string}"')
+            elif ch in '{[':
+                self.depth += 1
+                if self.depth == 3 and self.current_key in self.keys:
+                    self.item_start = i
+            elif ch in '}]':
+                if self.depth == 3 and self.item_start is not None:
+                    items.append((self.current_key, json.loads(self.buffer[self.item_start:i + 1])))
+                    self.item_start = None
+                self.depth -= 1
+
+        # 끝난 부분은 버려 긴 응답에서도 원소 구간만 다시 훑도록 함
+        if self.item_start is not None:
+            self.buffer = self.buffer[self.item_start:]
+            if self.in_string:
+                self.string_start -= self.item_start
+            self.item_start = 0
+        else:
+            if self.in_string and self.depth == 1:
+                self.buffer = self.buffer[self.string_start:]
+                self.string_start = 0
+            else:
+                self.buffer = ""
+        self.emitted += len(items)
+        return items
+
+    def text(self):
+        return "".join(self.parts)
+
+    def result(self):
+        """지금까지 받은 전체 텍스트를 파싱 (잘린 응답이면 json.JSONDecodeError)"""
+        return json.loads(self.text())
@@ -0,0 +1,26 @@
+import importlib
+import threading
+
+class LazyModule:
+    """속성에 처음 접근할 때 모듈을 import하는 대리 객체.
+    `scrapetube = LazyModule("scrapetube")`처럼 두면 기존 `scrapetube.get_channel(...)` 코드를 그대로 쓰면서
+    --help나 캐시 전용 명령처럼 해당 모듈이 필요 없는 경로의 시작 시간을 줄일 수 있다."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
@@ -0,0 +1,57 @@
+"""요약 결과를 Markdown 리포트로 변환 (OpenAI/YouTube 의존성 없이 사용 가능)"""
+import logging
+from datetime import datetime
+
+def format_date(date_string):
+    try:
+        date_object = datetime.strptime(date_string, "%Y-%m-%dT%H:%M:%S%z")
+        return date_object.strftime("%Y년 %m월 %d일")
+    except ValueError:
+        logging.warning(f"Date format error: {date_string}")
+        return "날짜 정보 없음"
+
+def format_views(views):
+    try:
+        return f"{int(views):,}"
+    except ValueError:
+        logging.warning(f"Views format error: {views}")
+        return "조회수 정보 없음"
+
+def get_thumbnail_url(video_id):
+    return f"https://img.youtube.com/vi/{video_id}/0.jpg"
+
+MARKDOWN_HEADER = "# 부동산 상담 콘텐츠 요약\n\n"
+
+def get_video_title(video):
+    return video.get('title', {}).get('runs', [{}])[0].get('text', 'Unknown Title')
+
+def create_markdown_section(video):
+    title = get_video_title(video)
+    video_id = video.get('videoId', 'Unknown ID')
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    date = video.get('details', {}).get('date', 'Unknown Date')
+    views = video.get('details', {}).get('views', 'Unknown Views')
+
+    parts = [
+        f"## [{title}]({url})\n\n",
+        f"![썸네일](https://img.youtube.com/vi/{video_id}/0.jpg)\n\n",
+        f"- 업로드 날짜: {date}\n",
+        f"- 조회수: {views}회\n\n",
+    ]
+
+    duplicate = video.get('duplicate_of')
+    if duplicate:
+        original_url = f"https://www.youtube.com/watch?v={duplicate['videoId']}"
+        parts.append(f"> 중복 콘텐츠: [{duplicate.get('title') or duplicate['videoId']}]({original_url})의 "
+                     f"스크립트와 {duplicate['containment']:.0%} 겹쳐 해당 요약을 재사용했습니다.\n\n")
+
+    if 'summary' in video and video['summary']:
+        parts.append(f"### 요약\n\n{video['summary']}\n\n")  # 직접 summary 내용 사용
+    else:
+        parts.append("### 요약\n\n요약 정보가 없습니다.\n\n")
+
+    parts.append("---\n\n")
+    return "".join(parts)
+
+def create_markdown(videos):
+    return MARKDOWN_HEADER + "".join(create_markdown_section(video) for video in videos)
@@ -0,0 +1,212 @@
+import json
+import time
+import logging
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+
+# 모델별 가격 (USD / 1M 토큰: 입력, 출력)
+MODEL_PRICING = {
+    "gpt-4o-2024-08-06": (2.50, 10.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+LATENCY_SAMPLES = 10000   # 단계별 백분위 계산에 보관할 최근 소요 시간 수
+MAX_TRACKED_VIDEOS = 10000  # 영상별 기록 상한 (데몬처럼 오래 실행될 때 메모리 제한)
+
+_context = threading.local()
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    input_price, output_price = MODEL_PRICING.get(model, MODEL_PRICING["gpt-4o"])
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+@contextmanager
+def video_context(video_id):
+    """현재 스레드에서 기록되는 지표를 video_id에 귀속"""
+    previous = getattr(_context, 'video_id', None)
+    _context.video_id = video_id
+    try:
+        yield
+    finally:
+        _context.video_id = previous
+
+def current_video():
+    return getattr(_context, 'video_id', None)
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class RunMetrics:
+    """단계별 소요 시간, 재시도, 다운로드 바이트, 토큰, 비용을 스레드 안전하게 집계"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.videos = OrderedDict()
+
+    def _stage(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = {'counters': {}, 'latencies': deque(maxlen=LATENCY_SAMPLES)}
+        return self.stages[stage]
+
+    def record(self, stage, video_id=None, seconds=None, **counters):
+        """단계 지표 누적. video_id를 생략하면 video_context()의 영상에 귀속"""
+        video_id = video_id or current_video()
+        with self.lock:
+            entry = self._stage(stage)
+            if seconds is not None:
+                entry['latencies'].append(seconds)
+                counters['seconds'] = seconds
+            for name, value in counters.items():
+                entry['counters'][name] = entry['counters'].get(name, 0) + value
+
+            if video_id is None:
+                return
+            if video_id not in self.videos:
+                self.videos[video_id] = {}
+                if len(self.videos) > MAX_TRACKED_VIDEOS:
+                    self.videos.popitem(last=False)
+            video_stage = self.videos[video_id].setdefault(stage, {})
+            for name, value in counters.items():
+                video_stage[name] = video_stage.get(name, 0) + value
+
+    @contextmanager
+    def timed(self, stage, expected=(), **counters):
+        """with 블록의 소요 시간을 기록. 예외가 나면 errors를 1 증가시키고 다시 발생시킴
+        (expected에 포함된 예외는 정상 흐름으로 보고 errors에 넣지 않음)"""
+        start = time.perf_counter()
+        errors = 0
+        try:
+            yield
+        except expected:
+            raise
+        except BaseException:
+            errors = 1
+            raise
+        finally:
+            self.record(stage, seconds=time.perf_counter() - start, calls=1, errors=errors, **counters)
+
+    def record_usage(self, stage, model, usage, price_factor=1.0):
+        """응답의 usage(prompt/completion tokens)와 추정 비용 기록. price_factor는 할인율 (Batch API는 0.5)"""
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self.record(stage, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                    cost_usd=estimate_cost(model, prompt_tokens, completion_tokens) * price_factor)
+
+    def totals(self):
+        totals = {}
+        for entry in self.stages.values():
+            for name, value in entry['counters'].items():
+                if name != 'seconds':
+                    totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def to_dict(self):
+        with self.lock:
+            stages = {}
+            for stage, entry in self.stages.items():
+                latencies = list(entry['latencies'])
+                stages[stage] = dict(entry['counters'], p50=percentile(latencies, 0.50),
+                                     p95=percentile(latencies, 0.95))
+            return {
+                'started_at': self.started_at,
+                'wall_seconds': time.time() - self.started_at,
+                'stages': stages,
+                'totals': self.totals(),
+                'videos': dict(self.videos),
+            }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+        logging.info(f"Created metrics file: {path}")
+
+    def prometheus_text(self, prefix="youtube_summarizer"):
+        """Prometheus 텍스트 노출 형식"""
+        data = self.to_dict()
+        lines = []
+        counter_names = sorted({name for stage in data['stages'].values() for name in stage
+                                if name not in ('p50', 'p95')})
+        for name in counter_names:
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, values in data['stages'].items():
+                if name in values:
+                    lines.append(f'{metric}{{stage="{stage}"}} {values[name]}')
+        metric = f"{prefix}_stage_latency_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for stage, values in data['stages'].items():
+            for quantile in ('p50', 'p95'):
+                if values[quantile] is not None:
+                    lines.append(f'{metric}{{stage="{stage}",quantile="0.{quantile[1:]}"}} {values[quantile]}')
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {data['wall_seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def summary_table(self):
+        """실행 종료 시 출력할 단계별 요약 표"""
+        data = self.to_dict()
+        header = (f"{'stage':<12} {'calls':>6} {'errors':>6} {'total s':>9} {'p50 s':>7} {'p95 s':>7} "
+                  f"{'retries':>7} {'MB':>8} {'in tok':>9} {'out tok':>9} {'cost $':>8}")
+        rows = [header, "-" * len(header)]
+        for stage, values in data['stages'].items():
+            rows.append(
+                f"{stage:<12} {values.get('calls', 0):>6} {values.get('errors', 0):>6} "
+                f"{values.get('seconds', 0):>9.1f} {values['p50'] or 0:>7.2f} {values['p95'] or 0:>7.2f} "
+                f"{values.get('retries', 0):>7} {values.get('bytes', 0) / 1048576:>8.1f} "
+                f"{values.get('prompt_tokens', 0):>9} {values.get('completion_tokens', 0):>9} "
+                f"{values.get('cost_usd', 0):>8.3f}"
+            )
+        totals = data['totals']
+        video_count = len(data['videos'])
+        rows.append("-" * len(header))
+        rows.append(f"wall {data['wall_seconds']:.1f}s, videos {video_count}, "
+                    f"cost ${totals.get('cost_usd', 0):.3f}"
+                    + (f" (${totals.get('cost_usd', 0) / video_count:.4f}/video)" if video_count else ""))
+        if totals.get('raw_tokens'):
+            rows.append(f"transcript tokens {totals['raw_tokens']} -> {totals.get('compressed_tokens', 0)} "
+                        f"({1 - totals.get('compressed_tokens', 0) / totals['raw_tokens']:.0%} saved)")
+        return "\n".join(rows)
+
+_active = RunMetrics()
+
+def get_metrics():
+    """현재 수집 중인 지표 객체"""
+    return _active
+
+def start_run():
+    """새 실행의 지표 수집을 시작하고 그 객체를 반환"""
+    global _active
+    _active = RunMetrics()
+    return _active
+
+def serve_prometheus(port, host="0.0.0.0"):
+    """/metrics 경로로 Prometheus 텍스트를 제공하는 HTTP 서버를 백그라운드 스레드로 시작"""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = get_metrics().prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,134 @@
+import re
+import time
+import random
+import threading
+
+# 토큰 수 추정 설정 (tiktoken 없이 문자 수 기반으로 근사)
+ASCII_CHARS_PER_TOKEN = 4      # 영문/숫자는 약 4글자당 1토큰
+NON_ASCII_TOKENS_PER_CHAR = 1  # 한글은 대략 1글자당 1토큰
+MESSAGE_OVERHEAD_TOKENS = 300  # 시스템 프롬프트 및 메시지 포맷 오버헤드
+
+def estimate_tokens(text):
+    """텍스트 길이로부터 프롬프트 토큰 수를 근사"""
+    if not text:
+        return 0
+    ascii_count = sum(1 for ch in text if ord(ch) < 128)
+    non_ascii_count = len(text) - ascii_count
+    return int(ascii_count / ASCII_CHARS_PER_TOKEN + non_ascii_count * NON_ASCII_TOKENS_PER_CHAR) + 1
+
+def estimate_request_tokens(text, expected_completion_tokens=1000):
+    """요청 하나가 TPM 예산에서 차지할 토큰 수 (프롬프트 + 예상 응답)"""
+    return estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS + expected_completion_tokens
+
+def parse_reset_duration(value):
+    """'6m0s', '1.5s', '20ms' 형식의 x-ratelimit-reset-* 값을 초 단위로 변환"""
+    if not value:
+        return None
+    total = 0.0
+    matched = False
+    for number, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value):
+        matched = True
+        number = float(number)
+        total += {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit] * number
+    if matched:
+        return total
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class TokenBucket:
+    """스레드 안전한 토큰 버킷. reserve()는 필요한 대기 시간을 반환하고 토큰을 선점한다."""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+
+    def reserve(self, amount):
+        # 잔량이 음수가 되면 그만큼 대기 → 먼저 요청한 순서대로 처리됨
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(float(amount), self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+    def credit(self, amount):
+        """추정치보다 실제 사용량이 적었을 때 차이를 돌려줌 (음수면 추가 차감)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def limit_to(self, remaining):
+        """서버가 알려준 잔여량보다 많이 가지고 있지 않도록 보정"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+
+class RateLimitScheduler:
+    """RPM/TPM 예산을 지키며 요청을 허용하고, 429 및 rate limit 헤더에 따라 전체 요청을 늦춘다."""
+
+    def __init__(self, rpm, tpm, max_backoff=60.0):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self.max_backoff = max_backoff
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self, estimated_tokens):
+        """요청을 보내도 될 때까지 대기"""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        with self.lock:
+            wait = max(wait, self.paused_until - time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """응답의 usage로 추정 토큰과 실제 토큰의 차이를 보정"""
+        if actual_tokens is not None:
+            self.tokens.credit(estimated_tokens - actual_tokens)
+
+    def update_from_headers(self, headers):
+        """x-ratelimit-remaining-* 헤더로 버킷 잔량을 서버 상태에 맞춤"""
+        if not headers:
+            return
+        remaining_requests = headers.get('x-ratelimit-remaining-requests')
+        remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+        try:
+            if remaining_requests is not None:
+                self.requests.limit_to(float(remaining_requests))
+            if remaining_tokens is not None:
+                self.tokens.limit_to(float(remaining_tokens))
+        except ValueError:
+            pass
+
+    def on_rate_limited(self, headers, attempt):
+        """429 응답 시 모든 워커를 일시정지시키고 대기 시간을 반환"""
+        delay = None
+        if headers:
+            delay = parse_reset_duration(headers.get('retry-after-ms'))
+            if delay is not None:
+                delay /= 1000.0
+            else:
+                delay = parse_reset_duration(headers.get('retry-after'))
+            if delay is None:
+                resets = [parse_reset_duration(headers.get(name))
+                          for name in ('x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens')]
+                resets = [reset for reset in resets if reset is not None]
+                delay = max(resets) if resets else None
+        if delay is None:
+            delay = 2 ** attempt
+        # 여러 워커가 동시에 재시도하지 않도록 지터 추가
+        delay = min(self.max_backoff, delay) + random.uniform(0, 0.5)
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self.update_from_headers(headers)
+        return delay
@@ -0,0 +1,443 @@
+"""요약 결과를 SQLite 하나에 모아 채널/날짜/조회수 조건과 전문 검색(FTS5)으로 조회하는 저장소.
+
+영상 정보, 상세 정보, 스크립트, 요약과 요약에서 추출한 항목(주요 키워드, 언급된 주요 지역)을 보관한다.
+Markdown 리포트는 필요할 때 저장소에서 생성한다.
+
+    python results_store.py import *_videos.json *.jsonl summary_results/*.md
+    python results_store.py search "강남 재건축" --since 2024-07-01 --until 2024-09-30
+    python results_store.py report --channel @channelname --order views -o report.md
+    python results_store.py stats
+"""
+import os
+import re
+import json
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+
+from markdown_report import get_video_title, create_markdown
+
+RESULTS_DB = "youtube_summaries.db"  # 기본 저장소 파일
+SEARCH_LIMIT = 20                    # 검색 결과 기본 개수
+MAX_TERM_LENGTH = 30                 # 이보다 긴 항목은 키워드/지역으로 보지 않음
+
+# 요약 리포트 항목 제목에 포함된 단어 → 섹션 이름. 프롬프트마다 번호가 달라 제목 단어로 구분
+SECTION_WORDS = [
+    ('키워드', 'keywords'),
+    ('지역', 'regions'),
+    ('개요', 'overview'),
+    ('목적', 'purpose'),
+    ('상세', 'details'),
+    ('인사이트', 'insights'),
+    ('결론', 'conclusion'),
+]
+TERM_SECTIONS = {'keywords': 'keyword', 'regions': 'region'}
+
+# 검색 결과 정렬 가중치 (title, summary, keywords, regions, transcript)
+FTS_WEIGHTS = (5.0, 2.0, 3.0, 3.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    channel TEXT,
+    title TEXT,
+    upload_date TEXT,   -- YYYY-MM-DD (범위 검색용)
+    views INTEGER,
+    url TEXT,
+    duplicate_of TEXT,
+    details TEXT,       -- JSON
+    record TEXT,        -- 스크립트/요약을 제외한 원본 레코드 JSON
+    updated_at TEXT,
+    summary TEXT,
+    transcript TEXT,
+    keywords TEXT,      -- 요약의 주요 키워드 (공백 구분, 검색용)
+    regions TEXT        -- 요약의 언급된 주요 지역 (공백 구분, 검색용)
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(channel, upload_date);
+CREATE INDEX IF NOT EXISTS idx_videos_date ON videos(upload_date);
+CREATE INDEX IF NOT EXISTS idx_videos_views ON videos(views);
+
+CREATE TABLE IF NOT EXISTS sections (
+    video_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    heading TEXT,
+    body TEXT,
+    PRIMARY KEY (video_id, section)
+);
+
+CREATE TABLE IF NOT EXISTS terms (
+    video_id TEXT NOT NULL,
+    kind TEXT NOT NULL,  -- keyword / region
+    term TEXT NOT NULL,
+    PRIMARY KEY (video_id, kind, term)
+);
+CREATE INDEX IF NOT EXISTS idx_terms_term ON terms(kind, term);
+"""
+
+# 전문 검색 색인은 videos 내용을 복사하지 않는 external content 테이블. 트리거로 videos와 동기화
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    title, summary, keywords, regions, transcript, content='videos', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS videos_fts_insert AFTER INSERT ON videos BEGIN
+    INSERT INTO videos_fts (rowid, title, summary, keywords, regions, transcript)
+    VALUES (new.rowid, new.title, new.summary, new.keywords, new.regions, new.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_fts_delete AFTER DELETE ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, title, summary, keywords, regions, transcript)
+    VALUES ('delete', old.rowid, old.title, old.summary, old.keywords, old.regions, old.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS videos_fts_update AFTER UPDATE ON videos BEGIN
+    INSERT INTO videos_fts (videos_fts, rowid, title, summary, keywords, regions, transcript)
+    VALUES ('delete', old.rowid, old.title, old.summary, old.keywords, old.regions, old.transcript);
+    INSERT INTO videos_fts (rowid, title, summary, keywords, regions, transcript)
+    VALUES (new.rowid, new.title, new.summary, new.keywords, new.regions, new.transcript);
+END;
+"""
+
+HEADING_PATTERN = re.compile(r"^\s*(?:#{1,6}\s*)?(?:\*\*)?\s*(\d{1,2})\.\s*(?:\*\*)?\s*(.+?)\s*(?:\*\*)?\s*:?\s*$")
+DATE_PATTERN = re.compile(r"(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})")
+
+def normalize_date(value):
+    """'2024-08-14T01:26:26-07:00', '2024년 08월 09일' 등을 'YYYY-MM-DD'로. 알 수 없으면 None"""
+    match = DATE_PATTERN.search(str(value or ""))
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+def parse_views(value):
+    """'6,428회', '6428', 6428 → 6428. 알 수 없으면 None"""
+    digits = re.sub(r"[,\s회]", "", str(value or ""))
+    return int(digits) if digits.isdigit() else None
+
+def extract_sections(summary):
+    """요약 리포트를 번호 항목별로 나눠 {섹션 이름: (제목, 본문)} 반환.
+    '**3. 주요 키워드**', '### 5. 언급된 주요 지역'처럼 강조된 번호 줄이나 알려진 단어가 있는 번호 줄을
+    항목 제목으로 보고, 알 수 없는 항목(예: '각 상담 사례별 요약')은 앞 항목을 끝내기만 함"""
+    sections = {}
+    current = None
+    for line in (summary or "").splitlines():
+        match = HEADING_PATTERN.match(line)
+        if match and len(match.group(2)) <= 40:
+            heading = match.group(2).strip("* ")
+            name = next((name for word, name in SECTION_WORDS if word in heading), None)
+            if name or "**" in line or line.lstrip().startswith("#"):
+                current = name if name and name not in sections else None
+                if current:
+                    sections[current] = [heading, []]
+                continue
+        if current:
+            sections[current][1].append(line)
+    return {name: (heading, "\n".join(lines).strip()) for name, (heading, lines) in sections.items()}
+
+def extract_terms(body):
+    """'- 강남 3구, 마용성 (서울)' 같은 항목 본문에서 개별 키워드/지역 목록 추출"""
+    terms = []
+    for line in body.splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+\.)\s*", "", line).replace("**", "")
+        # '수원: 설명...' 형태는 앞부분만 사용
+        line = line.split(":", 1)[0]
+        line = re.sub(r"\([^)]*\)", "", line)
+        for term in re.split(r"[,、/·]", line):
+            term = term.strip(" .")
+            if term and len(term) <= MAX_TERM_LENGTH and term not in terms:
+                terms.append(term)
+    return terms
+
+def fts_query(text):
+    """검색어를 단어별 접두어 검색으로 변환. '강남 재건축' → '"강남"* "재건축"*' (조사가 붙은 형태도 일치)"""
+    words = [word.replace('"', '') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words if word)
+
+class ResultsStore:
+    """요약 결과 SQLite 저장소. 연결을 만든 스레드에서만 사용"""
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        rebuild = self._upgrade_schema()
+        self.conn.executescript(FTS_SCHEMA)
+        if rebuild:
+            with self.conn:
+                self.conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+
+    def _upgrade_schema(self):
+        """이전 형식 저장소 변환: keywords/regions 열을 terms에서 채우고, 내용을 복사해 두던 색인은 지움.
+        색인을 다시 만들어야 하면 True"""
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(videos)")}
+        fts = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'videos_fts'").fetchone()
+        with self.conn:
+            for name, kind in TERM_SECTIONS.items():
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE videos ADD COLUMN {name} TEXT")
+                    self.conn.execute(f"UPDATE videos SET {name} = (SELECT group_concat(term, ' ') FROM terms t "
+                                      f"WHERE t.video_id = videos.video_id AND t.kind = ?)", (kind,))
+            if fts and "content=" not in fts['sql']:
+                self.conn.execute("DROP TABLE videos_fts")
+                return True
+        return False
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_video(self, video, channel=None):
+        """파이프라인 레코드 하나를 저장 (같은 videoId는 갱신, 없는 값은 기존 값 유지)"""
+        video_id = video['videoId']
+        details = video.get('details') or {}
+        title = get_video_title(video) if isinstance(video.get('title'), dict) else video.get('title')
+        summary = video.get('summary')
+        duplicate = video.get('duplicate_of')
+        record = {key: value for key, value in video.items() if key not in ('script', 'segments', 'summary')}
+        # 요약 항목과 키워드/지역은 요약이 있을 때만 다시 추출 (없으면 저장된 값 유지)
+        sections = extract_sections(summary) if summary is not None else None
+        term_lists = {name: extract_terms(sections[name][1]) if name in sections else []
+                      for name in TERM_SECTIONS} if sections is not None else {}
+
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO videos (video_id, channel, title, upload_date, views, url, duplicate_of, details,
+                                    record, updated_at, summary, transcript, keywords, regions)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    channel = COALESCE(excluded.channel, channel),
+                    title = COALESCE(excluded.title, title),
+                    upload_date = COALESCE(excluded.upload_date, upload_date),
+                    views = COALESCE(excluded.views, views),
+                    url = COALESCE(excluded.url, url),
+                    duplicate_of = COALESCE(excluded.duplicate_of, duplicate_of),
+                    details = excluded.details,
+                    record = excluded.record,
+                    updated_at = excluded.updated_at,
+                    summary = COALESCE(excluded.summary, summary),
+                    transcript = COALESCE(excluded.transcript, transcript),
+                    keywords = COALESCE(excluded.keywords, keywords),
+                    regions = COALESCE(excluded.regions, regions)
+            """, (
+                video_id, channel or video.get('channel'), title, normalize_date(details.get('date')),
+                parse_views(details.get('views')), video.get('url') or f"https://www.youtube.com/watch?v={video_id}",
+                duplicate['videoId'] if duplicate else None, json.dumps(details, ensure_ascii=False),
+                json.dumps(record, ensure_ascii=False, default=str), datetime.now().isoformat(),
+                summary, video.get('script'),
+                *(" ".join(term_lists[name]) if sections is not None else None for name in TERM_SECTIONS),
+            ))
+
+            if sections is not None:
+                self.conn.execute("DELETE FROM sections WHERE video_id = ?", (video_id,))
+                self.conn.execute("DELETE FROM terms WHERE video_id = ?", (video_id,))
+                self.conn.executemany("INSERT INTO sections VALUES (?, ?, ?, ?)",
+                                      [(video_id, name, heading, body) for name, (heading, body) in sections.items()])
+                for name, kind in TERM_SECTIONS.items():
+                    self.conn.executemany("INSERT OR IGNORE INTO terms VALUES (?, ?, ?)",
+                                          [(video_id, kind, term) for term in term_lists[name]])
+
+    def has_video(self, video_id):
+        return self.conn.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone() is not None
+
+    def _filters(self, channel=None, since=None, until=None, min_views=None, region=None, keyword=None):
+        clauses, params = [], []
+        if channel:
+            clauses.append("v.channel = ?")
+            params.append(channel)
+        if since:
+            clauses.append("v.upload_date >= ?")
+            params.append(normalize_date(since))
+        if until:
+            clauses.append("v.upload_date <= ?")
+            params.append(normalize_date(until))
+        if min_views:
+            clauses.append("v.views >= ?")
+            params.append(min_views)
+        for kind, term in (('region', region), ('keyword', keyword)):
+            if term:
+                clauses.append("EXISTS (SELECT 1 FROM terms t WHERE t.video_id = v.video_id "
+                               "AND t.kind = ? AND t.term LIKE ?)")
+                params.extend([kind, f"%{term}%"])
+        return clauses, params
+
+    def search(self, query, limit=SEARCH_LIMIT, **filters):
+        """전문 검색. 결과는 관련도 순 dict 목록 (snippet 포함). 검색어가 비어 있으면 빈 목록"""
+        match = fts_query(query or "")
+        if not match:
+            return []
+        clauses, params = self._filters(**filters)
+        weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+        sql = f"""
+            SELECT v.video_id, v.channel, v.title, v.upload_date, v.views, v.url,
+                   snippet(videos_fts, -1, '[', ']', '…', 16) AS snippet
+            FROM videos_fts JOIN videos v ON v.rowid = videos_fts.rowid
+            WHERE videos_fts MATCH ? {''.join(f' AND {clause}' for clause in clauses)}
+            ORDER BY bm25(videos_fts, {weights})
+            LIMIT ?
+        """
+        return [dict(row) for row in self.conn.execute(sql, [match, *params, limit])]
+
+    def iter_videos(self, order='date', limit=None, video_ids=None, **filters):
+        """조건에 맞는 영상을 파이프라인 레코드 형태(create_markdown_section 입력)로 반환"""
+        clauses, params = self._filters(**filters)
+        if video_ids is not None:
+            video_ids = list(video_ids)
+            clauses.append(f"v.video_id IN ({', '.join('?' * len(video_ids))})")
+            params.extend(video_ids)
+        order_by = {'date': "v.upload_date DESC", 'views': "v.views DESC"}[order]
+        sql = (f"SELECT v.record, v.summary, v.transcript FROM videos v "
+               f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} ORDER BY {order_by}"
+               f"{' LIMIT ?' if limit else ''}")
+        for row in self.conn.execute(sql, params + ([limit] if limit else [])):
+            video = json.loads(row['record'])
+            video['summary'] = row['summary']
+            video['script'] = row['transcript']
+            yield video
+
+    def render_markdown(self, order='date', limit=None, video_ids=None, **filters):
+        videos = list(self.iter_videos(order, limit, video_ids, **filters))
+        if video_ids is not None:
+            # 지정한 순서(예: 실행 결과 순서)를 유지
+            position = {video_id: i for i, video_id in enumerate(video_ids)}
+            videos.sort(key=lambda video: position[video['videoId']])
+        return create_markdown(videos)
+
+    def write_markdown(self, path, **kwargs):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.render_markdown(**kwargs))
+        logging.info(f"Created Markdown file from store: {path}")
+
+    def top_terms(self, kind, limit=10, **filters):
+        clauses, params = self._filters(**filters)
+        sql = (f"SELECT t.term, COUNT(*) AS videos FROM terms t JOIN videos v ON v.video_id = t.video_id "
+               f"WHERE t.kind = ? {''.join(f' AND {clause}' for clause in clauses)} "
+               f"GROUP BY t.term ORDER BY videos DESC, t.term LIMIT ?")
+        return [tuple(row) for row in self.conn.execute(sql, [kind, *params, limit])]
+
+    def channel_counts(self):
+        return [tuple(row) for row in self.conn.execute(
+            "SELECT COALESCE(channel, '-'), COUNT(*), MIN(upload_date), MAX(upload_date) "
+            "FROM videos GROUP BY channel ORDER BY COUNT(*) DESC")]
+
+    def import_file(self, path, channel=None):
+        """기존 결과 파일(*_videos.json, *.jsonl, *_summary.md)을 가져와 저장한 영상 수 반환"""
+        channel = channel or channel_from_filename(path)
+        if path.endswith(".md"):
+            with open(path, encoding='utf-8') as f:
+                records = parse_markdown_report(f.read())
+        elif path.endswith(".jsonl"):
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(path, encoding='utf-8') as f:
+                records = json.load(f)
+        count = 0
+        for record in records:
+            if record.get('videoId'):
+                self.add_video(record, channel=record.get('channel') or channel)
+                count += 1
+        logging.info(f"Imported {count} videos from {path}")
+        return count
+
+def channel_from_filename(path):
+    """'{채널}_{YYYYMMDD}_{N}videos.json' 또는 '{이름}_{YYMMDD}.md' 형식 파일명에서 채널 추정"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    match = re.match(r"^(.*?)_\d{8}_\d+videos", name) or re.match(r"^(.*?)_\d{6,8}$", name)
+    return match.group(1) if match else None
+
+def parse_markdown_report(text):
+    """create_markdown 형식의 Markdown(수작업 정리본 포함)을 레코드 목록으로 변환"""
+    records = []
+    for block in re.split(r"^(?=## \[)", text, flags=re.MULTILINE)[1:]:
+        header = re.match(r"## \[(.*)\]\((\S*?v=([\w-]{11})\S*)\)", block)
+        if not header:
+            continue
+        date = re.search(r"^- 업로드 날짜:\s*(.+)$", block, re.MULTILINE)
+        views = re.search(r"^- 조회수:\s*(.+?)회?\s*$", block, re.MULTILINE)
+        summary = re.search(r"^### 요약[ \t]*\n(.*)", block, re.MULTILINE | re.DOTALL)
+        summary = re.sub(r"\n-{3,}\s*$", "", summary.group(1)).strip() if summary else ""
+        records.append({
+            'videoId': header.group(3),
+            'url': header.group(2),
+            'title': {'runs': [{'text': header.group(1)}]},
+            'details': {'date': date.group(1).strip() if date else 'Unknown date',
+                        'views': views.group(1).strip() if views else 'Unknown views'},
+            'summary': summary if summary and summary != "요약 정보가 없습니다." else None,
+        })
+    return records
+
+def print_results(rows):
+    for row in rows:
+        views = f"{row['views']:,}" if row['views'] is not None else "-"
+        print(f"{row['upload_date'] or '----------'}  {views:>9}  {row['channel'] or '-'}  {row['title']}")
+        print(f"    {row['url']}")
+        if row.get('snippet'):
+            print(f"    {' '.join(row['snippet'].split())}")
+
+def main():
+    parser = argparse.ArgumentParser(description="요약 결과 저장소 검색/가져오기/리포트")
+    parser.add_argument("--db", default=RESULTS_DB, help="SQLite 파일 경로")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--channel")
+    filters.add_argument("--since", help="업로드 날짜 시작 (YYYY-MM-DD)")
+    filters.add_argument("--until", help="업로드 날짜 끝 (YYYY-MM-DD)")
+    filters.add_argument("--min-views", type=int)
+    filters.add_argument("--region", help="언급된 주요 지역에 포함된 단어")
+    filters.add_argument("--keyword", help="주요 키워드에 포함된 단어")
+
+    search_parser = subparsers.add_parser("search", parents=[filters], help="전문 검색")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+
+    import_parser = subparsers.add_parser("import", help="기존 JSON/JSONL/Markdown 결과 가져오기")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--channel", help="파일명으로 채널을 알 수 없을 때 사용할 채널 이름")
+
+    report_parser = subparsers.add_parser("report", parents=[filters], help="Markdown 리포트 생성")
+    report_parser.add_argument("-o", "--output", help="출력 파일 (생략 시 표준 출력)")
+    report_parser.add_argument("--order", choices=("date", "views"), default="date")
+    report_parser.add_argument("--limit", type=int)
+
+    stats_parser = subparsers.add_parser("stats", parents=[filters], help="채널별 영상 수와 자주 언급된 지역/키워드")
+    stats_parser.add_argument("--top", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "search" and not fts_query(args.query):
+        search_parser.error("검색어가 비어 있습니다")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    with ResultsStore(args.db) as store:
+        if args.command == "import":
+            total = sum(store.import_file(path, args.channel) for path in args.files)
+            print(f"{total} videos imported into {args.db}")
+            return
+
+        selected = {name: getattr(args, name) for name in
+                    ('channel', 'since', 'until', 'min_views', 'region', 'keyword')}
+        if args.command == "search":
+            print_results(store.search(args.query, args.limit, **selected))
+        elif args.command == "report":
+            markdown = store.render_markdown(args.order, args.limit, **selected)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(markdown)
+                print(f"Created {args.output}")
+            else:
+                print(markdown)
+        elif args.command == "stats":
+            for channel, count, first, last in store.channel_counts():
+                print(f"{channel}: {count} videos ({first} ~ {last})")
+            for kind in ('region', 'keyword'):
+                top = store.top_terms(kind, args.top, **selected)
+                print(f"\nTop {kind}s: " + ", ".join(f"{term}({count})" for term, count in top))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 저장소 최상위 모듈(json_stream, rate_limiter 등)과 benchmarks/의 가짜 클라이언트(fake_openai)를 바로 import할 수 있도록
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
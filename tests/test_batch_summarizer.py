@@ -0,0 +1,44 @@
+import channel_summarizer as cs
+from fake_openai import FakeOpenAI
+from metrics import start_run
+
+def responder(body):
+    system = body['messages'][0]['content']
+    return "[map note]" if system == cs.MAP_SYSTEM_PROMPT else "[summary]"
+
+def video(video_id, words):
+    script = " ".join(f"단어{i}" for i in range(words))
+    return {'videoId': video_id, 'title': video_id, 'script': script, 'script_true': True,
+            'segments': [{'text': script, 'start': 0.0, 'duration': 1.0}]}
+
+def test_long_transcripts_use_map_and_reduce_batches(tmp_path):
+    client = FakeOpenAI(responder)
+    long_words = cs.MAP_REDUCE_THRESHOLD_TOKENS // 2
+    videos = [video("short", 100), video("long", long_words)]
+    videos[1]['segments'] = cs.segments_from_text(videos[1]['script'])
+    run_metrics = start_run()
+
+    cs.summarize_videos_batch(videos, str(tmp_path), batch_client=client, poll_interval=0)
+
+    assert [v['summary'] for v in videos] == ["[summary]", "[summary]"]
+    batches = list(client.batches.batches.values())
+    assert len(batches) == 2
+    first_round = {request['custom_id'] for request in batches[0]['requests']}
+    assert "short" in first_round and "long" not in first_round
+    assert len(first_round) > 2  # 긴 스크립트는 청크별 map 요청으로 나뉨
+    assert [request['custom_id'] for request in batches[1]['requests']] == ["long"]
+    for request in batches[0]['requests'] + batches[1]['requests']:
+        assert cs.estimate_tokens(request['body']['messages'][-1]['content']) <= cs.MAP_REDUCE_THRESHOLD_TOKENS
+
+    # 배치 응답의 usage도 영상별 토큰/비용으로 집계됨
+    totals = run_metrics.totals()
+    assert totals['prompt_tokens'] > 0 and totals['cost_usd'] > 0
+    assert set(run_metrics.to_dict()['videos']) == {"short", "long"}
+
+def test_failed_map_chunk_skips_reduce(tmp_path):
+    client = FakeOpenAI(responder, fail_ids={"long#map0"})
+    videos = [video("long", cs.MAP_REDUCE_THRESHOLD_TOKENS // 2)]
+    videos[0]['segments'] = cs.segments_from_text(videos[0]['script'])
+    cs.summarize_videos_batch(videos, str(tmp_path), batch_client=client, poll_interval=0)
+    assert videos[0]['summary'] is None
+    assert len(client.batches.batches) == 1
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import channel_summarizer as cs
+from video_cache import VideoCache
+
+CHANNEL_URL = "https://www.youtube.com/@testchannel"
+
+class FakeChannel:
+    """scrapetube.get_channel 대체. videos는 최신순 videoId 목록"""
+
+    def __init__(self):
+        self.videos = []
+
+    def get_channel(self, channel_url=None, limit=None, **kwargs):
+        for video_id in self.videos[:limit]:
+            yield {'videoId': video_id, 'title': {'runs': [{'text': f"영상 {video_id}"}]}}
+
+def fake_fetch(video, session=None, per_host_limit=None, cache=None):
+    video.update(details={'date': '2024-08-10T05:00:12-07:00', 'views': '100'}, script=f"{video['videoId']} 스크립트",
+                 script_true=True, length=10, fetch_errors=[])
+    return video
+
+def fake_summarize(video, scheduler=None, cache=None, dedupe=None):
+    video['summary'] = f"{video['videoId']} 요약"
+    return video
+
+@pytest.fixture
+def channel(monkeypatch, tmp_path):
+    fake = FakeChannel()
+    monkeypatch.setattr(cs, "scrapetube", fake)
+    monkeypatch.setattr(cs, "fetch_video_safely", fake_fetch)
+    monkeypatch.setattr(cs, "summarize_video", fake_summarize)
+    return fake
+
+def run(tmp_path, incremental=False):
+    count, jsonl_file, markdown_file = cs.scrape_and_summarize_youtube_videos(
+        CHANNEL_URL, 10, max_workers=2, cache_dir=str(tmp_path / "cache"), incremental=incremental,
+        dedupe_threshold=None, store_path=None, output_dir=str(tmp_path))
+    assert jsonl_file is not None
+    with open(jsonl_file, encoding='utf-8') as f:
+        ids = [json.loads(line)['videoId'] for line in f]
+    with open(markdown_file, encoding='utf-8') as f:
+        markdown = f.read()
+    assert ids == sorted(ids, key=markdown.index)  # Markdown도 같은 순서
+    state = VideoCache(str(tmp_path / "cache")).load_channel_state("@testchannel")
+    return ids, state['last_video_id']
+
+def test_same_day_resume_keeps_listing_order_and_moves_high_water_mark(channel, tmp_path):
+    channel.videos = ["v2", "v1"]
+    assert run(tmp_path) == (["v2", "v1"], "v2")
+    # 같은 날 새 영상이 올라온 뒤 다시 실행: 새 영상이 기존 레코드 앞에 오고 최신 영상이 v3으로 갱신
+    channel.videos = ["v3", "v2", "v1"]
+    assert run(tmp_path) == (["v3", "v2", "v1"], "v3")
+
+def test_incremental_run_tracks_newest_listed_video(channel, tmp_path):
+    channel.videos = ["v2", "v1"]
+    run(tmp_path)
+    channel.videos = ["v4", "v3", "v2", "v1"]
+    assert run(tmp_path, incremental=True) == (["v4", "v3", "v2", "v1"], "v4")
+    # 새 영상이 없으면 이전 값을 유지
+    assert run(tmp_path, incremental=True) == (["v4", "v3", "v2", "v1"], "v4")
+
+def test_reorder_jsonl_keeps_unlisted_records_and_drops_corrupt_lines(tmp_path):
+    path = tmp_path / "run.jsonl"
+    path.write_text('{"videoId": "a"}\n{"videoId": "b"}\nnot json\n{"videoId": "c"}', encoding='utf-8')
+    cs.reorder_jsonl(str(path), ["c", "a", "missing"])
+    assert [json.loads(line)['videoId'] for line in path.read_text(encoding='utf-8').splitlines()] == ["c", "a", "b"]
+
+def test_streaming_run_renders_markdown_from_store(channel, tmp_path):
+    channel.videos = ["v2", "v1"]
+    _, _, markdown_file = cs.scrape_and_summarize_youtube_videos(
+        CHANNEL_URL, 10, max_workers=2, cache_dir=None, dedupe_threshold=None,
+        store_path=str(tmp_path / "store.db"), output_dir=str(tmp_path))
+    with cs.ResultsStore(str(tmp_path / "store.db")) as store:
+        expected = store.render_markdown(video_ids=["v2", "v1"])
+    with open(markdown_file, encoding='utf-8') as f:
+        assert f.read() == expected
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+import itb_revisions
+from itb_revisions import ItbAnalysisIndex, analyze_revision, article_key, chunk_hash, prompt_mode
+
+DOCUMENT = """ITB 머리말
+제1조 (목적)
+본 입찰은 EPC 공사를 위한 것입니다.
+제2조 (공사 기한)
+수급자는 2025년 6월 30일까지 공사를 완료하여야 합니다.
+제3조에 따라 지연 시 벌금을 부과합니다.
+제3조 (보증)
+수급자는 계약 금액의 10%를 보증금으로 납부합니다.
+"""
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """iter_itb_document 대신 청크마다 원문 첫 줄을 clause로 하는 결과를 돌려주고 분석한 청크를 기록"""
+    calls = []
+
+    def fake_iter(chunks, max_workers, lean, pack):
+        for chunk_id, text in chunks:
+            calls.append((chunk_id, prompt_mode(lean, pack)))
+            yield {"chunk_id": chunk_id, "status": "ok", "error": None, "started_at": 0.0, "seconds": 0.0,
+                   "result": {"chunk_id": chunk_id, "original_text": text,
+                              "detected_risks": [{"id": "risk-001", "risk_level": "high", "risk_category": "일반",
+                                                  "clause": text.splitlines()[0], "risk": "위험"}]}}
+
+    monkeypatch.setattr(itb_revisions, "iter_itb_document", fake_iter)
+    return calls
+
+def test_chunk_hash_ignores_whitespace_only():
+    assert chunk_hash("제1조 (목적)\n본 입찰은") == chunk_hash("  제1조  (목적) 본 입찰은 ")
+    assert chunk_hash("제1조 (목적)") != chunk_hash("제1조 (목표)")
+
+def test_chunk_hash_depends_on_mode_and_prompt_version(monkeypatch):
+    text = "제1조 (목적)"
+    hashes = {chunk_hash(text, mode) for mode in ("legacy", "lean", "pack")}
+    assert len(hashes) == 3
+    before = chunk_hash(text)
+    monkeypatch.setattr(itb_revisions, "ITB_PROMPT_VERSION", itb_revisions.ITB_PROMPT_VERSION + 1)
+    assert chunk_hash(text) != before
+    monkeypatch.setattr(itb_revisions, "ITB_MODEL", "other-model")
+    assert chunk_hash(text) != before
+
+def test_cross_reference_line_is_not_an_article():
+    assert article_key("chunk-009", "제3조에 따라 지연 시 벌금을 부과합니다.") == "chunk-009"
+    assert article_key("chunk-001", "제 3 조의 2 (보증)") == "제3조의2"
+
+def test_unchanged_revision_reuses_results(analyzed, tmp_path):
+    index = ItbAnalysisIndex(str(tmp_path / "index.json"))
+    _, first = analyze_revision("doc", DOCUMENT, index)
+    assert first["added"] == ["chunk-000", "제1조", "제2조", "제3조"]
+    assert first["api_chunks"] == 4
+    index.save()
+
+    analyzed.clear()
+    records, second = analyze_revision("doc", DOCUMENT, ItbAnalysisIndex(str(tmp_path / "index.json")))
+    assert analyzed == []
+    assert second["unchanged"] == 4 and second["reused_chunks"] == 4
+    assert all(record["status"] == "reused" for record in records)
+
+def test_changed_article_is_reanalyzed(analyzed, tmp_path):
+    index = ItbAnalysisIndex(str(tmp_path / "index.json"))
+    analyze_revision("doc", DOCUMENT, index)
+    analyzed.clear()
+    revised = DOCUMENT.replace("2025년 6월 30일", "2025년 12월 31일")
+    _, report = analyze_revision("doc", revised, index)
+    assert [chunk_id for chunk_id, _ in analyzed] == ["chunk-002"]
+    assert report["changed"] == ["제2조"] and report["unchanged"] == 3
+
+def test_prompt_mode_change_invalidates_without_reporting_changes(analyzed, tmp_path):
+    index = ItbAnalysisIndex(str(tmp_path / "index.json"))
+    analyze_revision("doc", DOCUMENT, index, lean=True)
+    analyzed.clear()
+    _, report = analyze_revision("doc", DOCUMENT, index, lean=False)
+    assert {mode for _, mode in analyzed} == {"legacy"} and len(analyzed) == 4
+    assert report["changed"] == [] and report["unchanged"] == 4
+    assert report["risks_appeared"] == [] and report["risks_disappeared"] == []
@@ -0,0 +1,92 @@
+import json
+
+from itb_risk_index import RiskIndex, build_risk_index, build_document_index, normalize_entity, _trigrams
+
+def risk(id, level, category, clause, text, entities=()):
+    return {"id": id, "risk_level": level, "risk_category": category, "clause": clause, "risk": text,
+            "related_entities": [{"type": type, "value": value} for type, value in entities]}
+
+def chunk(chunk_id, risks, importance=5.0, tags=("계약 조건",)):
+    return {"chunk_id": chunk_id, "detected_risks": list(risks),
+            "analysis_rating": {"importance_score": importance, "target_audience": ["법무팀"], "tags": list(tags)}}
+
+PENALTY = ("기한 내에 공사가 완료되지 않을 경우 계약 금액의 10%에 해당하는 벌금", "지연 시 계약 금액의 10% 벌금 부과")
+
+def test_near_identical_risks_in_same_category_are_merged():
+    index = build_risk_index([
+        chunk("chunk-001", [risk("risk-001", "medium", "지연 벌금", *PENALTY)], importance=6.0),
+        chunk("chunk-002", [risk("risk-001", "high", "지연 벌금", PENALTY[0] + ".", PENALTY[1])], importance=8.0),
+        chunk("chunk-003", [risk("risk-001", "high", "보증 불이행", *PENALTY)]),
+    ])
+    assert index.duplicate_of == {"chunk-002/risk-001": "chunk-001/risk-001"}
+    kept = index.risks["chunk-001/risk-001"]
+    assert kept["occurrences"] == ["chunk-001", "chunk-002"]
+    assert kept["importance_score"] == 8.0
+    assert index.counts()["unique_risks"] == 2
+
+def test_merge_keeps_highest_risk_level():
+    index = build_risk_index([
+        chunk("chunk-001", [risk("risk-001", "medium", "지연 벌금", *PENALTY)]),
+        chunk("chunk-002", [risk("risk-001", "very high", "지연 벌금", *PENALTY)]),
+        chunk("chunk-003", [risk("risk-001", "low", "지연 벌금", *PENALTY)]),
+    ])
+    assert index.risks["chunk-001/risk-001"]["risk_level"] == "very high"
+    assert [r["uid"] for r in index.query(level="very high")] == ["chunk-001/risk-001"]
+    assert index.query(level="medium") == []
+    assert "medium" not in index.counts()["by_level"]
+
+def test_blank_risks_are_not_merged():
+    assert _trigrams("") == set()
+    assert _trigrams(" \n") == set()
+    index = build_risk_index([
+        chunk("chunk-001", [risk("risk-001", "low", "기타", "", "")]),
+        chunk("chunk-002", [risk("risk-001", "low", "기타", None, None)]),
+    ])
+    assert index.duplicate_of == {}
+    assert index.counts()["unique_risks"] == 2
+
+def test_duplicate_entities_and_tags_find_representative():
+    index = build_risk_index([
+        chunk("chunk-001", [risk("risk-001", "high", "지연 벌금", *PENALTY)], tags=("일정 관리",)),
+        chunk("chunk-002", [risk("risk-001", "high", "지연 벌금", *PENALTY, entities=[("date", "2025년 6월 30일")])],
+              tags=("벌금",)),
+    ])
+    assert normalize_entity("2025년 6월 30일") == "2025-06-30"
+    assert [r["uid"] for r in index.query(entity="2025-06-30")] == ["chunk-001/risk-001"]
+    assert [r["uid"] for r in index.query(tag="벌금")] == ["chunk-001/risk-001"]
+    duplicates = index.query(include_duplicates=True)[0]["duplicates"]
+    assert [r["uid"] for r in duplicates] == ["chunk-002/risk-001"]
+
+def test_failed_records_and_json_strings():
+    index = build_risk_index([
+        json.dumps(chunk("chunk-001", [risk("risk-001", "high", "지연 벌금", *PENALTY)]), ensure_ascii=False),
+        {"chunk_id": "chunk-002", "status": "failed", "result": None},
+        {"chunk_id": "chunk-003", "status": "reused", "result": chunk("chunk-003", [])},
+    ])
+    assert sorted(index.chunks) == ["chunk-001", "chunk-003"]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build_risk_index([
+        chunk("chunk-001", [risk("risk-001", "medium", "지연 벌금", *PENALTY)]),
+        chunk("chunk-002", [risk("risk-001", "high", "지연 벌금", *PENALTY, entities=[("amount", "1,000 원")])]),
+    ])
+    path = tmp_path / "risks.json"
+    index.save(str(path))
+    loaded = RiskIndex.load(str(path))
+    assert loaded.counts() == index.counts()
+    assert [r["uid"] for r in loaded.query(entity="1000원")] == ["chunk-001/risk-001"]
+    # 로드한 색인에 추가되는 같은 위험도 기존 대표 항목으로 묶임
+    loaded.add_chunk(chunk("chunk-003", [risk("risk-001", "low", "지연 벌금", *PENALTY)]))
+    assert loaded.duplicate_of["chunk-003/risk-001"] == "chunk-001/risk-001"
+
+def test_documents_sharing_chunk_ids_do_not_collide(tmp_path):
+    paths = []
+    for name, category in (("itb_a", "지연 벌금"), ("itb_b", "보증 불이행")):
+        path = tmp_path / f"{name}.jsonl"
+        path.write_text(json.dumps(chunk("chunk-001", [risk("risk-001", "high", category, *PENALTY)]),
+                                   ensure_ascii=False) + "\n", encoding='utf-8')
+        paths.append(str(path))
+    index = build_document_index(paths)
+    assert sorted(index.chunks) == ["itb_a:chunk-001", "itb_b:chunk-001"]
+    assert sorted(index.risks) == ["itb_a:chunk-001/risk-001", "itb_b:chunk-001/risk-001"]
+    assert [r["source"] for r in index.query(category="보증 불이행")] == ["itb_b"]
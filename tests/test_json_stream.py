@@ -0,0 +1,67 @@
+import json
+import random
+
+import pytest
+
+from json_stream import JsonArrayItemStream
+
+KEYS = ("detected_risks", "itb_qa")
+
+RESULT = {
+    "detected_risks": [
+        {"id": "risk-001", "risk_level": "high", "clause": "계약 금액의 10% {벌금}",
+         "risk": "따옴표 \"지연\" 벌금과 역슬래시 \\ 경로", "related_entities": [{"type": "date", "value": "2025-06-30"}]},
+        {"id": "risk-002", "risk_level": "low", "clause": "[대괄호] 조항", "risk": "줄바꿈\n포함",
+         "related_entities": []},
+    ],
+    "itb_qa": [{"question": "완료 기한은?", "answer": "2025년 6월 30일"}],
+    "analysis_rating": {"importance_score": 8.5, "target_audience": ["법무팀"], "tags": ["일정 관리"]},
+}
+
+def split_randomly(text, rng, max_size):
+    pieces = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, max_size)
+        pieces.append(text[position:position + size])
+        position += size
+    return pieces
+
+def expected_items(result):
+    return [(key, item) for key in KEYS for item in result[key]]
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunk_splits_emit_every_item_in_order(seed):
+    rng = random.Random(seed)
+    text = json.dumps(RESULT, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2]))
+    parser = JsonArrayItemStream(KEYS)
+    items = []
+    for piece in split_randomly(text, rng, rng.choice([1, 3, 16, 64])):
+        items += parser.feed(piece)
+    assert items == expected_items(RESULT)
+    assert parser.emitted == len(items)
+    assert parser.result() == RESULT
+
+def test_items_are_emitted_as_soon_as_they_close():
+    text = json.dumps(RESULT, ensure_ascii=False)
+    first_end = text.index('"risk-002"')
+    parser = JsonArrayItemStream(KEYS)
+    items = parser.feed(text[:first_end])
+    assert [item["id"] for _, item in items] == ["risk-001"]
+
+def test_ignores_prefix_before_object_and_other_keys():
+    parser = JsonArrayItemStream(("itb_qa",))
+    items = parser.feed("```json\n" + json.dumps(RESULT, ensure_ascii=False) + "\n```")
+    assert items == [("itb_qa", RESULT["itb_qa"][0])]
+
+def test_escaped_key_is_decoded():
+    parser = JsonArrayItemStream(('a"b',))
+    assert parser.feed('{"a\\"b": [{"x": 1}]}') == [('a"b', {"x": 1})]
+
+def test_truncated_response_keeps_completed_items():
+    text = json.dumps(RESULT, ensure_ascii=False)
+    parser = JsonArrayItemStream(KEYS)
+    items = parser.feed(text[:text.index('"itb_qa"')])
+    assert len(items) == 2
+    with pytest.raises(json.JSONDecodeError):
+        parser.result()
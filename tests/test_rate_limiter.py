@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucket, parse_reset_duration
+
+@pytest.fixture
+def clock(monkeypatch):
+    """rate_limiter가 보는 time.monotonic을 수동으로 진행하는 시계"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=lambda: now.value, sleep=lambda seconds: None))
+    return now
+
+def test_reservation_larger_than_capacity_is_capped(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    # 용량보다 큰 요청은 용량만큼만 차감되어 영원히 기다리지 않음
+    assert bucket.reserve(100) == 0.0
+    assert bucket.tokens == 0
+    assert bucket.reserve(5) == pytest.approx(1.0)
+
+def test_refill_rate(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    bucket.reserve(10)
+    clock.value += 1.0
+    assert bucket.reserve(5) == 0.0
+    assert bucket.reserve(5) == pytest.approx(1.0)
+    clock.value += 1.0
+    assert bucket.reserve(0) == 0.0
+    assert bucket.tokens == pytest.approx(0.0)
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=5)
+    bucket.reserve(10)
+    clock.value += 100.0
+    bucket.credit(0)
+    assert bucket.tokens == 10
+
+def test_waits_queue_in_request_order(clock):
+    bucket = TokenBucket(capacity=2, refill_per_second=1)
+    waits = [bucket.reserve(1) for _ in range(5)]
+    assert waits == pytest.approx([0.0, 0.0, 1.0, 2.0, 3.0])
+
+@pytest.mark.parametrize("value, seconds", [("6m0s", 360.0), ("1.5s", 1.5), ("20ms", 0.02), ("2", 2.0),
+                                            ("", None), ("soon", None)])
+def test_parse_reset_duration(value, seconds):
+    assert parse_reset_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
@@ -0,0 +1,61 @@
+import sqlite3
+
+from results_store import ResultsStore
+
+SUMMARY = """**1. 개요**
+재건축 상담
+
+**3. 주요 키워드**
+- 재건축, 분담금
+
+**5. 언급된 주요 지역**
+- 강남, 수원
+"""
+
+def video(video_id, **fields):
+    record = {'videoId': video_id, 'title': {'runs': [{'text': f"영상 {video_id}"}]},
+              'details': {'date': '2024-08-10', 'views': '1,000회'}, 'script': "스크립트 본문", 'summary': SUMMARY}
+    record.update(fields)
+    return record
+
+def search_ids(store, query):
+    return [row['video_id'] for row in store.search(query)]
+
+def test_search_index_follows_updates(tmp_path):
+    with ResultsStore(str(tmp_path / "store.db")) as store:
+        store.add_video(video("a"))
+        assert search_ids(store, "수원") == ["a"]
+        # 요약이 바뀌면 이전 지역은 검색되지 않고, 요약 없이 갱신하면 저장된 항목을 유지
+        store.add_video(video("a", summary=SUMMARY.replace("수원", "분당")))
+        assert search_ids(store, "수원") == []
+        store.add_video(video("a", summary=None, script="새 스크립트 부동산"))
+        assert search_ids(store, "분당") == ["a"]
+        assert search_ids(store, "부동산") == ["a"]
+        assert store.top_terms('region') == [("강남", 1), ("분당", 1)]
+
+def test_index_does_not_copy_transcripts(tmp_path):
+    with ResultsStore(str(tmp_path / "store.db")) as store:
+        store.add_video(video("a"))
+        sql = store.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'videos_fts'").fetchone()[0]
+        assert "content='videos'" in sql
+        store.conn.execute("DELETE FROM videos WHERE video_id = 'a'")
+        assert search_ids(store, "강남") == []
+
+def test_upgrades_store_with_standalone_index(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE videos (video_id TEXT PRIMARY KEY, channel TEXT, title TEXT, upload_date TEXT, views INTEGER,
+                             url TEXT, duplicate_of TEXT, details TEXT, record TEXT, updated_at TEXT,
+                             summary TEXT, transcript TEXT);
+        CREATE TABLE terms (video_id TEXT NOT NULL, kind TEXT NOT NULL, term TEXT NOT NULL,
+                            PRIMARY KEY (video_id, kind, term));
+        CREATE VIRTUAL TABLE videos_fts USING fts5(title, summary, keywords, regions, transcript);
+        INSERT INTO videos (video_id, title, summary, transcript) VALUES ('old', '이전 영상', '요약', '스크립트');
+        INSERT INTO terms VALUES ('old', 'region', '수원');
+    """)
+    conn.close()
+    with ResultsStore(path) as store:
+        assert search_ids(store, "수원") == ["old"]
+        store.add_video(video("new"))
+        assert sorted(search_ids(store, "수원")) == ["new", "old"]
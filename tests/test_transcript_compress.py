@@ -0,0 +1,52 @@
+from transcript_compress import compress_segments, strip_overlap
+
+def words(text):
+    return text.split()
+
+def test_strip_overlap_removes_repeated_prefix():
+    assert strip_overlap(words("강남 재건축 아파트 매수 시점"), words("매수 시점 대출 금리")) == words("대출 금리")
+
+def test_strip_overlap_prefers_longest_overlap():
+    previous = words("네 그렇죠 네 그렇죠")
+    assert strip_overlap(previous, words("네 그렇죠 네 그렇죠 다음")) == words("다음")
+
+def test_strip_overlap_keeps_single_word_overlap():
+    # 한 단어 겹침은 우연일 수 있으므로 유지
+    assert strip_overlap(words("금리가 오르면"), words("오르면 안 됩니다")) == words("오르면 안 됩니다")
+
+def test_strip_overlap_drops_fully_repeated_segment():
+    assert strip_overlap(words("대출 금리 이야기"), words("금리 이야기")) == []
+    # 한 단어짜리 구간도 우연히 같을 수 있으므로 유지
+    assert strip_overlap(words("대출 금리 이야기"), words("이야기")) == words("이야기")
+    assert strip_overlap([], words("처음 구간")) == words("처음 구간")
+
+def test_compress_segments_strips_overlaps_between_segments():
+    segments = [
+        {"text": "오늘은 강남 재건축 이야기를", "start": 0.0, "duration": 3.0},
+        {"text": "재건축 이야기를 해보겠습니다", "start": 3.0, "duration": 3.0},
+        {"text": "이야기를 해보겠습니다", "start": 6.0, "duration": 1.0},
+    ]
+    compressed, stats = compress_segments(segments)
+    assert compressed == [
+        {"text": "오늘은 강남 재건축 이야기를", "start": 0.0, "duration": 3.0},
+        {"text": "해보겠습니다", "start": 3.0, "duration": 3.0},
+    ]
+    assert stats["segments_before"] == 3 and stats["segments_after"] == 2
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+def test_overlap_is_checked_after_filler_removal():
+    segments = [{"text": "매수 시점은", "start": 0.0, "duration": 2.0},
+                {"text": "음 매수 시점은 내년입니다", "start": 2.0, "duration": 2.0}]
+    compressed, _ = compress_segments(segments)
+    assert [segment["text"] for segment in compressed] == ["매수 시점은", "내년입니다"]
+
+def test_overlaps_option_disables_stripping():
+    segments = [{"text": "재건축 이야기를", "start": 0.0, "duration": 2.0},
+                {"text": "재건축 이야기를 합니다", "start": 2.0, "duration": 2.0}]
+    compressed, _ = compress_segments(segments, {"overlaps": False})
+    assert [segment["text"] for segment in compressed] == ["재건축 이야기를", "재건축 이야기를 합니다"]
+
+def test_only_unambiguous_fillers_are_removed():
+    segments = [{"text": "음 서울에 어 그러니까 uh 집을", "start": 0.0, "duration": 2.0}]
+    compressed, _ = compress_segments(segments)
+    assert [segment["text"] for segment in compressed] == ["서울에 어 그러니까 집을"]
@@ -0,0 +1,60 @@
+import pytest
+
+import channel_summarizer as cs
+from video_meta import DEFAULT_DETAILS
+
+# 첫 청크(100바이트) 안에 들어가는 메타 태그
+META = b'<meta itemprop="uploadDate" content="2024-08-10"><meta itemprop="interactionCount" content="123">'
+
+class FakeResponse:
+    """iter_content로 보낸 청크 수를 세는 스트리밍 응답"""
+
+    def __init__(self, body):
+        self.body = body
+        self.sent = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            self.sent += 1
+            yield self.body[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+class FakeSession:
+    def __init__(self, body):
+        self.response = FakeResponse(body)
+
+    def get(self, url, **kwargs):
+        return self.response
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(cs, "DETAILS_CHUNK_SIZE", 100)
+    monkeypatch.setattr(cs, "DETAILS_DRAIN_BYTES", 300)
+    monkeypatch.setattr(cs, "DETAILS_MAX_BYTES", 1000)
+
+def fetch(body):
+    session = FakeSession(body)
+    details = cs.fetch_video_details("https://www.youtube.com/watch?v=abc", session)
+    return details, session.response.sent
+
+def test_short_tail_is_drained_for_connection_reuse():
+    details, sent = fetch(META + b"x" * 203)
+    assert details == {'date': '2024-08-10', 'views': '123'}
+    assert sent == 3  # 남은 본문까지 모두 읽음
+
+def test_long_tail_is_not_drained():
+    _, sent = fetch(META + b"x" * 10000)
+    assert sent == 1 + 3  # 메타 청크 + 최대 DETAILS_DRAIN_BYTES
+
+def test_max_bytes_is_checked_before_reading_more():
+    details, sent = fetch(b"x" * 10000 + META)
+    assert details == DEFAULT_DETAILS
+    assert sent == 10 + 3  # DETAILS_MAX_BYTES + 최대 DETAILS_DRAIN_BYTES
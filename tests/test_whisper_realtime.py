@@ -0,0 +1,176 @@
+import io
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+
+import whisper_realtime
+from whisper_realtime import (AudioRingBuffer, FakeSTT, SegmentEncoder, TranscriptionPipeline,
+                              VoiceActivitySegmenter, blocksize, replay_audio, samplerate, strip_overlap)
+
+def tone(seconds, frequency=220.0, amplitude=0.2):
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def quiet(seconds, seed=0):
+    return np.random.default_rng(seed).normal(0, 0.001, int(seconds * samplerate)).astype(np.float32)
+
+def utterances(*parts):
+    """(말하기 초, 쉬는 초) 쌍들로 만든 (프레임, 1) 오디오. 앞에 1초 무음"""
+    pieces = [quiet(1.0)]
+    for i, (speech, pause) in enumerate(parts):
+        pieces += [tone(speech, 180 + 40 * i), quiet(pause, seed=i + 1)]
+    return np.concatenate(pieces)[:, None]
+
+def feed_blocks(segmenter, audio, size=blocksize):
+    segments = []
+    for offset in range(0, len(audio), size):
+        segments += segmenter.feed(audio[offset:offset + size])
+    return segments + segmenter.flush()
+
+def write_wav(path, audio, rate=samplerate):
+    pcm = (np.clip(audio[:, 0], -1, 1) * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+
+# 링 버퍼
+
+def test_ring_buffer_wraps_around_in_order():
+    ring = AudioRingBuffer(8, 1)
+    out = np.zeros((8, 1), dtype=np.float32)
+    assert ring.write(np.arange(5, dtype=np.float32)[:, None])
+    assert ring.read_into(out[:3]) == 3
+    assert ring.write(np.arange(5, 11, dtype=np.float32)[:, None])
+    assert ring.read_into(out) == 8
+    assert out[:, 0].tolist() == [3, 4, 5, 6, 7, 8, 9, 10]
+    assert ring.read_into(out) == 0
+
+def test_ring_buffer_drops_whole_block_when_full():
+    ring = AudioRingBuffer(8, 1)
+    assert ring.write(np.ones((6, 1), dtype=np.float32))
+    assert not ring.write(np.full((3, 1), 2, dtype=np.float32))
+    assert (ring.dropped_blocks, ring.dropped_frames) == (1, 3)
+    out = np.zeros((8, 1), dtype=np.float32)
+    assert ring.read_into(out) == 6 and out[:6, 0].tolist() == [1] * 6
+
+# 음성 구간(VAD) 분할
+
+def test_vad_cuts_at_pauses_and_skips_silence():
+    audio = utterances((2.0, 1.5), (3.0, 1.0))
+    segments = feed_blocks(VoiceActivitySegmenter(), audio)
+    assert len(segments) == 2
+    for segment, speech in zip(segments, (2.0, 3.0)):
+        seconds = len(segment) / samplerate
+        # 음성 길이 + 앞뒤 여백(vad_padding) 정도로 잘리고 쉬는 구간 전체를 싣지 않음
+        assert speech <= seconds <= speech + 2 * whisper_realtime.vad_padding + 0.1
+    assert sum(len(segment) for segment in segments) < 0.75 * len(audio)
+
+def test_vad_ignores_background_noise_and_clicks():
+    audio = np.concatenate([quiet(3.0), tone(0.1, amplitude=0.5), quiet(3.0, seed=1)])[:, None]
+    segmenter = VoiceActivitySegmenter()
+    assert feed_blocks(segmenter, audio) == []
+    assert segmenter.dropped == 1
+
+def test_vad_result_does_not_depend_on_block_size():
+    audio = utterances((1.5, 1.0), (1.5, 1.0))
+    expected = feed_blocks(VoiceActivitySegmenter(), audio)
+    for size in (100, 1323, 4096):
+        segments = feed_blocks(VoiceActivitySegmenter(), audio, size)
+        assert [len(segment) for segment in segments] == [len(segment) for segment in expected]
+
+def test_vad_splits_long_speech_at_max_duration():
+    audio = utterances((whisper_realtime.max_segment_duration * 2, 1.0))
+    segments = feed_blocks(VoiceActivitySegmenter(), audio)
+    assert len(segments) >= 2
+    assert max(len(segment) for segment in segments) <= whisper_realtime.max_segment_duration * samplerate
+
+# 리샘플링/인코딩
+
+def rms(values):
+    return float(np.sqrt(np.mean(np.square(values, dtype=np.float64))))
+
+def test_resampler_keeps_passband_and_rejects_alias():
+    encoder = SegmentEncoder(target_rate=16000, fmt="wav")
+    speech = tone(1.0, 1000.0, 0.5)[:, None]
+    output = encoder.resample(speech).copy()
+    assert len(output) == -(-len(speech) * 160 // 441)
+    assert rms(output[100:-100]) == pytest.approx(rms(speech), rel=0.02)
+    # 12kHz는 16kHz 출력의 나이퀴스트(8kHz)를 넘으므로 걸러져야 함
+    alias = encoder.resample(tone(1.0, 12000.0, 0.5)[:, None])
+    assert rms(alias[100:-100]) < 0.01 * rms(speech)
+
+def test_encoder_reuses_buffers_and_writes_valid_wav():
+    encoder = SegmentEncoder(max_seconds=1, target_rate=16000, fmt="wav")
+    for seconds in (2.0, 0.5):
+        audio_file = encoder.encode(tone(seconds)[:, None])
+        assert audio_file.name == "segment.wav"
+        with wave.open(io.BytesIO(audio_file.getvalue()), 'rb') as wf:
+            assert (wf.getframerate(), wf.getnchannels(), wf.getsampwidth()) == (16000, 1, 2)
+            assert wf.getnframes() == -(-int(seconds * samplerate) * 160 // 441)
+
+def test_process_audio_chunk_transcribes_one_chunk(monkeypatch, capsys):
+    received = []
+    monkeypatch.setattr(whisper_realtime, "openai_stt", lambda audio_file: received.append(audio_file) or "안녕하세요")
+    monkeypatch.setattr(whisper_realtime, "all_transcripts", [])
+    whisper_realtime.process_audio_chunk(tone(0.5)[:, None])
+    assert whisper_realtime.all_transcripts == ["안녕하세요"]
+    assert received[0].getvalue()
+    assert "🎤: 안녕하세요" in capsys.readouterr().out
+
+# 파이프라인/재생
+
+def test_pipeline_delivers_in_order_outside_lock():
+    delivered = []
+    lock_free = []
+
+    def on_transcript(text):
+        # 콜백 중에도 다른 워커가 pipeline.lock을 잡을 수 있어야 함
+        acquired = pipeline.lock.acquire(blocking=False)
+        if acquired:
+            pipeline.lock.release()
+        lock_free.append(acquired)
+        delivered.append(text)
+
+    stt = FakeSTT(latency=0.0, seconds_per_audio_second=0.0)
+    pipeline = TranscriptionPipeline(stt=stt, mode="fixed", transcripts=[], echo=False, on_transcript=on_transcript)
+    pipeline.start()
+    audio = utterances((20.0, 1.0))
+    for offset in range(0, len(audio), blocksize):
+        while pipeline.ring.capacity - (pipeline.ring.written - pipeline.ring.read) < blocksize:
+            pass
+        pipeline.callback(audio[offset:offset + blocksize], blocksize, None, None)
+    pipeline.stop()
+    assert all(lock_free) and delivered == pipeline.transcripts
+    assert len(delivered) == pipeline.submitted
+
+def test_replay_matches_vad_segments(tmp_path):
+    audio = utterances((2.0, 1.5), (3.0, 1.0), (1.5, 1.0))
+    path = tmp_path / "speech.wav"
+    write_wav(path, audio)
+    delivered = []
+    report = replay_audio(str(path), realtime=False, stt=FakeSTT(latency=0.0, seconds_per_audio_second=0.0),
+                          on_transcript=delivered.append, echo=False)
+    assert report['segments'] == 3 and report['dropped_segments'] == 0
+    assert report['transcripts'] == delivered and len(delivered) == 3
+    assert report['duration_seconds'] == pytest.approx(len(audio) / samplerate, abs=0.01)
+    assert report['uploaded_seconds'] < report['audio_seconds']
+
+def test_replay_resamples_pcm_input(tmp_path):
+    audio = utterances((2.0, 1.0))
+    pcm = (audio[:, 0] * 32767).astype('<i2')
+    low_rate = pcm[::2]  # 22.05kHz raw PCM
+    path = tmp_path / "speech.pcm"
+    path.write_bytes(low_rate.tobytes())
+    loaded = whisper_realtime.read_audio_file(str(path), pcm_rate=samplerate // 2)
+    assert loaded.shape[1] == 1
+    assert len(loaded) == pytest.approx(len(audio), abs=2)
+
+def test_strip_overlap_removes_retranscribed_prefix():
+    assert strip_overlap("삼성전자는 7만원 부근에서 매수", "부근에서 매수 추천드립니다") == "추천드립니다"
+    assert strip_overlap("현대차는 20만원", "전혀 다른 문장") == "전혀 다른 문장"
@@ -0,0 +1,63 @@
+from rate_limiter import estimate_tokens
+
+def format_timestamp(seconds):
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+def segments_from_text(text, words_per_segment=40):
+    """타임스탬프 없는 스크립트 문자열을 청크 분할용 가짜 자막 구간으로 변환"""
+    words = text.split()
+    return [
+        {'text': " ".join(words[i:i + words_per_segment]), 'start': None, 'duration': None}
+        for i in range(0, len(words), words_per_segment)
+    ]
+
+def chunk_segments(segments, max_chunk_tokens):
+    """YouTubeTranscriptApi 자막 구간({'text', 'start', 'duration'})을 자막 경계에서
+    max_chunk_tokens 이하의 청크로 나눔. 하나의 구간이 상한보다 크면 그 구간만으로 청크를 만든다.
+
+    Returns:
+        list[dict]: {'index', 'start', 'end', 'text', 'tokens'} 목록
+    """
+    chunks = []
+    texts = []
+    tokens = 0
+    start = end = None
+
+    def flush():
+        if texts:
+            chunks.append({
+                'index': len(chunks),
+                'start': start,
+                'end': end,
+                'text': " ".join(texts),
+                'tokens': tokens,
+            })
+
+    for segment in segments:
+        text = segment.get('text', '').strip()
+        if not text:
+            continue
+        segment_tokens = estimate_tokens(text) + 1
+        if texts and tokens + segment_tokens > max_chunk_tokens:
+            flush()
+            texts, tokens, start = [], 0, None
+        if start is None:
+            start = segment.get('start')
+        if segment.get('start') is not None:
+            end = segment['start'] + (segment.get('duration') or 0)
+        texts.append(text)
+        tokens += segment_tokens
+    flush()
+    return chunks
+
+def chunk_label(chunk, total):
+    """맵 단계 프롬프트에 넣을 '구간 2/5 (10:00~20:00)' 형식의 라벨"""
+    label = f"구간 {chunk['index'] + 1}/{total}"
+    if chunk['start'] is not None and chunk['end'] is not None:
+        label += f" ({format_timestamp(chunk['start'])}~{format_timestamp(chunk['end'])})"
+    return label
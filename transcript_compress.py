@@ -0,0 +1,95 @@
+"""요약 전에 자막 구간을 정리해 프롬프트 토큰을 줄이는 로컬 전처리.
+
+자동 자막의 [음악]/[박수] 같은 표시, 앞 구간과 겹쳐 반복되는 문구, 추임새(음, 흠, um 등),
+연속 반복("네 네 네")을 제거한다. 구간의 start/duration은 유지하므로 청크 분할에 그대로 쓸 수 있다.
+
+    python transcript_compress.py transcript.json   # 자막 구간 JSON(list)의 압축 전후 토큰 수 출력
+"""
+import re
+import sys
+import json
+
+from rate_limiter import estimate_tokens
+
+DEFAULT_OPTIONS = {
+    'markers': True,     # [음악], [박수], ♪ 등 비발화 표시 제거
+    'overlaps': True,    # 앞 구간 끝과 겹치는 문구 제거
+    'fillers': True,     # 추임새 제거
+    'repetition': True,  # 연속 반복되는 단어/구 축약
+}
+# 추임새로만 쓰이는 단어. "어"/"에"(조사, 감탄), "그러니까"(접속)처럼 뜻이 있을 수 있는 단어는 제외
+FILLER_WORDS = {"음", "으음", "음음", "흠", "um", "uh"}
+MAX_OVERLAP_WORDS = 12  # 구간 경계에서 검사할 최대 겹침 길이
+MIN_OVERLAP_WORDS = 2   # 이보다 짧은 겹침은 우연일 수 있으므로 유지 (구간 전체가 겹쳐도 마찬가지)
+MAX_REPEAT_NGRAM = 4    # 연속 반복을 검사할 최대 구 길이
+
+MARKER_PATTERN = re.compile(r"\[[^\]]*\]|♪+|\((?:음악|박수|웃음|music|applause|laughter)\)", re.IGNORECASE)
+PUNCTUATION = ".,!?~…"
+
+def strip_overlap(previous_words, words):
+    """words 앞부분이 previous_words 끝부분과 MIN_OVERLAP_WORDS 단어 이상 같으면 그 부분을 제거"""
+    for n in range(min(len(previous_words), len(words), MAX_OVERLAP_WORDS), MIN_OVERLAP_WORDS - 1, -1):
+        if previous_words[-n:] == words[:n]:
+            return words[n:]
+    return words
+
+def collapse_repeats(words):
+    """'네 네 네' → '네', '그래서 그래서' → '그래서'처럼 연속 반복을 하나로"""
+    result = []
+    for word in words:
+        result.append(word)
+        for n in range(1, MAX_REPEAT_NGRAM + 1):
+            if len(result) >= 2 * n and result[-n:] == result[-2 * n:-n]:
+                del result[-n:]
+                break
+    return result
+
+def compress_segments(segments, options=None):
+    """자막 구간 목록을 정리하고 (새 구간 목록, 통계)를 반환.
+
+    Returns:
+        tuple: (segments, {'tokens_before', 'tokens_after', 'segments_before', 'segments_after', 'reduction'})
+    """
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    compressed = []
+    previous_words = []
+    tokens_before = 0
+    tokens_after = 0
+
+    for segment in segments:
+        text = segment.get('text', '')
+        tokens_before += estimate_tokens(text)
+        if options['markers']:
+            text = MARKER_PATTERN.sub(" ", text)
+        words = text.split()
+        if options['fillers']:
+            words = [word for word in words if word.strip(PUNCTUATION).lower() not in FILLER_WORDS]
+        if options['overlaps']:
+            # 겹침 비교는 추임새 제거 후 단어 기준으로 수행
+            stripped = strip_overlap(previous_words, words)
+            previous_words = (previous_words + words)[-MAX_OVERLAP_WORDS * 2:]
+            words = stripped
+        if options['repetition']:
+            words = collapse_repeats(words)
+        if not words:
+            continue
+        text = " ".join(words)
+        tokens_after += estimate_tokens(text)
+        compressed.append(dict(segment, text=text))
+
+    stats = {
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'segments_before': len(segments),
+        'segments_after': len(compressed),
+        'reduction': round(1 - tokens_after / tokens_before, 3) if tokens_before else 0.0,
+    }
+    return compressed, stats
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding='utf-8') as f:
+        data = json.load(f)
+    # VideoCache 항목({'value': [...]})도 그대로 받을 수 있음
+    segments = data['value'] if isinstance(data, dict) else data
+    _, stats = compress_segments(segments)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+# 캐시 기본 설정
+CACHE_DIR = ".cache/youtube_summarizer"
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # 전체 캐시 크기 상한 (초과 시 오래 안 쓴 항목부터 삭제)
+CACHE_EVICT_EVERY = 50  # 이 횟수만큼 쓸 때마다 크기/만료 정리
+CACHE_TTL_SECONDS = {
+    'details': 24 * 3600,        # 조회수가 바뀌므로 하루
+    'transcripts': 90 * 24 * 3600,
+    'summaries': 90 * 24 * 3600,
+}
+
+def prompt_hash(*parts):
+    """요약 캐시 키에 사용할 프롬프트/모델 해시"""
+    digest = hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+    return digest[:12]
+
+class VideoCache:
+    """videoId 기반 디스크 캐시. namespace별 하위 디렉터리에 항목당 JSON 파일 하나를 저장한다."""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl_seconds=None, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = dict(CACHE_TTL_SECONDS, **(ttl_seconds or {}))
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.writes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()
+
+    def _path(self, namespace, key):
+        safe_key = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in key)
+        return os.path.join(self.cache_dir, namespace, f"{safe_key}.json")
+
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        ttl = self.ttl_seconds.get(namespace)
+        if ttl is not None and time.time() - entry.get('created_at', 0) > ttl:
+            self._remove(path)
+            return None
+
+        # 마지막 사용 시각을 갱신해 크기 기반 삭제 시 LRU 순서로 동작
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('value')
+
+    def set(self, namespace, key, value):
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'value': value}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.writes += 1
+            should_evict = self.writes % CACHE_EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json') or root == self.cache_dir:
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        """만료 항목 삭제 후, 전체 크기가 상한을 넘으면 오래 사용하지 않은 항목부터 삭제"""
+        with self.lock:
+            entries = list(self._entries())
+            now = time.time()
+            alive = []
+            for path, size, mtime in entries:
+                namespace = os.path.basename(os.path.dirname(path))
+                ttl = self.ttl_seconds.get(namespace)
+                # 파일 mtime은 마지막 사용 시각이므로 TTL 검사는 get()에서 created_at으로 하고,
+                # 여기서는 TTL 이상 사용되지 않은 항목만 정리
+                if ttl is not None and now - mtime > ttl:
+                    self._remove(path)
+                else:
+                    alive.append((path, size, mtime))
+
+            total = sum(size for _, size, _ in alive)
+            if total <= self.max_bytes:
+                return
+            for path, size, _ in sorted(alive, key=lambda entry: entry[2]):
+                self._remove(path)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            logging.info(f"Cache evicted down to {total} bytes")
+
+    def stats(self):
+        """네임스페이스별 {'entries', 'bytes'}"""
+        stats = {}
+        for path, size, _ in self._entries():
+            namespace = stats.setdefault(os.path.basename(os.path.dirname(path)), {'entries': 0, 'bytes': 0})
+            namespace['entries'] += 1
+            namespace['bytes'] += size
+        return stats
+
+    # 채널별 증분 실행 상태 (high-water mark 및 출력 파일 경로)
+    def _state_path(self, channel_name):
+        return os.path.join(self.cache_dir, f"channel_{channel_name}.json")
+
+    def load_channel_state(self, channel_name):
+        try:
+            with open(self._state_path(channel_name), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_channel_state(self, channel_name, state):
+        path = self._state_path(channel_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
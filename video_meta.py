@@ -0,0 +1,69 @@
+import re
+
+# 시청 페이지의 <meta itemprop> 태그 (속성 순서가 바뀌어도 매칭)
+META_PATTERNS = {
+    'date': re.compile(rb'<meta\s+(?:itemprop="uploadDate"\s+content="([^"]*)"|content="([^"]*)"\s+itemprop="uploadDate")'),
+    'views': re.compile(rb'<meta\s+(?:itemprop="interactionCount"\s+content="([^"]*)"|content="([^"]*)"\s+itemprop="interactionCount")'),
+}
+# 페이지에 포함된 플레이어 JSON (ytInitialPlayerResponse)의 같은 정보
+PLAYER_JSON_PATTERNS = {
+    'date': re.compile(rb'"uploadDate":"([^"]+)"'),
+    'views': re.compile(rb'"viewCount":"(\d+)"'),
+}
+# 청크 경계에 걸친 태그를 놓치지 않도록 이전 청크 끝부분을 남겨둘 길이
+CHUNK_OVERLAP = 512
+
+DEFAULT_DETAILS = {'date': 'Unknown date', 'views': 'Unknown views'}
+
+def _search(patterns, buffer, found):
+    for key, pattern in patterns.items():
+        if key in found:
+            continue
+        match = pattern.search(buffer)
+        if match:
+            value = next(group for group in match.groups() if group is not None)
+            found[key] = value.decode('utf-8', 'replace')
+
+def extract_video_meta(chunks, max_bytes=None):
+    """바이트 청크 스트림에서 업로드 날짜와 조회수를 찾는 즉시 반환.
+    DOM을 만들지 않고 정규식으로 <meta itemprop>를 찾고, 없으면 플레이어 JSON 값을 사용한다.
+    <meta> 값이 우선이므로 두 값을 모두 <meta>에서 찾았거나 max_bytes만큼 읽었을 때만 일찍 멈춘다.
+
+    Args:
+        chunks (iterable[bytes]): 응답 본문 청크 (예: response.iter_content())
+        max_bytes (int): 최대로 읽을 바이트 수 (None이면 끝까지)
+
+    Returns:
+        dict: {'date': ..., 'views': ...}
+    """
+    meta = {}
+    player = {}
+    tail = b""
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        buffer = tail + chunk
+        _search(META_PATTERNS, buffer, meta)
+        _search(PLAYER_JSON_PATTERNS, buffer, player)
+        if all(key in meta for key in DEFAULT_DETAILS) or (max_bytes is not None and read >= max_bytes):
+            break
+        tail = buffer[-CHUNK_OVERLAP:]
+
+    details = dict(DEFAULT_DETAILS)
+    details.update(player)
+    details.update(meta)  # 두 곳 모두에 있으면 기존과 같은 <meta> 값을 우선
+    return details
+
+def parse_video_details_soup(html):
+    """기존 BeautifulSoup 기반 추출 (벤치마크 비교 및 검증용)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    date_element = soup.find('meta', itemprop='uploadDate')
+    date = date_element['content'] if date_element else 'Unknown date'
+
+    views_element = soup.find('meta', itemprop='interactionCount')
+    views = views_element['content'] if views_element else 'Unknown views'
+
+    return {'date': date, 'views': views}
@@ -1,14 +1,25 @@
 import openai
-import sounddevice as sd
 import numpy as np
 import io
 import wave
 from dotenv import load_dotenv
 import os
+import re
+import math
+import struct
 import signal
+import time
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from gpt_NER import extract_stock_info_gpt4o
+from lazy_imports import LazyModule
 import json
 
+# 마이크를 열 때만 PortAudio가 필요하므로 인코딩 벤치마크 등에서는 로드하지 않음
+sd = LazyModule("sounddevice")
+
 # .env 파일 로드 및 API 키 설정
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -23,12 +34,42 @@ buffer_duration = 5  # 버퍼할 오디오 길이(초)
 overlap_duration = 1  # 오버랩 길이(초)
 buffer_size = int(samplerate * buffer_duration)
 overlap_size = int(samplerate * overlap_duration)
-audio_buffer = np.zeros((buffer_size, channels), dtype=np.float32)
-buffer_index = 0
+
+# 음성 구간(VAD) 기반 분할 설정
+segmentation = "vad"            # "vad": 말이 멈춘 곳에서 자르고 무음은 버림, "fixed": buffer_duration초 고정 창
+vad_frame_duration = 0.03       # 음성 여부를 판단하는 프레임 길이(초)
+vad_min_rms = 0.01              # 이보다 작은 RMS는 항상 무음 (약 -40 dBFS)
+vad_energy_ratio = 3.0          # 배경 소음 RMS의 이 배수를 넘어야 음성
+vad_max_zero_crossing = 0.35    # 샘플당 영점 교차율이 이보다 높으면 잡음(치찰음 제외 대부분의 음성은 더 낮음)
+vad_hangover = 0.5              # 음성이 끊긴 뒤 이 시간(초)만큼 조용하면 세그먼트 종료
+vad_padding = 0.2               # 세그먼트 앞뒤에 남길 무음(초)
+vad_min_speech = 0.25           # 음성 프레임이 이보다 짧은 세그먼트는 잡음으로 보고 버림(초)
+min_segment_duration = 1.0      # 세그먼트 최소 길이(초)
+max_segment_duration = 15.0     # 세그먼트 최대 길이(초). 넘으면 마지막 vad_cut_search초 중 가장 조용한 곳에서 자름
+vad_cut_search = 2.0
+
+# 업로드 인코딩 설정
+stt_samplerate = 16000  # Whisper는 16kHz로 변환해 사용하므로 미리 낮춰 업로드 크기를 줄임
+upload_format = "wav"   # "wav" 또는 "flac" (soundfile 패키지 필요, 무손실 압축)
+resample_taps = 24      # 리샘플링 저역 통과(windowed-sinc) 필터 탭 수
+
+# 처리 파이프라인 설정
+ring_duration = 30  # 오디오 콜백과 세그먼트 스레드 사이 링 버퍼 길이(초)
+stt_workers = 4     # 동시에 인코딩/전사할 세그먼트 수
+
+# 녹음 중 종목 분석(NER) 설정
+ner_mode = "rolling"       # "rolling": 녹음 중 텍스트가 쌓일 때마다 분석, "final": 종료 후 전체 텍스트를 한 번에 분석
+ner_window_chars = 800     # 분석하지 않은 새 텍스트가 이만큼 쌓이면 분석
+ner_interval = 30          # 또는 마지막 분석 후 이 시간(초)이 지났고 새 텍스트가 ner_min_chars 이상이면 분석
+ner_min_chars = 80
+ner_context_chars = 200    # 앞 구간 끝부분을 문맥으로 함께 전달 (구간 경계에 걸친 언급 보완)
+overlap_max_chars = 40     # 고정 창 오버랩으로 반복된 앞부분을 찾을 최대 글자 수 (공백/문장부호 제외)
+overlap_min_chars = 3
 
 # 전체 음성 기록을 위한 변수들
 all_transcripts = []
 is_running = True
+pipeline = None
 
 def signal_handler(signum, frame):
     """Ctrl+C 처리를 위한 시그널 핸들러"""
@@ -36,34 +77,362 @@ def signal_handler(signum, frame):
     print("\n음성 인식을 종료하고 결과를 분석합니다...")
     is_running = False
 
-def audio_callback(indata, frames, time, status):
-    """오디오 데이터가 들어올 때마다 호출되는 콜백 함수."""
-    global buffer_index, audio_buffer
-    if status:
-        print(status)
-    
-    # 버퍼에 새 데이터 추가
-    space_left = buffer_size - buffer_index
-    if frames <= space_left:
-        audio_buffer[buffer_index:buffer_index + frames] = indata
-        buffer_index += frames
-    else:
-        # 버퍼가 가득 차면 처리
-        audio_buffer[buffer_index:] = indata[:space_left]
-        process_audio_chunk(audio_buffer.copy())
-        
-        # 오버랩을 위해 마지막 부분을 버퍼의 시작으로 복사
-        audio_buffer[:overlap_size] = audio_buffer[-overlap_size:]
-        buffer_index = overlap_size
-        
-        # 남은 데이터 처리
-        remaining_data = indata[space_left:]
-        if len(remaining_data) > 0:
-            audio_buffer[buffer_index:buffer_index + len(remaining_data)] = remaining_data
-            buffer_index += len(remaining_data)
+class AudioRingBuffer:
+    """오디오 콜백(쓰기 하나)과 세그먼트 스레드(읽기 하나) 사이의 미리 할당된 링 버퍼.
+    쓰기/읽기 위치를 단조 증가하는 프레임 수로 두고 각자 자기 위치만 바꾸므로 락이 필요 없다.
+    읽기가 밀려 빈 공간이 없으면 블록을 버리고 개수를 센다."""
 
-def process_audio_chunk(audio_data):
-    """오디오 청크를 Whisper API로 STT 변환하고 텍스트 출력."""
+    def __init__(self, capacity, channels):
+        self.data = np.zeros((capacity, channels), dtype=np.float32)
+        self.capacity = capacity
+        self.written = 0
+        self.read = 0
+        self.last_write_at = None
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+
+    def write(self, block):
+        frames = len(block)
+        if self.written + frames - self.read > self.capacity:
+            self.dropped_blocks += 1
+            self.dropped_frames += frames
+            return False
+        start = self.written % self.capacity
+        first = min(frames, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        if first < frames:
+            self.data[:frames - first] = block[first:]
+        self.last_write_at = time.perf_counter()
+        self.written += frames
+        return True
+
+    def read_into(self, out):
+        """읽을 수 있는 프레임을 out 앞부분에 복사하고 복사한 프레임 수를 반환"""
+        frames = min(len(out), self.written - self.read)
+        start = self.read % self.capacity
+        first = min(frames, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        if first < frames:
+            out[first:frames] = self.data[:frames - first]
+        self.read += frames
+        return frames
+
+class FixedWindowSegmenter:
+    """buffer_duration초마다 overlap_duration초를 겹쳐 자르는 기존 방식"""
+
+    def __init__(self):
+        self.segment = np.zeros((buffer_size, channels), dtype=np.float32)
+        self.filled = 0
+        self.emitted = 0
+        self.dropped = 0
+
+    def feed(self, block):
+        """오디오 블록을 추가하고 완성된 세그먼트 목록을 반환"""
+        segments = []
+        while len(block):
+            copied = min(len(block), buffer_size - self.filled)
+            self.segment[self.filled:self.filled + copied] = block[:copied]
+            self.filled += copied
+            block = block[copied:]
+            if self.filled == buffer_size:
+                segments.append(self.segment.copy())
+                # 오버랩을 위해 마지막 부분을 버퍼의 시작으로 복사
+                self.segment[:overlap_size] = self.segment[-overlap_size:]
+                self.filled = overlap_size
+        self.emitted += len(segments)
+        return segments
+
+    def flush(self):
+        """종료 시 오버랩 뒤에 새로 들어온 오디오가 있으면 마지막 세그먼트로 반환"""
+        if self.filled > (overlap_size if self.emitted else 0):
+            self.emitted += 1
+            return [self.segment[:self.filled].copy()]
+        return []
+
+class VoiceActivitySegmenter:
+    """프레임(vad_frame_duration초)별 RMS 에너지와 영점 교차율로 음성 여부를 판단해, 말이 멈춘 곳에서 세그먼트를 자른다.
+    배경 소음 수준은 무음 프레임의 RMS로 계속 갱신하고, 음성이 vad_hangover초 끊겨야 세그먼트를 끝낸다.
+    음성이 없는 구간은 보내지 않고, 세그먼트 길이는 min/max_segment_duration 안으로 맞춘다."""
+
+    def __init__(self):
+        self.frame = int(samplerate * vad_frame_duration)
+        self.hangover_frames = max(1, round(vad_hangover / vad_frame_duration))
+        self.padding_frames = round(vad_padding / vad_frame_duration)
+        self.min_speech_frames = max(1, round(vad_min_speech / vad_frame_duration))
+        self.min_frames = round(min_segment_duration / vad_frame_duration)
+        self.max_frames = round(max_segment_duration / vad_frame_duration)
+        self.search_frames = min(self.max_frames - 1, round(vad_cut_search / vad_frame_duration))
+        # 현재 세그먼트(말하기 전에는 앞쪽 여백)의 오디오와 프레임별 RMS/음성 여부
+        self.audio = np.zeros((self.max_frames * self.frame, channels), dtype=np.float32)
+        self.levels = []
+        self.voiced = []
+        self.partial = np.zeros((self.frame, channels), dtype=np.float32)
+        self.partial_len = 0
+        self.speaking = False
+        self.silence_run = 0
+        self.noise_floor = vad_min_rms
+        self.emitted = 0
+        self.dropped = 0
+
+    def feed(self, block):
+        """오디오 블록을 추가하고 완성된 세그먼트 목록을 반환"""
+        segments = []
+        if self.partial_len:
+            copied = min(len(block), self.frame - self.partial_len)
+            self.partial[self.partial_len:self.partial_len + copied] = block[:copied]
+            self.partial_len += copied
+            block = block[copied:]
+            if self.partial_len < self.frame:
+                return segments
+            self.partial_len = 0
+            self._process(self.partial, segments)
+        whole = len(block) - len(block) % self.frame
+        if whole:
+            self._process(block[:whole], segments)
+        rest = len(block) - whole
+        if rest:
+            self.partial[:rest] = block[whole:]
+            self.partial_len = rest
+        return segments
+
+    def _process(self, audio, segments):
+        """프레임 단위로 나눠지는 오디오의 RMS/영점 교차율을 한 번에 계산한 뒤 프레임별로 상태 갱신"""
+        frames = audio[:, 0].reshape(-1, self.frame)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zero_crossing = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame
+        for i in range(len(frames)):
+            segment = self._push(audio[i * self.frame:(i + 1) * self.frame], float(rms[i]), zero_crossing[i])
+            if segment is not None:
+                segments.append(segment)
+
+    def _push(self, frame, rms, zero_crossing):
+        speech = rms > max(vad_min_rms, self.noise_floor * vad_energy_ratio) and zero_crossing < vad_max_zero_crossing
+        n = len(self.levels)
+        self.audio[n * self.frame:(n + 1) * self.frame] = frame
+        self.levels.append(rms)
+        self.voiced.append(speech)
+        n += 1
+
+        if not self.speaking:
+            if not speech:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * max(rms, vad_min_rms / vad_energy_ratio)
+                if n > self.padding_frames:
+                    # 앞쪽 여백만 남기고 오래된 무음 프레임은 버림
+                    self._keep_from(n - self.padding_frames)
+                return None
+            self.speaking = True
+            self.silence_run = 0
+            return None
+
+        self.silence_run = 0 if speech else self.silence_run + 1
+        if self.silence_run >= self.hangover_frames:
+            if sum(self.voiced) < self.min_speech_frames:
+                self.dropped += 1
+                self._reset()
+            elif n >= self.min_frames:
+                # 마지막 음성 뒤로는 vad_padding초만 남김 (최소 길이는 유지)
+                last_voiced = n - self.silence_run
+                return self._emit(max(self.min_frames, min(n, last_voiced + self.padding_frames)), reset=True)
+            return None
+        if n >= self.max_frames:
+            # 최대 길이에서는 마지막 vad_cut_search초 중 가장 조용한 프레임에서 자르고 나머지는 다음 세그먼트로 넘김
+            search = self.levels[n - self.search_frames:]
+            cut = n - self.search_frames + search.index(min(search)) + 1
+            return self._emit(cut, reset=False)
+        return None
+
+    def _emit(self, frames, reset):
+        segment = self.audio[:frames * self.frame].copy()
+        self.emitted += 1
+        if reset:
+            self._reset()
+        else:
+            self._keep_from(frames)
+        return segment
+
+    def _keep_from(self, start):
+        n = len(self.levels)
+        self.audio[:(n - start) * self.frame] = self.audio[start * self.frame:n * self.frame]
+        del self.levels[:start]
+        del self.voiced[:start]
+
+    def _reset(self):
+        self.levels.clear()
+        self.voiced.clear()
+        self.speaking = False
+        self.silence_run = 0
+
+    def flush(self):
+        """종료 시 진행 중인 음성 세그먼트를 반환 (최소 길이보다 짧아도 보냄)"""
+        if not self.speaking or sum(self.voiced) < self.min_speech_frames:
+            return []
+        n = len(self.levels)
+        return [self._emit(min(n, n - self.silence_run + self.padding_frames), reset=True)]
+
+def make_segmenter(mode):
+    if mode == "fixed":
+        return FixedWindowSegmenter()
+    if mode == "vad":
+        return VoiceActivitySegmenter()
+    raise ValueError(f"알 수 없는 분할 방식: {mode}")
+
+def fixed_window_cost(total_frames):
+    """같은 오디오를 고정 창(buffer_duration초, overlap_duration초 겹침)으로 보냈을 때의 (API 호출 수, 업로드 오디오 초)"""
+    if total_frames <= 0:
+        return 0, 0.0
+    calls = 1 + max(0, math.ceil((total_frames - buffer_size) / (buffer_size - overlap_size)))
+    return calls, (total_frames + overlap_size * (calls - 1)) / samplerate
+
+class TranscriptionPipeline:
+    """링 버퍼의 오디오를 segmentation 방식으로 잘라 워커 풀에서 인코딩/전사하고,
+    끝난 순서와 관계없이 세그먼트 순서대로 transcripts(기본: all_transcripts)에 추가한다.
+    stt는 업로드 파일 객체를 받아 텍스트를 반환하는 함수 (기본: openai_stt, 테스트용 FakeSTT)"""
+
+    def __init__(self, stt=None, workers=None, on_transcript=None, mode=None, transcripts=None, echo=True):
+        self.ring = AudioRingBuffer(int(samplerate * ring_duration), channels)
+        self.mode = mode or segmentation
+        self.segmenter = make_segmenter(self.mode)
+        self.stt = stt or openai_stt
+        self.on_transcript = on_transcript
+        self.transcripts = all_transcripts if transcripts is None else transcripts
+        self.echo = echo
+        self.executor = ThreadPoolExecutor(max_workers=workers or stt_workers)
+        self.lock = threading.Lock()
+        self.delivery_lock = threading.Lock()  # 전달 순서만 지킴. on_transcript는 self.lock 밖에서 호출
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._segment_loop, daemon=True)
+        self.pending = {}    # 앞 세그먼트를 기다리는 결과 (번호 → 텍스트)
+        self.next_seq = 0    # 다음에 all_transcripts에 넣을 세그먼트 번호
+        self.ready = deque()  # 순서가 확정되어 전달을 기다리는 텍스트
+        self.submitted = 0
+        self.queue_depth = 0  # 제출했지만 아직 전사가 끝나지 않은 세그먼트 수
+        self.max_queue_depth = 0
+        self.latencies = {}   # 세그먼트 번호 → 마지막 프레임 수신부터 전사 완료까지(초)
+        self.status_events = 0
+        self.input_frames = 0
+        self.uploaded_frames = 0
+        self.uploaded_bytes = 0
+        self.encode_seconds = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def callback(self, indata, frames, time_info, status):
+        """오디오 콜백 본체. 실시간 오디오 스레드에서 불리므로 링 버퍼에 복사만 함"""
+        if status:
+            self.status_events += 1
+        self.ring.write(indata)
+
+    def stop(self):
+        """링 버퍼에 남은 오디오까지 세그먼트로 보내고 모든 전사가 끝날 때까지 대기"""
+        self.stopped.set()
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+
+    def _segment_loop(self):
+        block = np.zeros((blocksize * 8, channels), dtype=np.float32)
+        while True:
+            stopping = self.stopped.is_set()
+            copied = self.ring.read_into(block)
+            if copied:
+                self.input_frames += copied
+                for segment in self.segmenter.feed(block[:copied]):
+                    self._submit(segment, self.ring.last_write_at)
+            elif stopping:
+                break
+            else:
+                time.sleep(0.01)
+        for segment in self.segmenter.flush():
+            self._submit(segment, self.ring.last_write_at)
+
+    def _submit(self, audio_data, captured_at):
+        seq = self.submitted
+        self.submitted += 1
+        self.uploaded_frames += len(audio_data)
+        with self.lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self.executor.submit(self._transcribe, seq, audio_data, captured_at)
+
+    def _transcribe(self, seq, audio_data, captured_at):
+        try:
+            encode_start = time.perf_counter()
+            audio_file = encoder_for_thread().encode(audio_data)
+            encode_seconds = time.perf_counter() - encode_start
+            upload_bytes = audio_file.getbuffer().nbytes
+            with self.lock:
+                self.encode_seconds += encode_seconds
+                self.uploaded_bytes += upload_bytes
+            transcript = self.stt(audio_file)
+        except Exception as e:
+            print(f"STT 변환 에러: {e}")
+            transcript = ""
+        latency = time.perf_counter() - captured_at
+        with self.lock:
+            self.queue_depth -= 1
+            self.latencies[seq] = latency
+            self.pending[seq] = transcript
+            while self.next_seq in self.pending:
+                transcript = self.pending.pop(self.next_seq)
+                self.next_seq += 1
+                if transcript.strip():
+                    self.ready.append(transcript)
+        # 콜백(NER 등)이 오래 걸리거나 stats()를 불러도 다른 워커가 막히지 않도록 lock을 놓고 전달.
+        # ready에는 순서대로 들어가므로 delivery_lock을 잡은 워커가 비우면 순서가 유지됨
+        with self.delivery_lock:
+            while self.ready:
+                transcript = self.ready.popleft()
+                if self.echo:
+                    print("🎤: " + transcript)
+                self.transcripts.append(transcript)
+                if self.on_transcript:
+                    self.on_transcript(transcript)
+
+    def stats(self):
+        latencies = sorted(self.latencies.values())
+        def percentile(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+        fixed_calls, fixed_seconds = fixed_window_cost(self.input_frames)
+        return {
+            'segmentation': self.mode,
+            'segments': self.submitted,
+            'dropped_segments': self.segmenter.dropped,
+            'audio_seconds': round(self.input_frames / samplerate, 2),
+            'uploaded_seconds': round(self.uploaded_frames / samplerate, 2),
+            'fixed_window_calls': fixed_calls,
+            'fixed_window_seconds': round(fixed_seconds, 2),
+            'upload_kb_per_segment': round(self.uploaded_bytes / self.submitted / 1024, 1) if self.submitted else None,
+            'encode_ms_per_segment': round(self.encode_seconds / self.submitted * 1000, 2) if self.submitted else None,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'latency_mean': round(sum(latencies) / len(latencies), 3) if latencies else None,
+            'latency_p50': percentile(0.5),
+            'latency_p95': percentile(0.95),
+            'latency_max': round(latencies[-1], 3) if latencies else None,
+            'dropped_blocks': self.ring.dropped_blocks,
+            'status_events': self.status_events,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\n세그먼트 {stats['segments']}개, 최대 대기 {stats['max_queue_depth']}개, "
+              f"지연 평균 {stats['latency_mean']}s / p95 {stats['latency_p95']}s / 최대 {stats['latency_max']}s, "
+              f"버린 블록 {stats['dropped_blocks']}개, 입력 상태 경고 {stats['status_events']}회")
+        print(f"업로드 세그먼트당 {stats['upload_kb_per_segment']}KB, 인코딩 {stats['encode_ms_per_segment']}ms")
+        if stats['segmentation'] != "fixed" and stats['fixed_window_calls']:
+            print(f"API 호출 {stats['segments']}회 / 업로드 {stats['uploaded_seconds']}초 "
+                  f"(고정 창이면 {stats['fixed_window_calls']}회 / {stats['fixed_window_seconds']}초, "
+                  f"호출 {1 - stats['segments'] / stats['fixed_window_calls']:.0%}, "
+                  f"오디오 {1 - stats['uploaded_seconds'] / stats['fixed_window_seconds']:.0%} 절감)")
+
+def audio_callback(indata, frames, time_info, status):
+    """오디오 데이터가 들어올 때마다 호출되는 콜백 함수.
+    실시간 오디오 스레드이므로 링 버퍼에 복사만 하고, 인코딩/전사는 TranscriptionPipeline이 처리"""
+    pipeline.callback(indata, frames, time_info, status)
+
+def encode_wav(audio_data):
+    """float32 오디오를 원래 샘플링 레이트의 16비트 WAV 파일 객체로 변환 (리샘플링 없는 기존 방식)"""
     pcm_audio = (audio_data * 32767).astype(np.int16)
     byte_io = io.BytesIO()
 
@@ -74,7 +443,110 @@ def process_audio_chunk(audio_data):
         wf.writeframes(pcm_audio.tobytes())
     
     byte_io.seek(0)
+    return byte_io
+
+class SegmentEncoder:
+    """세그먼트를 stt_samplerate 16비트 모노로 리샘플링해 업로드 파일 객체로 만든다.
+    폴리페이즈 windowed-sinc 필터 가중치와 입력/출력/WAV 버퍼를 한 번 할당해 재사용하므로
+    스레드마다 하나씩 사용한다 (encoder_for_thread)."""
 
+    def __init__(self, max_seconds=None, rate=None, target_rate=None, fmt=None):
+        # 기본값은 생성 시점의 모듈 설정을 따름
+        max_seconds = max_seconds or max(max_segment_duration, buffer_duration) + 1
+        rate = rate or samplerate
+        target_rate = target_rate or stt_samplerate
+        fmt = fmt or upload_format
+        self.rate = target_rate if target_rate < rate else rate
+        gcd = math.gcd(self.rate, rate)
+        self.up, self.down = self.rate // gcd, rate // gcd
+        self.half = resample_taps // 2
+        self.format = fmt
+        if fmt == "flac":
+            try:
+                import soundfile
+                self.soundfile = soundfile
+            except ImportError:
+                print("soundfile 패키지가 없어 WAV로 업로드합니다 (pip install soundfile)")
+                self.format = "wav"
+
+        # 출력 위상 p마다 입력 위치 p*down/up 주변 resample_taps개 샘플의 가중치 (합이 1이 되도록 정규화)
+        cutoff = 0.47 * self.up / self.down  # 입력 샘플 단위 차단 주파수 (목표 나이퀴스트의 94%)
+        phases = np.arange(self.up) * self.down / self.up
+        self.phase_base = np.floor(phases).astype(np.int64) - self.half + 1
+        offsets = np.arange(resample_taps)[None, :] - self.half + 1 - (phases - np.floor(phases))[:, None]
+        weights = 2 * cutoff * np.sinc(2 * cutoff * offsets) * (0.5 + 0.5 * np.cos(np.pi * offsets / self.half))
+        weights /= weights.sum(axis=1, keepdims=True)
+        self.tap_weights = np.ascontiguousarray(weights.T, dtype=np.float32)  # (탭, 위상)
+        self._allocate(int(max_seconds * rate))
+
+    def _allocate(self, max_frames):
+        self.max_frames = max_frames
+        blocks = max_frames // self.down + 2
+        # 출력 j는 x[(j // up) * down + phase_base[j % up] + k] (k=0..탭-1)의 가중합. 앞뒤 여백은 0으로 둠
+        self.indices = (np.arange(blocks)[:, None] * self.down + self.phase_base[None, :] + self.half).ravel()
+        self.samples = np.zeros(max_frames + self.down + resample_taps * 2, dtype=np.float32)
+        self.output = np.zeros(blocks * self.up, dtype=np.float32)
+        self.scratch = np.zeros(blocks * self.up, dtype=np.float32)
+        self.payload = bytearray(44 + blocks * self.up * 2)
+        self.pcm = np.frombuffer(self.payload, dtype=np.int16, offset=44)
+
+    def resample(self, audio_data):
+        """float32 (프레임, 채널) 오디오의 첫 채널을 target_rate로 변환. 반환 배열은 다음 호출에서 재사용됨"""
+        frames = len(audio_data)
+        if frames > self.max_frames:
+            self._allocate(frames)
+        mono = audio_data[:, 0] if audio_data.ndim > 1 else audio_data
+        if self.up == self.down:
+            self.output[:frames] = mono
+            return self.output[:frames]
+        start = self.half
+        self.samples[start:start + frames] = mono
+        self.samples[start + frames:start + frames + self.down + resample_taps] = 0
+        out_frames = -(-frames * self.up // self.down)
+        blocks = -(-out_frames // self.up)
+        output = self.output[:blocks * self.up]
+        scratch = self.scratch[:blocks * self.up]
+        indices = self.indices[:blocks * self.up]
+        output[:] = 0
+        for k in range(resample_taps):
+            np.take(self.samples[k:], indices, out=scratch)
+            scratch.reshape(blocks, self.up)[:] *= self.tap_weights[k]
+            output += scratch
+        return output[:out_frames]
+
+    def encode(self, audio_data):
+        """리샘플링한 세그먼트를 업로드용 파일 객체(.name 포함)로 반환"""
+        output = self.resample(audio_data)
+        frames = len(output)
+        np.multiply(output, 32767, out=output)
+        np.clip(output, -32768, 32767, out=output)
+        self.pcm[:frames] = output
+        if self.format == "flac":
+            byte_io = io.BytesIO()
+            self.soundfile.write(byte_io, self.pcm[:frames], self.rate, format='FLAC', subtype='PCM_16')
+            byte_io.seek(0)
+            byte_io.name = "segment.flac"
+            return byte_io
+        data_bytes = frames * 2
+        struct.pack_into('<4sI4s4sIHHIIHH4sI', self.payload, 0, b'RIFF', 36 + data_bytes, b'WAVE', b'fmt ', 16,
+                         1, 1, self.rate, self.rate * 2, 2, 16, b'data', data_bytes)
+        byte_io = io.BytesIO(memoryview(self.payload)[:44 + data_bytes])
+        byte_io.name = "segment.wav"
+        return byte_io
+
+_thread_encoders = threading.local()
+
+def encoder_for_thread():
+    """현재 스레드의 SegmentEncoder (버퍼를 스레드끼리 공유하지 않도록)"""
+    encoder = getattr(_thread_encoders, 'encoder', None)
+    if encoder is None:
+        encoder = _thread_encoders.encoder = SegmentEncoder()
+    return encoder
+
+def process_audio_chunk(audio_data):
+    """오디오 청크 하나를 Whisper API로 STT 변환하고 텍스트 출력 (기존 호출부 호환용 동기 버전).
+    실시간 처리는 TranscriptionPipeline을 사용."""
+    byte_io = encoder_for_thread().encode(audio_data)
     try:
         transcript = openai_stt(byte_io)
         if transcript.strip():
@@ -85,7 +557,8 @@ def process_audio_chunk(audio_data):
 
 def openai_stt(audio_file):
     """OpenAI Whisper API를 사용하여 음성을 텍스트로 변환."""
-    audio_file.name = "recording.wav"
+    if not getattr(audio_file, 'name', None):
+        audio_file.name = "recording.wav"
     # Using a potentially better model for transcription
     transcript = openai.audio.transcriptions.create(
         model="whisper-1", 
@@ -94,6 +567,136 @@ def openai_stt(audio_file):
     )
     return transcript.text
 
+def _word_chars(text):
+    return re.sub(r"\W", "", text)
+
+def strip_overlap(previous, current, max_chars=None, min_chars=None):
+    """고정 창의 overlap_duration초 겹침 때문에 current 앞부분에 다시 전사된 previous 끝부분을 제거.
+    공백/문장부호를 뺀 글자로 previous의 끝과 current의 앞이 가장 길게 일치하는 부분을 찾음 (단어 중간에서 잘린 경우 포함)"""
+    max_chars = max_chars or overlap_max_chars
+    min_chars = min_chars or overlap_min_chars
+    tail = _word_chars(previous)[-max_chars:]
+    head = _word_chars(current)[:max_chars]
+    for length in range(min(len(tail), len(head)), min_chars - 1, -1):
+        if tail.endswith(head[:length]):
+            break
+    else:
+        return current
+    seen = 0
+    for i, ch in enumerate(current):
+        if _word_chars(ch):
+            seen += 1
+            if seen == length:
+                return current[i + 1:].lstrip(" \t.,?!")
+    return ""
+
+def parse_stock_info(stock_info):
+    """extract_stock_info_gpt4o 응답을 종목 dict 목록으로. JSON 객체로 감싼 응답이면 첫 배열 값을 사용"""
+    try:
+        parsed = json.loads(stock_info) if isinstance(stock_info, str) else stock_info
+    except json.JSONDecodeError:
+        return []
+    if isinstance(parsed, dict):
+        if '종목' in parsed:
+            return [parsed]
+        parsed = next((value for value in parsed.values() if isinstance(value, list)), [])
+    return [info for info in parsed or [] if isinstance(info, dict) and info.get('종목')]
+
+def _stock_key(info):
+    name = re.sub(r"\(주\)|주식회사|\s", "", str(info.get('종목', ''))).lower()
+    return name, str(info.get('액션') or '').strip()
+
+class RollingStockAnalyzer:
+    """녹음 중 전사 텍스트를 일정 분량마다 분석해, 종목 언급을 (종목, 액션)별로 합친 표를 유지한다.
+    분석은 별도 스레드 하나에서 순서대로 실행되므로 전사 파이프라인을 막지 않고,
+    종료 시에는 마지막 구간만 분석하면 되어 결과가 바로 나온다."""
+
+    def __init__(self, extract=None, strip=True, live=True):
+        self.extract = extract or extract_stock_info_gpt4o
+        self.strip = strip    # 고정 창 오버랩으로 반복된 텍스트 제거 여부
+        self.live = live      # 구간 분석이 끝날 때마다 표 출력
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        self.last_transcript = ""
+        self.pending = []     # 아직 분석하지 않은 텍스트
+        self.pending_chars = 0
+        self.context = ""
+        self.last_submit = time.monotonic()
+        self.windows = 0
+        self.rows = {}        # (종목, 액션) → 합친 언급
+
+    def add(self, transcript):
+        """세그먼트 순서대로 전사 텍스트를 추가 (TranscriptionPipeline의 on_transcript)"""
+        text = strip_overlap(self.last_transcript, transcript) if self.strip else transcript
+        self.last_transcript = transcript
+        if not text.strip():
+            return
+        with self.lock:
+            self.pending.append(text)
+            self.pending_chars += len(text)
+            waited = time.monotonic() - self.last_submit
+            if self.pending_chars >= ner_window_chars or (self.pending_chars >= ner_min_chars and waited >= ner_interval):
+                self._submit_window()
+
+    def _submit_window(self):
+        text = " ".join(self.pending)
+        context = self.context
+        self.pending, self.pending_chars = [], 0
+        self.context = text[-ner_context_chars:]
+        self.last_submit = time.monotonic()
+        self.windows += 1
+        self.executor.submit(self._analyze, self.windows, text, context)
+
+    def _analyze(self, window, text, context):
+        try:
+            mentions = parse_stock_info(self.extract(text, context) if context else self.extract(text))
+        except Exception as e:
+            print(f"분석 중 오류 발생 (구간 {window}): {e}")
+            return
+        with self.lock:
+            for info in mentions:
+                self._merge(info, window)
+        if self.live and mentions:
+            print(f"\n=== 주식 정보 (구간 {window}까지) ===")
+            print_stock_table(self.table())
+
+    def _merge(self, info, window):
+        key = _stock_key(info)
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = {'종목': info['종목'], '액션': info.get('액션', ''), '가격': [], '의견': '',
+                                    '감성': '', '언급': 0, '첫 구간': window, '마지막 구간': window}
+        price = str(info.get('가격') or '').strip()
+        if price and price != 'N/A' and re.sub(r"[\s,]", "", price) not in {re.sub(r"[\s,]", "", p) for p in row['가격']}:
+            row['가격'].append(price)
+        for field in ('의견', '감성'):
+            if info.get(field):
+                row[field] = info[field]
+        row['언급'] += 1
+        row['마지막 구간'] = window
+
+    def table(self):
+        """지금까지 합친 종목 언급 (처음 언급된 순서)"""
+        with self.lock:
+            return sorted((dict(row, 가격=list(row['가격'])) for row in self.rows.values()),
+                          key=lambda row: row['첫 구간'])
+
+    def finish(self):
+        """남은 텍스트를 마지막 구간으로 분석하고 모든 분석이 끝나면 최종 표를 반환"""
+        with self.lock:
+            if self.pending:
+                self._submit_window()
+        self.executor.shutdown(wait=True)
+        return self.table()
+
+def print_stock_table(rows):
+    if not rows:
+        print("주식 관련 정보를 찾을 수 없습니다.")
+        return
+    for row in rows:
+        print(f"- {row['종목']} | {row['액션'] or 'N/A'} | {', '.join(row['가격']) or 'N/A'} | "
+              f"{row['감성'] or 'N/A'} | 언급 {row['언급']}회 | {row['의견'] or ''}")
+
 def analyze_transcripts():
     """모든 트랜스크립트를 결합하고 NER 분석 수행"""
     if not all_transcripts:
@@ -137,9 +740,132 @@ def analyze_transcripts():
     except Exception as e:
         print(f"분석 중 오류 발생: {e}")
 
+def read_audio_file(path, pcm_rate=None):
+    """WAV(8/16/32비트 PCM) 또는 raw 16비트 PCM(.pcm/.raw, 모노, pcm_rate Hz) 파일을
+    samplerate Hz 모노 float32 (프레임, 1) 배열로 읽음"""
+    if path.lower().endswith(('.pcm', '.raw')):
+        with open(path, 'rb') as f:
+            audio = np.frombuffer(f.read(), dtype='<i2').astype(np.float32) / 32768
+        rate = pcm_rate or samplerate
+    else:
+        with wave.open(path, 'rb') as wf:
+            rate, width, file_channels = wf.getframerate(), wf.getsampwidth(), wf.getnchannels()
+            data = wf.readframes(wf.getnframes())
+        if width == 1:
+            audio = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif width in (2, 4):
+            dtype = '<i2' if width == 2 else '<i4'
+            audio = np.frombuffer(data, dtype=dtype).astype(np.float32) / float(2 ** (8 * width - 1))
+        else:
+            raise ValueError(f"지원하지 않는 WAV 샘플 크기: {width * 8}비트")
+        audio = audio.reshape(-1, file_channels).mean(axis=1)
+    if rate != samplerate:
+        # 입력 변환은 한 번만 하므로 선형 보간으로 충분
+        positions = np.arange(int(len(audio) * samplerate / rate)) * (rate / samplerate)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return np.ascontiguousarray(audio[:, None])
+
+def audio_seconds(audio_file):
+    """업로드 파일 객체(WAV/FLAC)의 오디오 길이(초)"""
+    audio_file.seek(0)
+    if getattr(audio_file, 'name', '').endswith('.flac'):
+        import soundfile
+        info = soundfile.info(audio_file)
+        seconds = info.frames / info.samplerate
+    else:
+        with wave.open(audio_file, 'rb') as wf:
+            seconds = wf.getnframes() / wf.getframerate()
+    audio_file.seek(0)
+    return seconds
+
+class FakeSTT:
+    """Whisper 대신 쓰는 로컬 STT 백엔드. 고정 지연 + 오디오 길이에 비례한 지연 후 세그먼트 정보를 텍스트로 반환"""
+
+    def __init__(self, latency=0.3, seconds_per_audio_second=0.05):
+        self.latency = latency
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, audio_file):
+        seconds = audio_seconds(audio_file)
+        time.sleep(self.latency + seconds * self.seconds_per_audio_second)
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        return f"[fake {call}] {seconds:.1f}초 세그먼트"
+
+def replay_audio(path, realtime=True, stt=None, on_transcript=None, echo=True, pcm_rate=None):
+    """WAV/PCM 파일을 blocksize 블록으로 나눠 마이크 입력과 같은 콜백 → 링 버퍼 → 분할 → 전사 경로로 흘려보내고
+    실행 보고서 dict를 반환.
+    realtime=True이면 실제 녹음처럼 블록 길이 간격으로 보내며, 예정 시각보다 한 블록 이상 늦은 블록은
+    PortAudio의 입력 오버플로처럼 status를 붙여 보냄(status_events). realtime=False이면 링 버퍼에 자리가
+    날 때마다 최대한 빨리 보냄."""
+    audio = read_audio_file(path, pcm_rate)
+    transcripts = []
+    replay_pipeline = TranscriptionPipeline(stt=stt, on_transcript=on_transcript, transcripts=transcripts, echo=echo)
+    replay_pipeline.start()
+    ring = replay_pipeline.ring
+    block_seconds = blocksize / samplerate
+    start = time.perf_counter()
+    for i, offset in enumerate(range(0, len(audio), blocksize)):
+        block = audio[offset:offset + blocksize]
+        status = None
+        if realtime:
+            delay = start + i * block_seconds - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > block_seconds:
+                status = "input overflow"
+        else:
+            while ring.capacity - (ring.written - ring.read) < len(block):
+                time.sleep(0.001)
+        replay_pipeline.callback(block, len(block), None, status)
+    fed_at = time.perf_counter()
+    replay_pipeline.stop()
+    finished_at = time.perf_counter()
+
+    duration = len(audio) / samplerate
+    stats = replay_pipeline.stats()
+    return {
+        'file': path,
+        'mode': "realtime" if realtime else "fast",
+        'duration_seconds': round(duration, 2),
+        'wall_seconds': round(finished_at - start, 3),
+        'drain_seconds': round(finished_at - fed_at, 3),  # 입력이 끝난 뒤 마지막 전사까지
+        'real_time_factor': round((finished_at - start) / duration, 3) if duration else None,
+        'blocks': -(-len(audio) // blocksize),
+        'transcripts': transcripts,
+        'segment_latencies': [round(replay_pipeline.latencies[seq], 3) for seq in sorted(replay_pipeline.latencies)],
+        **stats,
+    }
+
+def replay_streams(paths, streams=1, realtime=True, stt=None, pcm_rate=None):
+    """파일 streams개를 동시에 재생해 한 서버가 감당할 수 있는 동시 스트림 수를 가늠. 스트림별 보고서 목록 반환"""
+    reports = [None] * streams
+    def run(index):
+        reports[index] = replay_audio(paths[index % len(paths)], realtime, stt, echo=streams == 1, pcm_rate=pcm_rate)
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return reports
+
+def print_replay_reports(reports, wall_seconds):
+    for index, report in enumerate(reports):
+        print(f"[{index}] {report['file']} ({report['mode']}) 오디오 {report['duration_seconds']}초, "
+              f"처리 {report['wall_seconds']}초, RTF {report['real_time_factor']}, 세그먼트 {report['segments']}개, "
+              f"지연 p50 {report['latency_p50']}s / p95 {report['latency_p95']}s / 최대 {report['latency_max']}s, "
+              f"버린 블록 {report['dropped_blocks']}/{report['blocks']}, 오버플로 {report['status_events']}")
+    audio_total = sum(report['duration_seconds'] for report in reports)
+    if len(reports) > 1 and wall_seconds:
+        print(f"동시 {len(reports)}개 스트림: 오디오 {audio_total:.1f}초를 {wall_seconds:.1f}초에 처리 "
+              f"(처리량 {audio_total / wall_seconds:.1f}배속)")
+
 def realtime_transcription():
     """실시간 음성 녹음 및 STT 변환 시작."""
-    global is_running
+    global is_running, pipeline
     
     print("실시간 음성 텍스트 변환 시작... 마이크에 대고 말하세요.")
     print("Ctrl+C를 눌러 종료하고 분석을 시작합니다.\n")
@@ -147,6 +873,9 @@ def realtime_transcription():
     # Ctrl+C 시그널 핸들러 등록
     signal.signal(signal.SIGINT, signal_handler)
 
+    analyzer = RollingStockAnalyzer(strip=segmentation == "fixed") if ner_mode == "rolling" else None
+    pipeline = TranscriptionPipeline(on_transcript=analyzer.add if analyzer else None)
+    pipeline.start()
     try:
         with sd.InputStream(samplerate=samplerate,
                           channels=channels,
@@ -155,13 +884,52 @@ def realtime_transcription():
             while is_running:
                 sd.sleep(100)
             
-            # 종료 시 분석 수행
-            analyze_transcripts()
-            
     except sd.PortAudioError as e:
         print(f"오디오 에러 발생: {e}")
         print("사용 가능한 오디오 장치 목록:")
         print(sd.query_devices())
+        return
+    finally:
+        # 스트림을 닫은 뒤 남은 세그먼트의 전사가 끝날 때까지 대기
+        pipeline.stop()
+
+    # 종료 시 분석 수행 (rolling 모드는 마지막 구간만 분석하면 됨)
+    pipeline.print_stats()
+    if analyzer is None:
+        analyze_transcripts()
+        return
+    rows = analyzer.finish()
+    print("\n=== 주식 정보 분석 결과 ===")
+    print_stock_table(rows)
 
 if __name__ == '__main__':
-    realtime_transcription()
+    parser = argparse.ArgumentParser(description="실시간 음성 인식 및 주식 종목 분석 (인자 없이 실행하면 마이크 사용)")
+    parser.add_argument("--replay", nargs="+", metavar="FILE", help="마이크 대신 WAV/PCM 파일을 같은 경로로 재생")
+    parser.add_argument("--fast", action="store_true", help="실제 속도 대신 최대한 빨리 재생")
+    parser.add_argument("--streams", type=int, default=1, help="동시에 재생할 스트림 수 (용량 산정용)")
+    parser.add_argument("--stt", choices=["openai", "fake"], default="openai", help="STT 백엔드")
+    parser.add_argument("--fake-latency", type=float, default=0.3, help="fake STT의 요청당 지연(초)")
+    parser.add_argument("--segmentation", choices=["vad", "fixed"], help="세그먼트 분할 방식")
+    parser.add_argument("--pcm-rate", type=int, help="raw PCM 파일의 샘플링 레이트 (기본: samplerate)")
+    parser.add_argument("--ner", action="store_true", help="재생 중 종목 분석(rolling NER)도 실행 (스트림 1개)")
+    parser.add_argument("--report", help="재생 보고서 JSON 경로")
+    args = parser.parse_args()
+    if args.segmentation:
+        segmentation = args.segmentation
+
+    if not args.replay:
+        realtime_transcription()
+    else:
+        stt = FakeSTT(args.fake_latency) if args.stt == "fake" else openai_stt
+        wall_start = time.perf_counter()
+        if args.ner and args.streams == 1:
+            analyzer = RollingStockAnalyzer(strip=segmentation == "fixed")
+            reports = [replay_audio(args.replay[0], not args.fast, stt, analyzer.add, pcm_rate=args.pcm_rate)]
+            print("\n=== 주식 정보 분석 결과 ===")
+            print_stock_table(analyzer.finish())
+        else:
+            reports = replay_streams(args.replay, args.streams, not args.fast, stt, args.pcm_rate)
+        print_replay_reports(reports, time.perf_counter() - wall_start)
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, ensure_ascii=False, indent=2)